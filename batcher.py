@@ -1,19 +1,20 @@
-import logging
+import asyncio
 import multiprocessing
 import os
 import subprocess
+import time
 
-from flask import Flask, request
 from loguru import logger
 
 from src import yaml_file
-from src.aggregate import Aggregate
 from src.cli import get_latest_block_number, query_protocol_parameters
 from src.daemon import create_toml_file
 from src.db_manager import DbManager
-from src.io_manager import IOManager
-from src.sorting import Sorting
+from src.ingest import Ingest
+from src.oura import read_batches
+from src.server import IngestServer
 from src.utility import create_folder_if_not_exists, parent_directory_path
+from src.worker import AggregationWorker
 
 ###############################################################################
 # Top level config required for the batcher to run
@@ -40,12 +41,6 @@ logger.add(
     level=config["logging_level"]
 )
 
-# Initialize Flask
-app = Flask(__name__)
-# Disable Flask's default logger
-log = logging.getLogger('werkzeug')
-log.setLevel(logging.ERROR)
-
 # create the tmp directory if it doesn't exist already
 tmp_folder = os.path.join(parent_dir, "tmp")
 create_folder_if_not_exists(tmp_folder)
@@ -56,73 +51,40 @@ query_protocol_parameters(config["socket_path"], os.path.join(parent_dir, "tmp/p
 # the latest block at start time
 latest_block_number = get_latest_block_number(config['socket_path'], 'tmp/tip.json', config['network'], config['cli_path'])
 
+# the oura events are staged here and applied one block at a time
+ingest = Ingest(db, config, logger)
 
-@app.route('/webhook', methods=['POST'])
-def webhook():
-    """The webhook for oura. This is where all the db logic needs to go.
+# webhook posts each event to the ingest server, stdout pipes the JSONL events from oura
+ingest_mode = config.get("ingest_mode", "webhook")
 
-    Returns:
-        str: A success/failure string
-    """
-    data = request.get_json()  # Get the JSON data from the request
-    block_number = data['context']['block_number']
-    block_hash = data['context']['block_hash']
-    block_slot = data['context']['slot']
+# order aggregation runs in its own thread so the webhook returns right away
+worker = AggregationWorker(db, config, logger)
 
-    # Get the current status
-    sync_status = db.status.read()
 
-    # What the db thinks is the current block is
-    db_number = sync_status["block_number"]
+def block_committed(block_number: int) -> None:
+    """Signal the aggregation worker once we are synced past the start tip.
 
-    # check for a change in the block number
-    if block_number != db_number and block_number is not None and block_hash is not None and block_slot is not None:
-        # the block number has changed so update the db
-        db.status.update(block_number, block_hash, block_slot)
-        try:
-            # are we still syncing?
-            if int(block_number) > latest_block_number:
-                logger.debug(f"Block: {block_number} : Timestamp: {block_slot}")
-                # we are synced, start fulfilling orders
-                # debug mode will not sort and aggregate orders to fulfill
-                # it will sync the db only
-                if config["debug_mode"] is False:
-                    # sort first
-                    sorted_queue = Sorting.fifo(db)
-                    # then batch
-                    Aggregate.orders(db, sorted_queue, config, logger)
-            else:
-                # we are still syncing
-                tip_difference = latest_block_number - int(block_number)
-                logger.debug(f"Blocks til tip: {tip_difference}")
-        except TypeError:
-            # incase block number some how isnt a number; which does happen at start
-            pass
-
-    # try to sync inputs and outputs
+    Args:
+        block_number (int): The block number that was committed
+    """
     try:
-        variant = data['variant']
-
-        # if a rollback occurs we need to handle it somehow
-        if variant == 'RollBack':
-            # how do we handle it?
-            logger.critical(f"ROLLBACK: {block_number}")
-
-        # tx inputs
-        if variant == 'TxInput':
-            IOManager.handle_input(db, data, logger)
-
-        # tx outputs
-        if variant == 'TxOutput':
-            IOManager.handle_output(db, config, data, logger)
-
-    # not the right variant so pass it
-    except Exception:
+        # are we still syncing?
+        if int(block_number) > latest_block_number:
+            logger.debug(f"Block: {block_number}")
+            # we are synced, start fulfilling orders
+            # debug mode will not sort and aggregate orders to fulfill
+            # it will sync the db only
+            if config["debug_mode"] is False:
+                # the worker sorts and batches, blocks during a round coalesce
+                worker.signal(block_number)
+        else:
+            # we are still syncing
+            tip_difference = latest_block_number - int(block_number)
+            logger.debug(f"Blocks til tip: {tip_difference}")
+    except TypeError:
+        # incase block number some how isnt a number; which does happen at start
         pass
 
-    # if we are here then everything in the webhook is good
-    return 'Webhook Successful'
-
 
 def run_ogmios():
     """
@@ -138,14 +100,56 @@ def run_oura():
     subprocess.run([config['oura_path'], 'daemon', '--config', 'daemon.toml'])
 
 
-def flask_process(start_event):
-    """Start and wait for the flask app to begin.
+def write_daemon_toml():
+    """
+    Write the oura daemon toml with the last committed block as the intersect.
+    """
+    sync_status = db.status.read()
+    # start log
+    logger.info(f"Loading Block {sync_status['block_number']} @ Slot {sync_status['timestamp']} With Hash {sync_status['block_hash']}")
+
+    # set the daemon magic based on the network config, preprod or mainnet only
+    magic = "preprod" if "testnet-magic" in config["network"] else "mainnet"
+    sink = "Stdout" if ingest_mode == "stdout" else "Webhook"
+    create_toml_file('daemon.toml', config['socket_path'], sync_status['timestamp'], sync_status['block_hash'], config['delay_depth'], magic=magic, sink=sink)
+
+
+def follow_oura():
+    """
+    Run the Oura daemon and apply its JSONL events straight from the stdout
+    pipe. If oura exits it is restarted from the last committed block.
+    """
+    while True:
+        proc = subprocess.Popen([config['oura_path'], 'daemon', '--config', 'daemon.toml'], stdout=subprocess.PIPE)
+        try:
+            for events in read_batches(proc.stdout, config.get("ingest_batch_size", 1000)):
+                committed = ingest.feed(events)
+                # only the latest block matters to the worker
+                if committed:
+                    block_committed(committed[-1])
+        finally:
+            proc.terminate()
+            proc.wait()
+
+        logger.error("Oura Stopped, Restarting From The Last Committed Block")
+        time.sleep(5)
+        # a partially staged block is sent again after the intersect
+        ingest.reset()
+        write_daemon_toml()
+
+
+def server_process(start_event):
+    """Start and wait for the ingest server to begin.
 
     Args:
         start_event (Event): The event to wait to complete.
     """
     start_event.wait()  # Wait until the start event is set
-    app.run(host='0.0.0.0', port=8008)
+    # the worker thread has to start inside the server process
+    worker.start()
+    server = IngestServer(ingest, logger, on_commit=block_committed)
+    # the oura webhook, events are queued for a single writer
+    asyncio.run(server.serve('0.0.0.0', 8008))
 
 
 def start_processes():
@@ -153,21 +157,23 @@ def start_processes():
     Start the batcher processes as a multiprocessing event.
     """
     # create the daemon toml file
-    sync_status = db.status.read()
-    # start log
-    logger.info(f"Loading Block {sync_status['block_number']} @ Slot {sync_status['timestamp']} With Hash {sync_status['block_hash']}")
+    write_daemon_toml()
 
-    # set the daemon magic based on the network config, preprod or mainnet only
-    magic = "preprod" if "testnet-magic" in config["network"] else "mainnet"
-    create_toml_file('daemon.toml', config['socket_path'], sync_status['timestamp'], sync_status['block_hash'], config['delay_depth'], magic=magic)
+    if ingest_mode == "stdout":
+        start_stdout_ingest()
+        return
+
+    # sqlite connections must not be carried across a fork, the processes
+    # open their own connections the first time they use the db
+    db.connections.close()
 
     # start the processes as events in order
     start_event = multiprocessing.Event()
 
     # start the webhook
-    flask_proc = multiprocessing.Process(
-        target=flask_process, args=(start_event,))
-    flask_proc.start()
+    server_proc = multiprocessing.Process(
+        target=server_process, args=(start_event,))
+    server_proc.start()
 
     # start oura daemon
     daemon_proc = multiprocessing.Process(target=run_oura)
@@ -178,11 +184,11 @@ def start_processes():
         ogmios_proc = multiprocessing.Process(target=run_ogmios)
         ogmios_proc.start()
 
-    # Set the start event to indicate that the Flask app is ready to run
+    # Set the start event to indicate that the server is ready to run
     start_event.set()
     try:
         # Wait for both processes to complete
-        flask_proc.join()
+        server_proc.join()
         daemon_proc.join()
         ogmios_proc.join() if config['use_ogmios'] is True else None
     except KeyboardInterrupt:
@@ -191,14 +197,35 @@ def start_processes():
         # clean up the db
         db.cleanup()
         # terminate and join
-        flask_proc.terminate()
+        server_proc.terminate()
         daemon_proc.terminate()
         ogmios_proc.terminate() if config['use_ogmios'] is True else None
-        flask_proc.join()
+        server_proc.join()
         daemon_proc.join()
         ogmios_proc.join() if config['use_ogmios'] is True else None
 
 
+def start_stdout_ingest():
+    """
+    Run the batcher without the webhook, the oura events are read from its stdout.
+    """
+    if config['use_ogmios'] is True:
+        ogmios_proc = multiprocessing.Process(target=run_ogmios)
+        ogmios_proc.start()
+
+    worker.start()
+    try:
+        follow_oura()
+    except KeyboardInterrupt:
+        # Handle KeyboardInterrupt (CTRL+C)
+        logger.error("KeyboardInterrupt detected, terminating processes...")
+        worker.stop()
+        # clean up the db
+        db.cleanup()
+        ogmios_proc.terminate() if config['use_ogmios'] is True else None
+        ogmios_proc.join() if config['use_ogmios'] is True else None
+
+
 if __name__ == '__main__':
     # start the batcher processes
     logger.info("Starting Batcher...")
@@ -0,0 +1,59 @@
+"""
+Benchmark round tripping sale and queue datums and values through the codec,
+the way they are written to and read from the db columns, against the
+standard library json.
+
+Usage:
+    python -m benchmarks.bench_codec [n]
+"""
+import json
+import sys
+import time
+
+from src import codec
+
+SALE_DATUM = {
+    "constructor": 0,
+    "fields": [
+        {"constructor": 0, "fields": [{"bytes": "39f29cfe6ab0765578a6e0d8871e1a3bc18f5d277b257095aabf1cd8"}, {"bytes": ""}]},
+        {"constructor": 0, "fields": [{"bytes": "85510e059114a9dcdf7c1d842a1b8fdfd2438cd31ef1b3edcf6d5d67"}, {"bytes": "001bc280002699546a3f2b852e6d2543659ede8722ea06251ef1e7fd94aeae27"}, {"int": 1}]},
+        {"constructor": 0, "fields": [{"bytes": "769c4c6e9bc3ba5406b9b89fb7beb6819e638ff2e2de63f008d5bcff"}, {"bytes": "744e45574d"}, {"int": 1}]},
+        {"int": 100000000},
+    ],
+}
+
+QUEUE_DATUM = {
+    "constructor": 0,
+    "fields": [
+        {"constructor": 0, "fields": [{"bytes": "0d28d4a2e4c1504b8bf77f7db89561ca6421eef8ee1ea5a99300e88e"}, {"bytes": ""}]},
+        {"int": 1234567},
+        {"constructor": 0, "fields": [{"bytes": "769c4c6e9bc3ba5406b9b89fb7beb6819e638ff2e2de63f008d5bcff"}, {"bytes": "744e45574d"}, {"int": 1000000}]},
+        {"bytes": "ca11ab1e0081db953e0a5384d76d24eb7fbafbea8a109bbc61d82596fafcfb60"},
+    ],
+}
+
+VALUE = {
+    "lovelace": 5000000,
+    "26c0f8e2d3be37de297fa57c48820fcb24c7b09aebe280430cef9d87": {"001bc280002699546a3f2b852e6d2543659ede8722ea06251ef1e7fd94aeae27": 1},
+    "769c4c6e9bc3ba5406b9b89fb7beb6819e638ff2e2de63f008d5bcff": {"744e45574d": 1000000},
+}
+
+
+def round_trip(dumps, loads, data, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        loads(dumps(data))
+    return (time.perf_counter() - start) / n
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print(f"codec backend: {codec.BACKEND}, {n} round trips each")
+    for name, data in (("sale datum", SALE_DATUM), ("queue datum", QUEUE_DATUM), ("value", VALUE)):
+        before = round_trip(json.dumps, json.loads, data, n)
+        after = round_trip(codec.dumps, codec.loads, data, n)
+        print(f"{name:12} json: {1e6 * before:6.2f} us  codec: {1e6 * after:6.2f} us  ({before / after:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Measure the db size and the queue read latency with json text datums and
+after the migration to cbor blob datums, on the same 50k order dataset.
+
+Usage:
+    python -m benchmarks.bench_datums [n]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from src import codec
+from src.db.schema_db_manager import MIGRATIONS
+from src.db_manager import DbManager
+from src.utility import sha3_256
+from src.value import Value
+from tests.helpers import CONFIG
+
+N_SALES = 500
+N_LOOKUPS = 200
+
+
+def queue_datum(i: int) -> dict:
+    return {
+        "constructor": 0,
+        "fields": [
+            {"constructor": 0, "fields": [{"bytes": f"{i:056x}"}, {"bytes": ""}]},
+            {"int": 1 + i % 10},
+            {"constructor": 0, "fields": [{"bytes": "769c4c6e9bc3ba5406b9b89fb7beb6819e638ff2e2de63f008d5bcff"}, {"bytes": "744e45574d"}, {"int": 1000000 + i}]},
+            {"bytes": f"{i % N_SALES:064x}"},
+        ]
+    }
+
+
+def json_db(db_file: str, n: int) -> None:
+    # the tables as they were before the cbor migration
+    db = DbManager(db_file)
+    for table in (db.batcher, db.data, db.oracle, db.queue, db.reference, db.sale, db.seen, db.status, db.vault):
+        table.initialize()
+    with db.connections.transaction(), db.connections.writer() as conn:
+        for number, migration in enumerate(MIGRATIONS, start=1):
+            if migration.__name__ == '_cbor_datums':
+                break
+            migration(conn)
+            conn.execute(f'PRAGMA user_version = {number}')
+        value = Value({"lovelace": 5000000, "769c4c6e9bc3ba5406b9b89fb7beb6819e638ff2e2de63f008d5bcff": {"744e45574d": 1000000}}).dump()
+        conn.executemany(
+            'INSERT INTO queue (tag, txid, tkn, datum, value, timestamp, tx_idx) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            ((sha3_256(f"{i:064x}#0"), f"{i:064x}#0", f"{i % N_SALES:064x}", codec.dumps(queue_datum(i)), value, i, 0) for i in range(n))
+        )
+    db.cleanup()
+
+
+def size(db_file: str) -> int:
+    conn = sqlite3.connect(db_file)
+    conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+    conn.execute('VACUUM')
+    conn.close()
+    return os.path.getsize(db_file)
+
+
+def json_reads(db_file: str) -> float:
+    # what queue.read_all did before, every datum decoded from json
+    conn = sqlite3.connect(db_file)
+    start = time.perf_counter()
+    for i in range(N_LOOKUPS):
+        records = []
+        for tag, txid, tkn, datum, value, timestamp, tx_idx in conn.execute('SELECT tag, txid, tkn, datum, value, timestamp, tx_idx FROM queue WHERE tkn = ?', (f"{i % N_SALES:064x}",)):
+            records.append((tag, {'tag': tag, 'txid': txid, 'tkn': tkn, 'datum': codec.loads(datum), 'value': Value(codec.loads(value)), 'timestamp': timestamp, 'tx_idx': tx_idx}))
+    conn.close()
+    return (time.perf_counter() - start) / N_LOOKUPS
+
+
+def cbor_reads(db: DbManager, materialise: bool) -> float:
+    start = time.perf_counter()
+    for i in range(N_LOOKUPS):
+        for tag, record in db.queue.read_all(f"{i % N_SALES:064x}"):
+            if materialise:
+                record['datum']
+    return (time.perf_counter() - start) / N_LOOKUPS
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, "bench.db")
+        json_db(db_file, n)
+        json_size = size(db_file)
+        json_read = json_reads(db_file)
+
+        start = time.perf_counter()
+        db = DbManager(db_file)
+        db.initialize(CONFIG)
+        migration_time = time.perf_counter() - start
+        db.cleanup()
+        cbor_size = size(db_file)
+
+        db = DbManager(db_file)
+        lazy_read = cbor_reads(db, False)
+        full_read = cbor_reads(db, True)
+        db.cleanup()
+
+    print(f"{n} queue orders over {N_SALES} sales, migrated in {migration_time:.2f} s")
+    print(f"db size            json: {json_size / 1e6:7.2f} MB  cbor: {cbor_size / 1e6:7.2f} MB  ({1 - cbor_size / json_size:.0%} smaller)")
+    print(f"read_all(tkn)      json: {1e3 * json_read:7.3f} ms  cbor: {1e3 * lazy_read:7.3f} ms  (datum not used)")
+    print(f"read_all(tkn)      json: {1e3 * json_read:7.3f} ms  cbor: {1e3 * full_read:7.3f} ms  (every datum decoded)")
+
+
+if __name__ == '__main__':
+    main()
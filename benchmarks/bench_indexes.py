@@ -0,0 +1,89 @@
+"""
+Benchmark the hot lookups on a db with 100k queue entries, with and
+without the indexes the schema migrations create. The before db drops
+every one of them, not only the ones from the first migration, since the
+later migrations add indexes that serve the same lookups.
+
+queue.read_all reads whole rows, so its gain is from the index seek and
+not from an index only read.
+
+Usage:
+    python -m benchmarks.bench_indexes [n]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from src.db.schema_db_manager import MIGRATIONS
+from src.db_manager import DbManager
+from src.utility import sha3_256
+from src.value import Value
+from tests.helpers import CONFIG
+
+DATUM = {"constructor": 0, "fields": [{"bytes": "acab"}, {"int": 1}]}
+
+N_SALES = 1000
+N_LOOKUPS = 200
+
+
+def populate(db: DbManager, n: int) -> None:
+    value = Value({"lovelace": 5000000})
+    with db.transaction():
+        for i in range(N_SALES):
+            db.sale.create(f"{i:064x}", f"{i:064x}#1", DATUM, value)
+        for i in range(n):
+            txid = f"{i:064x}#0"
+            db.queue.create(sha3_256(txid), txid, f"{i % N_SALES:064x}", DATUM, value, i, 0)
+            db.seen.create(txid, i, i + 1000)
+
+
+def lookups(db: DbManager) -> dict:
+    timings = {}
+
+    start = time.perf_counter()
+    for i in range(N_LOOKUPS):
+        db.queue.read_all(f"{i:064x}")
+    timings['queue.read_all(tkn)'] = (time.perf_counter() - start) / N_LOOKUPS
+
+    start = time.perf_counter()
+    for i in range(N_LOOKUPS):
+        db.seen.exists(f"{i * 97:064x}#0")
+    timings['seen.exists(queue_txid)'] = (time.perf_counter() - start) / N_LOOKUPS
+
+    start = time.perf_counter()
+    for i in range(N_LOOKUPS):
+        # nothing matches so every probe is a full lookup
+        db.sale.delete(f"{i:064x}#9")
+    timings['sale.delete(txid)'] = (time.perf_counter() - start) / N_LOOKUPS
+
+    return timings
+
+
+def run(db_file: str, n: int, indexed: bool) -> dict:
+    db = DbManager(db_file)
+    db.initialize(CONFIG)
+    if indexed is False:
+        with db.connections.writer() as conn:
+            # the primary key indexes belong to the tables, not the migrations
+            indexes = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL")]
+            for index in indexes:
+                conn.execute(f"DROP INDEX {index}")
+    populate(db, n)
+    timings = lookups(db)
+    db.cleanup()
+    return timings
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with tempfile.TemporaryDirectory() as tmp:
+        before = run(os.path.join(tmp, "before.db"), n, False)
+        after = run(os.path.join(tmp, "after.db"), n, True)
+    print(f"{n} queue rows, {N_SALES} sales, schema version {len(MIGRATIONS)}")
+    for name in before:
+        print(f"{name:26} before: {1e3 * before[name]:8.3f} ms  after: {1e3 * after[name]:8.3f} ms  ({before[name] / after[name]:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark the per output cost of IOManager.handle_output on a mainnet shaped
+block, comparing the address dispatch table against the chain of address
+comparisons it replaced.
+
+There is no recorded block in the tree so the block is synthetic: a few
+hundred outputs to unrelated addresses carrying native assets, plus a handful
+of batcher outputs, which is the shape the batcher sees on mainnet.
+
+Usage:
+    python -m benchmarks.bench_io_dispatch [outputs] [rounds]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from loguru import logger
+
+from src.db_manager import DbManager
+from src.io_manager import IOManager
+from src.parse import asset_list_to_value
+from src.utility import sha3_256
+from tests.helpers import CONFIG, tx_output_event
+
+# one in this many outputs belongs to the batcher
+MATCH_EVERY = 100
+
+
+def block(n: int) -> list:
+    events = []
+    for i in range(n):
+        address = CONFIG["batcher_address"] if i % MATCH_EVERY == 0 else f"addr1q{i:098x}"
+        assets = [{"policy": f"{j:056x}", "asset": f"{i:08x}", "amount": j + 1} for j in range(i % 4)]
+        events.append(tx_output_event(1, f"{i:064x}", i % 3, address, 1500000 + i, assets, tx_idx=i // 3))
+    return events
+
+
+def compare_chain(db: DbManager, config: dict, data: dict, logger) -> None:
+    # the previous handle_output, reduced to the matching work it did
+    context = data['context']
+    output_utxo = context['tx_hash'] + '#' + str(context['output_idx'])
+    utxo_base_64 = sha3_256(output_utxo)
+    address = data['tx_output']['address']
+    if address == config['batcher_address']:
+        value_obj = asset_list_to_value(data['tx_output']['assets'])
+        value_obj.add_lovelace(data['tx_output']['amount'])
+        db.batcher.create(utxo_base_64, output_utxo, value_obj)
+        db.tracked.add(output_utxo)
+    for key in ('sale_address', 'queue_address', 'vault_address', 'oracle_address', 'data_address'):
+        if address == config[key]:
+            asset_list_to_value(data['tx_output']['assets'])
+
+
+def run(db: DbManager, events: list, rounds: int, handle) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        with db.transaction():
+            for data in events:
+                handle(db, data)
+    return (time.perf_counter() - start) / (rounds * len(events))
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    logger.remove()
+    events = block(n)
+    io = IOManager(CONFIG)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DbManager(os.path.join(tmp, "bench.db"))
+        db.initialize(CONFIG)
+        before = run(db, events, rounds, lambda db, data: compare_chain(db, CONFIG, data, logger))
+        after = run(db, events, rounds, lambda db, data: io.handle_output(db, data, logger))
+        db.cleanup()
+    print(f"{n} outputs per block, 1 in {MATCH_EVERY} is tracked, {rounds} rounds")
+    print(f"compare chain:  {1e6 * before:7.2f} us/output")
+    print(f"dispatch table: {1e6 * after:7.2f} us/output  ({before / after:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
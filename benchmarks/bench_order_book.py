@@ -0,0 +1,79 @@
+"""
+Benchmark the per block sort cost with 100k live orders over 500 sales,
+comparing a full Sorting.fifo_sort of every order against applying the
+block's changes to the order book and taking a snapshot.
+
+Each block spends a few orders and adds a few new ones, which is the shape
+the batcher sees on mainnet. Only the order book is measured, the db writes
+are the same either way.
+
+Usage:
+    python -m benchmarks.bench_order_book [orders] [changes] [blocks]
+"""
+import random
+import sys
+import time
+
+from src.order_book import OrderBook
+from src.sorting import Sorting
+
+N_SALES = 500
+
+
+def order(rng: random.Random, i: int) -> tuple:
+    # (sale, tag, timestamp, tx idx, incentive, priority)
+    return (f"{i % N_SALES:064x}", f"{i:064x}", i // 20, i % 20, rng.randrange(1000), rng.randrange(2))
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    changes = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    blocks = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+    rng = random.Random(0)
+
+    orders = {}
+    for i in range(n):
+        entry = order(rng, i)
+        orders[entry[1]] = entry
+
+    book = OrderBook()
+    for s in range(N_SALES):
+        book.add_sale(f"{s:064x}", f"{s:064x}#0")
+    for sale, tag, timestamp, tx_idx, incentive, priority in orders.values():
+        book.add(sale, tag, timestamp, tx_idx, incentive, priority)
+    book.snapshot()
+
+    full = 0.0
+    incremental = 0.0
+    for block in range(blocks):
+        spent = rng.sample(sorted(orders), changes // 2)
+        created = [order(rng, n + block * changes + i) for i in range(changes - changes // 2)]
+        for tag in spent:
+            del orders[tag]
+        for entry in created:
+            orders[entry[1]] = entry
+
+        # what every round did before, the whole book sorted again
+        start = time.perf_counter()
+        unsorted = {}
+        for sale, tag, timestamp, tx_idx, incentive, priority in orders.values():
+            unsorted.setdefault(sale, []).append((tag, timestamp, tx_idx, incentive, priority))
+        before = Sorting.fifo_sort(unsorted)
+        full += time.perf_counter() - start
+
+        start = time.perf_counter()
+        for tag in spent:
+            book.remove(tag)
+        for sale, tag, timestamp, tx_idx, incentive, priority in created:
+            book.add(sale, tag, timestamp, tx_idx, incentive, priority)
+        after = book.snapshot()
+        incremental += time.perf_counter() - start
+
+        assert after == before
+
+    print(f"{n} live orders over {N_SALES} sales, {changes} changes per block, {blocks} blocks")
+    print(f"full sort: {1e3 * full / blocks:8.3f} ms/block  order book: {1e3 * incremental / blocks:8.3f} ms/block  ({full / incremental:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark the QueueDbManager create/delete hot path.
+
+The "before" numbers use a connection per operation with the sqlite
+defaults, which is how the table managers used to talk to the db. The
+"after" numbers use the pooled WAL connections of the DbManager.
+
+Usage:
+    python -m benchmarks.bench_queue_db [n]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from src.db_manager import DbManager
+from src.utility import sha3_256
+from src.value import Value
+from tests.helpers import CONFIG
+
+DATUM = {"constructor": 0, "fields": [{"bytes": "acab"}, {"int": 1}]}
+
+
+def connect_per_operation(db_file: str, n: int) -> float:
+    value_json = Value({"lovelace": 5000000}).dump()
+    conn = sqlite3.connect(db_file)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS queue (
+            tag TEXT PRIMARY KEY, txid TEXT, tkn TEXT, datum TEXT,
+            value TEXT, timestamp INTEGER, tx_idx INTEGER
+        )
+    """)
+    conn.close()
+
+    start = time.perf_counter()
+    for i in range(n):
+        txid = f"{i:064x}#0"
+        conn = sqlite3.connect(db_file)
+        try:
+            conn.execute(
+                'INSERT OR REPLACE INTO queue (tag, txid, tkn, datum, value, timestamp, tx_idx) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (sha3_256(txid), txid, "acab", str(DATUM), value_json, i, 0)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    for i in range(n):
+        txid = f"{i:064x}#0"
+        conn = sqlite3.connect(db_file)
+        try:
+            cursor = conn.cursor()
+            cursor.execute('SELECT EXISTS(SELECT 1 FROM queue WHERE tag = ?)', (sha3_256(txid),))
+            if cursor.fetchone()[0]:
+                cursor.execute('DELETE FROM queue WHERE tag = ?', (sha3_256(txid),))
+                conn.commit()
+        finally:
+            conn.close()
+    return time.perf_counter() - start
+
+
+def pooled(db_file: str, n: int) -> float:
+    db = DbManager(db_file)
+    db.initialize(CONFIG)
+    value = Value({"lovelace": 5000000})
+
+    start = time.perf_counter()
+    for i in range(n):
+        txid = f"{i:064x}#0"
+        db.queue.create(sha3_256(txid), txid, "acab", DATUM, value, i, 0)
+    for i in range(n):
+        txid = f"{i:064x}#0"
+        db.queue.delete(sha3_256(txid))
+    elapsed = time.perf_counter() - start
+    db.cleanup()
+    return elapsed
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with tempfile.TemporaryDirectory() as tmp:
+        before = connect_per_operation(os.path.join(tmp, "before.db"), n)
+        after = pooled(os.path.join(tmp, "after.db"), n)
+    ops = 2 * n
+    print(f"queue create/delete, {ops} ops")
+    print(f"before: {ops / before:10.0f} ops/sec")
+    print(f"after:  {ops / after:10.0f} ops/sec")
+    print(f"speedup: {before / after:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
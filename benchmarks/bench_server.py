@@ -0,0 +1,98 @@
+"""
+Replay oura events against the webhook and report requests per second, for
+the asyncio ingest server and for the flask development server it replaced.
+
+Events are posted one per request over one connection, in order, the way the
+oura webhook sink sends them. There is no recorded oura capture in the tree
+so the events are a synthetic chain of batcher outputs and spends.
+
+Usage:
+    python -m benchmarks.bench_server [blocks]
+"""
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from loguru import logger
+
+from src.db_manager import DbManager
+from src.ingest import Ingest
+from src.server import IngestServer
+from tests.helpers import CONFIG, synthetic_chain
+
+
+async def replay(port: int, bodies: list) -> float:
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    for body in bodies:
+        writer.write(
+            f"POST /webhook HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+        head = (await reader.readuntil(b"\r\n\r\n")).lower()
+        length = int(head.split(b"content-length: ")[1].split(b"\r\n")[0])
+        await reader.readexactly(length)
+        # the development server closes every connection
+        if b"connection: close" in head or b"http/1.0" in head:
+            writer.close()
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.close()
+    return len(bodies) / (time.perf_counter() - start)
+
+
+def run_asyncio(db: DbManager, bodies: list) -> float:
+    async def main():
+        server = IngestServer(Ingest(db, CONFIG, logger), logger)
+        await server.start('127.0.0.1', 0)
+        rate = await replay(server.port(), bodies)
+        await server.stop()
+        return rate
+    return asyncio.run(main())
+
+
+def run_flask(db: DbManager, bodies: list) -> float:
+    from flask import Flask, request
+    from werkzeug.serving import make_server
+
+    app = Flask(__name__)
+    ingest = Ingest(db, CONFIG, logger)
+
+    @app.route('/webhook', methods=['POST'])
+    def webhook():
+        ingest.push(request.get_json())
+        return 'Webhook Successful'
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    rate = asyncio.run(replay(server.server_port, bodies))
+    server.shutdown()
+    return rate
+
+
+def main():
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    logger.remove()
+    bodies = [json.dumps(event).encode() for event in synthetic_chain(1, blocks, CONFIG["batcher_address"], 4)]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, run in (("flask dev server", run_flask), ("asyncio server", run_asyncio)):
+            db = DbManager(os.path.join(tmp, f"{name.split()[0]}.db"))
+            db.initialize(CONFIG)
+            results[name] = run(db, bodies)
+            assert db.status.read()['block_number'] == blocks
+            db.cleanup()
+    print(f"{len(bodies)} events over {blocks} blocks, one request per event")
+    for name, rate in results.items():
+        print(f"{name:18} {rate:9.0f} req/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark signing a purchase shaped draft with a signing key read once,
+in memory and from the draft file, against the cardano-cli transaction sign
+call it was before.
+
+The cli is only timed when it is on the path.
+
+Usage:
+    python -m benchmarks.bench_signer [n]
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from src.json_file import read
+from src.signer import Signer
+
+TEST_FILES = os.path.join(os.path.dirname(__file__), '..', 'tests', 'test_files')
+DRAFT = os.path.join(TEST_FILES, 'test_tx3.draft')
+SKEY = os.path.join(TEST_FILES, 'test_payment.skey')
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    draft = bytes.fromhex(read(DRAFT)['cborHex'])
+    signer = Signer.load(SKEY)
+
+    start = time.perf_counter()
+    for _ in range(n):
+        signer.sign(draft)
+    memory = (time.perf_counter() - start) / n
+
+    with tempfile.TemporaryDirectory() as tmp:
+        signed_file = os.path.join(tmp, 'tx.signed')
+        start = time.perf_counter()
+        for _ in range(n):
+            Signer.load(SKEY).sign_file(DRAFT, signed_file)
+        files = (time.perf_counter() - start) / n
+
+        print(f"{n} signed drafts of {len(draft)} bytes")
+        print(f"in memory: {1e6 * memory:8.1f} us/tx  draft file to signed file: {1e6 * files:8.1f} us/tx")
+
+        cli = shutil.which('cardano-cli')
+        if cli is not None:
+            runs = min(n, 20)
+            func = [cli, 'conway', 'transaction', 'sign', '--tx-body-file', DRAFT, '--tx-file', signed_file, '--signing-key-file', SKEY, '--testnet-magic', '1']
+            start = time.perf_counter()
+            for _ in range(runs):
+                subprocess.run(func, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+            cli_time = (time.perf_counter() - start) / runs
+            print(f"cli sign: {1e3 * cli_time:8.1f} ms/tx  ({cli_time / files:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
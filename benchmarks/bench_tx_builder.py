@@ -0,0 +1,109 @@
+"""
+Benchmark building a purchase shaped transaction in process, a first build
+from nothing and a rebuild with the simulated execution units and the fee,
+against the cardano-cli transaction build-raw call each of them was before.
+
+The cli is only timed when it is on the path.
+
+Usage:
+    python -m benchmarks.bench_tx_builder [n]
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from src.address import pkh_from_address
+from src.fee import FeeEngine
+from src.tx_builder import TxBuilder, language_views
+from src.value import Value
+
+PROTOCOL = os.path.join(os.path.dirname(__file__), '..', 'tests', 'test_files', 'test_protocol.json')
+ADDRESS = "addr_test1vrs4fk7ea6rg2fvd00sa8um5unp0rt474kngwpc38v2z9vqujprdk"
+PKH = pkh_from_address(ADDRESS)
+POLICY = "769c4c6e9bc3ba5406b9b89fb7beb6819e638ff2e2de63f008d5bcff"
+
+DATUM = {
+    "constructor": 0,
+    "fields": [
+        {"constructor": 0, "fields": [{"bytes": PKH}, {"bytes": ""}]},
+        {"int": 1234567},
+        {"constructor": 0, "fields": [{"bytes": POLICY}, {"bytes": "744e45574d"}, {"int": 1000000}]},
+        {"constructor": 0, "fields": [{"bytes": "aa" * 28}, {"bytes": "bb" * 32}]},
+    ],
+}
+EMPTY = {"constructor": 0, "fields": []}
+
+
+def txin(i: int) -> str:
+    return f"{i:064x}#{i % 3}"
+
+
+def purchase(views: bytes) -> TxBuilder:
+    value = Value({"lovelace": 5000000, POLICY: {"744e45574d": 1000000}})
+    tx = TxBuilder(views)
+    tx.add_collateral(txin(1))
+    tx.set_validity(1000, 2000)
+    tx.add_reference_input(txin(2))
+    tx.add_reference_input(txin(3))
+    tx.add_input(txin(4))
+    tx.add_script_input(txin(5), txin(6), EMPTY)
+    tx.add_script_input(txin(7), txin(8), EMPTY)
+    tx.add_output(ADDRESS, value, DATUM)
+    tx.add_output(ADDRESS, value, DATUM)
+    tx.add_output(ADDRESS, Value({"lovelace": 5000000}))
+    tx.add_required_signer(PKH)
+    tx.add_required_signer("cc" * 28)
+    tx.fee = 1000000
+    return tx
+
+
+def cli_build(cli: str, out_file: str) -> None:
+    func = [
+        cli, 'conway', 'transaction', 'build-raw',
+        '--out-file', out_file,
+        '--tx-in', txin(4),
+        '--tx-out', f"{ADDRESS}+5000000",
+        '--fee', '1000000',
+    ]
+    subprocess.run(func, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    views = language_views(FeeEngine.load(PROTOCOL).cost_models['PlutusV3'])
+
+    start = time.perf_counter()
+    for _ in range(n):
+        purchase(views).to_cbor()
+    build = (time.perf_counter() - start) / n
+
+    tx = purchase(views)
+    tx.to_cbor()
+    start = time.perf_counter()
+    for i in range(n):
+        tx.set_execution_units(txin(5), {'mem': 100000 + i, 'cpu': 100000000 + i})
+        tx.set_execution_units(txin(7), {'mem': 200000 + i, 'cpu': 200000000 + i})
+        tx.fee = 300000 + i
+        tx.to_cbor()
+    rebuild = (time.perf_counter() - start) / n
+
+    print(f"{n} purchase transactions")
+    print(f"build: {1e6 * build:8.1f} us/tx  rebuild: {1e6 * rebuild:8.1f} us/tx")
+
+    cli = shutil.which('cardano-cli')
+    if cli is not None:
+        runs = min(n, 20)
+        with tempfile.TemporaryDirectory() as tmp:
+            out_file = os.path.join(tmp, 'tx.draft')
+            start = time.perf_counter()
+            for _ in range(runs):
+                cli_build(cli, out_file)
+            cli_time = (time.perf_counter() - start) / runs
+        print(f"cli build-raw: {1e3 * cli_time:8.1f} ms/tx  ({cli_time / build:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,20 +3,24 @@ import os
 from loguru._logger import Logger
 
 from src.address import pkh_from_address
-from src.cli import (does_tx_exists_in_mempool, does_utxo_exist, sign, submit,
-                     txid)
+from src.cbor import inputs_from_cbor, txid_from_cbor
+from src.cli import query_existing_utxos, submit
 from src.datums import (data_validity, oracle_validity, sale_validity,
                         vault_validity)
 from src.db_manager import DbManager
 from src.endpoint import Endpoint
+from src.mempool import MempoolView
+from src.round_state import RoundState
+from src.signer import Signer
 from src.utility import current_time, file_exists, parent_directory_path
+from src.utxo_cache import UTxOCache
 from src.utxo_manager import UTxOManager
 
 
 class Aggregate:
 
     @staticmethod
-    def orders(db: DbManager, sorted_queue: dict, config: dict, logger: Logger) -> None:
+    def orders(db: DbManager, sorted_queue: dict, config: dict, logger: Logger, book: dict = None, states: tuple = None) -> None:
         # The parent directory for relative pathing
         parent_dir = parent_directory_path()
 
@@ -32,20 +36,44 @@ class Aggregate:
             logger.critical("Batcher Secret Key Is Missing!")
             return
 
+        if file_exists(collat_skey_path) is False:
+            logger.critical("Collateral Secret Key Is Missing!")
+            return
+
+        # the keys are only read again if the files change
+        batcher_signer = Signer.load(batcher_skey_path)
+        signer = Signer.load(batcher_skey_path, collat_skey_path)
+
         batcher_infos = db.batcher.read_all()
 
+        # batcher pkh for signing will come from vault now
+        batcher_pkh = pkh_from_address(config['batcher_address'])
+        vault_infos = db.vault.read_all(batcher_pkh)
+        oracle_info = db.oracle.read()
+        data_info = db.data.read()
+
+        # the state of every sale is taken before its records are read
+        if states is None:
+            states = db.round_state.snapshot()
+
+        # every sale and order record for the round in one read
+        if book is None:
+            book = db.read_order_book()
+
+        # every utxo the round may use is asked for in one query
+        txins = Aggregate.txins(db, sorted_queue, book, batcher_infos, vault_infos or [], [oracle_info, data_info])
+        live = db.utxo_cache.existing(txins, lambda missing: query_existing_utxos(config["socket_path"], missing, config["network"], config["cli_path"]))
+        logger.debug(f"UTxO Cache: {db.utxo_cache.stats()}")
+
         # does the batcher utxo actually exist still if the profit wasnt successful
         for info in batcher_infos:
-            if does_utxo_exist(config["socket_path"], info['txid'], config["network"], config["cli_path"]) is False:
+            if info['txid'] not in live:
                 logger.warning(f"Batcher: {info['txid']} does not exist on chain")
                 # then its not in the utxo set right now
+                Aggregate.wait_for_chain(db)
                 return
 
-        # batcher pkh for signing will come from vault now
-        batcher_pkh = pkh_from_address(config['batcher_address'])
-
         # vault
-        vault_infos = db.vault.read_all(batcher_pkh)
         if vault_infos is None:
             logger.critical("Vaults is not set up for batcher")
             return
@@ -58,7 +86,7 @@ class Aggregate:
                 use_this_vault_flag = False
                 continue
             # does the vault utxo actually exist still?
-            if does_utxo_exist(config["socket_path"], info['txid'], config["network"], config["cli_path"]) is False:
+            if info['txid'] not in live:
                 logger.warning(f"Vault: {info['txid']} does not exist on chain")
                 use_this_vault_flag = False
                 continue
@@ -69,10 +97,10 @@ class Aggregate:
         if use_this_vault_flag is False:
             # then all the vaults
             logger.critical("All Vaults do not exist on chain")
+            Aggregate.wait_for_chain(db)
             return
 
         # oracle
-        oracle_info = db.oracle.read()
         if oracle_info is None:
             logger.critical("Oracle is not set up for batcher")
             return
@@ -80,13 +108,13 @@ class Aggregate:
             logger.critical("Oracle has failed the validity test")
             return
         # does the oracle utxo actually exist still?
-        if does_utxo_exist(config["socket_path"], oracle_info['txid'], config["network"], config["cli_path"]) is False:
+        if oracle_info['txid'] not in live:
             logger.warning(f"Oracle: {oracle_info['txid']} does not exist on chain")
             # then its not in the utxo set right now
+            Aggregate.wait_for_chain(db)
             return
 
         # data
-        data_info = db.data.read()
         if data_info is None:
             logger.critical("Data is not set up for batcher")
             return
@@ -94,9 +122,10 @@ class Aggregate:
             logger.critical("Data has failed the validity test")
             return
         # does the data utxo actually exist still?
-        if does_utxo_exist(config["socket_path"], data_info['txid'], config["network"], config["cli_path"]) is False:
+        if data_info['txid'] not in live:
             logger.warning(f"Data: {data_info['txid']} does not exist on chain")
             # then its not in the utxo set right now
+            Aggregate.wait_for_chain(db)
             return
 
         # batcher info is returned from the profit endpoint
@@ -109,8 +138,9 @@ class Aggregate:
 
         if profit_success_flag is True:
             # sign and submit tx here
-            sign(out_file_path, signed_profit_tx, config['network'], batcher_skey_path, config["cli_path"])
+            signed_profit = batcher_signer.sign_file(out_file_path, signed_profit_tx)
             if submit(signed_profit_tx, config["socket_path"], config["network"], config["cli_path"], logger):
+                Aggregate.profit_submitted(db, signed_profit)
                 # if submit was successful then batcher goes into the depth delay cooldown
                 logger.success(f"Auto Profit Batcher Output @ {batcher_info['txid']}")
                 #
@@ -134,31 +164,51 @@ class Aggregate:
         # delete all expired seen entries
         db.seen.delete(current_time())
 
+        # the mempool is read at most once for the whole round
+        mempool = MempoolView(config, mempool_file_path)
+
+        # sales and orders that already failed and have not changed since
+        skipped = 0
+
         # handle the sales now
         for sale_tkn in sorted_queue:
-            sale_info = db.sale.read(sale_tkn)
+            state = RoundState.state_of(states, sale_tkn)
+            if db.round_state.failed(sale_tkn):
+                skipped += 1
+                continue
+
+            entry = book.get(sale_tkn)
+            # the sale was spent after the orders were sorted
+            if entry is None:
+                logger.warning(f"Sale: {sale_tkn} Not Found")
+                continue
+            sale_info = entry.sale
             if sale_validity(sale_info['datum']) is False:
                 logger.warning(f"Sale: {sale_tkn} has failed the validity test")
+                db.round_state.fail(sale_tkn, state)
                 # skip this sale as something is wrong
                 continue
 
+            # only the orders that may do something different this time
+            orders = [order_data for order_data in sorted_queue[sale_tkn] if db.round_state.failed(sale_tkn, order_data[0]) is False]
+            skipped += len(sorted_queue[sale_tkn]) - len(orders)
+            if len(orders) == 0:
+                continue
+
             # does the sale utxo actually exist still?
-            if does_utxo_exist(config["socket_path"], sale_info['txid'], config["network"], config["cli_path"]) is False:
+            if sale_info['txid'] not in live:
                 logger.warning(f"Sale: {sale_info['txid']} does not exist on chain")
+                db.round_state.fail(sale_tkn, state)
                 # then its not in the utxo set right now
                 continue
 
             # set the sale now that we know it
             utxo.set_sale(sale_info)
 
-            orders = sorted_queue[sale_tkn]
-            if len(orders) == 0:
-                continue
-
             logger.debug(f"Sale: {sale_tkn}")
             for order_data in orders:
                 order_hash = order_data[0]
-                queue_info = db.queue.read(order_hash)
+                queue_info = entry.orders.get(order_hash)
 
                 # check if the order is in the db
                 if queue_info is None:
@@ -167,8 +217,9 @@ class Aggregate:
                     continue
 
                 # does the queue utxo actually exist still?
-                if does_utxo_exist(config["socket_path"], queue_info['txid'], config["network"], config["cli_path"]) is False:
+                if queue_info['txid'] not in live:
                     logger.warning(f"Queue: {queue_info['txid']} does not exist on chain")
+                    db.round_state.fail(sale_tkn, state, order_hash)
                     # then its not in the utxo set right now
                     continue
 
@@ -195,13 +246,16 @@ class Aggregate:
                 # if the purchase was successful then sign it and update the info
                 if purchase_success_flag is True:
                     # lets check if this tx was already submitted to the mempool
-                    intermediate_txid = txid(out_file_path, config["cli_path"])
-                    if does_tx_exists_in_mempool(config["socket_path"], intermediate_txid, mempool_file_path, config["network"], config["cli_path"]):
-                        logger.warning(f"Transaction: {intermediate_txid} Is In Mempool")
+                    # the endpoint already hashed the body for the sale output
+                    purchase_txid = utxo.sale.txid.split("#")[0]
+                    if mempool.contains(purchase_txid):
+                        logger.warning(f"Transaction: {purchase_txid} Is In Mempool")
+                        # it leaves the mempool by the end of its validity window
+                        db.round_state.wait_until(end_time)
                         # skip the sign and submit since it was already submitted
                         continue
                     # sign tx
-                    sign(out_file_path, signed_purchase_tx, config['network'], batcher_skey_path, config["cli_path"], collat_skey_path)
+                    signed_purchase = signer.sign_file(out_file_path, signed_purchase_tx)
 
                 #
                 # The order may just be in the refund state
@@ -212,6 +266,7 @@ class Aggregate:
                 # if this fails then do not move forward
                 if refund_success_flag is False:
                     logger.warning(f"Order: {refund_input}: Remove Only")
+                    db.round_state.fail(sale_tkn, state, order_hash)
                     # skip the sign and submit as something didn't validate from the order
                     continue
 
@@ -219,27 +274,108 @@ class Aggregate:
                 if refund_success_flag is True:
                     # refund was built correctly
                     # lets check if this tx was already submitted then
-                    intermediate_txid = txid(out_file_path, config["cli_path"])
-                    if does_tx_exists_in_mempool(config["socket_path"], intermediate_txid, mempool_file_path, config["network"], config["cli_path"]):
-                        logger.warning(f"Transaction: {intermediate_txid} Is In Mempool")
+                    # the endpoint already hashed the body for the batcher output
+                    refund_txid = utxo.batcher.txid.split("#")[0]
+                    if mempool.contains(refund_txid):
+                        logger.warning(f"Transaction: {refund_txid} Is In Mempool")
+                        # it leaves the mempool by the end of its validity window
+                        db.round_state.wait_until(end_time)
                         # skip the sign and submit since it was already submitted
                         continue
                     # sign tx
-                    sign(out_file_path, signed_refund_tx, config['network'], batcher_skey_path, config["cli_path"], collat_skey_path)
+                    signed_refund = signer.sign_file(out_file_path, signed_refund_tx)
 
                 # submit tx
                 if purchase_success_flag is True:
                     purchase_result = submit(signed_purchase_tx, config['socket_path'], config['network'], config["cli_path"], logger)
                     logger.success(f"Order: {purchase_input} Purchased: {purchase_result}")
-                    if purchase_result is True:
-                        # saw something go into the mempool with this validity window
-                        db.seen.create(purchase_input, start_time, end_time)
+                    Aggregate.submitted(db, mempool, purchase_result, signed_purchase, purchase_input, start_time, end_time)
 
                 # submit tx
                 if refund_success_flag is True:
                     refund_result = submit(signed_refund_tx, config['socket_path'], config['network'], config["cli_path"], logger)
                     logger.success(f"Order: {refund_input} Refund: {refund_result}")
-                    if refund_result is True:
-                        # saw something go into the mempool with this validity window
-                        db.seen.create(refund_input, start_time, end_time)
+                    Aggregate.submitted(db, mempool, refund_result, signed_refund, refund_input, start_time, end_time)
+
+        if skipped > 0:
+            logger.debug(f"Skipped {skipped} Unchanged Sales And Orders")
         return
+
+    @staticmethod
+    def submitted(db: DbManager, mempool: MempoolView, result: bool, tx: bytes, queue_txid: str, start_time: int, end_time: int) -> None:
+        """
+        Record the result of submitting a transaction for an order. The inputs
+        of a submitted transaction are spent as far as the next rounds know. A
+        failed submit is tried again soon, since nothing the round read has to
+        change for it to go through.
+
+        Args:
+            db (DbManager): The batcher db
+            mempool (MempoolView): The mempool of the round
+            result (bool): If the submit was successful
+            tx (bytes): The cbor of the signed transaction
+            queue_txid (str): The queue utxo the transaction spends
+            start_time (int): The start of the validity window
+            end_time (int): The end of the validity window
+        """
+        if result is True:
+            mempool.add(txid_from_cbor(tx))
+            db.utxo_cache.mark_spent(inputs_from_cbor(tx))
+            # saw something go into the mempool with this validity window
+            db.seen.create(queue_txid, start_time, end_time)
+        else:
+            db.round_state.wait_until(current_time() + 1000 * RoundState.SUBMIT_RETRY_AFTER)
+
+    @staticmethod
+    def profit_submitted(db: DbManager, tx: bytes) -> None:
+        """
+        Record a submitted profit transaction. Its inputs are spent as far as
+        the next rounds know, and if it is dropped they are only asked for
+        again once the cache forgets them, so a round is run then.
+
+        Args:
+            db (DbManager): The batcher db
+            tx (bytes): The cbor of the signed transaction
+        """
+        db.utxo_cache.mark_spent(inputs_from_cbor(tx))
+        Aggregate.wait_for_chain(db)
+
+    @staticmethod
+    def wait_for_chain(db: DbManager) -> None:
+        """
+        Run a round again once the cached utxo answers expire. A round that
+        stopped on a utxo missing from the chain is otherwise only run again
+        when something unrelated is ingested.
+
+        Args:
+            db (DbManager): The batcher db
+        """
+        db.round_state.wait_until(current_time() + 1000 * UTxOCache.TTL)
+
+    @staticmethod
+    def txins(db: DbManager, sorted_queue: dict, book: dict, *infos: list) -> list[str]:
+        """
+        Every utxo a round may check on chain. Sales and orders that are
+        skipped because they already failed are left out.
+
+        Args:
+            db (DbManager): The batcher db
+            sorted_queue (dict): A fifo ordered sale-order dictionary
+            book (dict): The result of db.read_order_book
+            infos (list): Lists of the other records the round uses
+
+        Returns:
+            list[str]: The txins in the form id#idx
+        """
+        # the oracle and data start out empty until their first output
+        txins = [info['txid'] for records in infos for info in records if info is not None and info['txid']]
+        for sale_tkn, orders in sorted_queue.items():
+            entry = book.get(sale_tkn)
+            if entry is None or db.round_state.failed(sale_tkn):
+                continue
+            txins.append(entry.sale['txid'])
+            for order_data in orders:
+                queue_info = entry.orders.get(order_data[0])
+                if queue_info is not None and db.round_state.failed(sale_tkn, order_data[0]) is False:
+                    txins.append(queue_info['txid'])
+        return txins
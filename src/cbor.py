@@ -1,3 +1,5 @@
+import hashlib
+
 import cbor2
 
 
@@ -151,3 +153,219 @@ def convert_datum(datum: dict) -> bytes:
     encoded_data += indefinite_array_end
 
     return encoded_data
+
+
+# the cbor tag header for each constructor, built on first use
+_constructor_headers = {}
+
+
+def _head(major: int, length: int) -> bytes:
+    """The cbor header for a major type with a definite length."""
+    if length < 24:
+        return bytes([major << 5 | length])
+    if length < 0x100:
+        return bytes([major << 5 | 24, length])
+    if length < 0x10000:
+        return bytes([major << 5 | 25]) + length.to_bytes(2, 'big')
+    if length < 0x100000000:
+        return bytes([major << 5 | 26]) + length.to_bytes(4, 'big')
+    return bytes([major << 5 | 27]) + length.to_bytes(8, 'big')
+
+
+def _constructor_header(constructor: int) -> bytes:
+    header = _constructor_headers.get(constructor)
+    if header is None:
+        if constructor < 7:
+            header = cbor2.dumps(cbor2.CBORTag(121 + constructor, None))[:-1]
+        elif constructor < 128:
+            header = cbor2.dumps(cbor2.CBORTag(1280 + constructor - 7, None))[:-1]
+        else:
+            # the general form is a tagged pair of the constructor and fields
+            header = cbor2.dumps(cbor2.CBORTag(102, None))[:-1] + b'\x82' + cbor2.dumps(constructor)
+        _constructor_headers[constructor] = header
+    return header
+
+
+def _encode_data(data: dict, empty: bytes = b'\x9f\xff') -> bytes:
+    # empty is how an empty list is encoded, as an indefinite or a definite array
+    if 'constructor' in data:
+        if not data['fields']:
+            return _constructor_header(data['constructor']) + empty
+        return _constructor_header(data['constructor']) + b'\x9f' + b''.join(_encode_data(field, empty) for field in data['fields']) + b'\xff'
+
+    if 'bytes' in data:
+        raw = to_bytes(data['bytes'])
+        if len(raw) <= 64:
+            return cbor2.dumps(raw)
+        # plutus bytes longer than 64 are chunked
+        return b'\x5f' + b''.join(cbor2.dumps(raw[i:i + 64]) for i in range(0, len(raw), 64)) + b'\xff'
+
+    if 'int' in data:
+        return cbor2.dumps(data['int'])
+
+    if 'list' in data:
+        if not data['list']:
+            return empty
+        return b'\x9f' + b''.join(_encode_data(entry, empty) for entry in data['list']) + b'\xff'
+
+    if 'map' in data:
+        return _head(5, len(data['map'])) + b''.join(_encode_data(entry['k'], empty) + _encode_data(entry['v'], empty) for entry in data['map'])
+
+    raise ValueError(f"not plutus data: {data}")
+
+
+def datum_to_cbor(datum: dict) -> bytes:
+    """Encode any plutus data in the oura json form into cbor. Constructor
+    fields and lists are indefinite arrays and maps are definite, the same
+    bytes as convert_datum. An empty dict means there is no datum and it is
+    encoded as empty bytes.
+
+    Args:
+        datum (dict): The datum in json format.
+
+    Returns:
+        bytes: The cbor bytes of the datum.
+    """
+    if not datum:
+        return b''
+    return _encode_data(datum)
+
+
+def plutus_data_to_cbor(data: dict) -> bytes:
+    """Encode plutus data the way the node and cardano-cli do, the same as
+    datum_to_cbor except that empty lists are definite arrays. These are the
+    bytes of the datums and redeemers in a built transaction.
+
+    Args:
+        data (dict): The plutus data in json format.
+
+    Returns:
+        bytes: The cbor bytes of the data.
+    """
+    return _encode_data(data, b'\x80')
+
+
+def _decode_data(obj: any) -> dict:
+    if isinstance(obj, cbor2.CBORTag):
+        if 121 <= obj.tag <= 127:
+            constructor, fields = obj.tag - 121, obj.value
+        elif 1280 <= obj.tag <= 1400:
+            constructor, fields = obj.tag - 1280 + 7, obj.value
+        elif obj.tag == 102:
+            constructor, fields = obj.value
+        else:
+            raise ValueError(f"not plutus data: {obj}")
+        return {"constructor": constructor, "fields": [_decode_data(field) for field in fields]}
+
+    if isinstance(obj, bytes):
+        return {"bytes": obj.hex()}
+
+    if isinstance(obj, int):
+        return {"int": obj}
+
+    if isinstance(obj, (list, tuple)):
+        return {"list": [_decode_data(entry) for entry in obj]}
+
+    if isinstance(obj, dict):
+        return {"map": [{"k": _decode_data(k), "v": _decode_data(v)} for k, v in obj.items()]}
+
+    raise ValueError(f"not plutus data: {obj}")
+
+
+def cbor_to_datum(data: bytes) -> dict:
+    """Decode the cbor bytes of plutus data into the oura json form. Empty
+    bytes decode to an empty dict.
+
+    Args:
+        data (bytes): The cbor bytes of the datum.
+
+    Returns:
+        dict: The datum in json format.
+    """
+    if not data:
+        return {}
+    return _decode_data(cbor2.loads(data))
+
+
+def read_head(data: bytes, offset: int) -> tuple:
+    """The major type, argument and end offset of the cbor header at offset.
+    The argument is None for an indefinite length."""
+    initial = data[offset]
+    major, info = initial >> 5, initial & 0x1f
+    if info < 24:
+        return major, info, offset + 1
+    if info == 31:
+        return major, None, offset + 1
+    if info > 27:
+        raise ValueError(f"bad cbor header at {offset}")
+    size = 1 << (info - 24)
+    if offset + 1 + size > len(data):
+        raise IndexError("truncated cbor")
+    return major, int.from_bytes(data[offset + 1:offset + 1 + size], 'big'), offset + 1 + size
+
+
+def item_end(data: bytes, offset: int = 0) -> int:
+    """The offset just past the cbor item that starts at offset, without
+    decoding it. This is how the raw bytes of a nested item are sliced out.
+
+    Args:
+        data (bytes): The cbor bytes.
+        offset (int): Where the item starts.
+
+    Returns:
+        int: Where the item ends.
+
+    Raises:
+        IndexError: The item is not complete.
+    """
+    major, argument, offset = read_head(data, offset)
+    if major in (2, 3):
+        if argument is None:
+            # indefinite strings are chunks up to the break
+            while data[offset] != 0xff:
+                offset = item_end(data, offset)
+            return offset + 1
+        offset += argument
+    elif major in (4, 5):
+        count = argument * (2 if major == 5 else 1) if argument is not None else None
+        if count is None:
+            while data[offset] != 0xff:
+                offset = item_end(data, offset)
+            return offset + 1
+        for _ in range(count):
+            offset = item_end(data, offset)
+    elif major == 6:
+        offset = item_end(data, offset)
+    if offset > len(data):
+        raise IndexError("truncated cbor")
+    return offset
+
+
+def txid_from_cbor(tx: bytes | str) -> str:
+    """The id of a transaction is the blake2b 256 hash of its body bytes,
+    so it is the same for the draft and the signed transaction.
+
+    Args:
+        tx (bytes | str): The cbor of the transaction, [body, witnesses, valid, data], or its hex
+
+    Returns:
+        str: The transaction id in hex
+    """
+    if isinstance(tx, str):
+        tx = bytes.fromhex(tx)
+    _, _, start = read_head(tx, 0)
+    return hashlib.blake2b(tx[start:item_end(tx, start)], digest_size=32).hexdigest()
+
+
+def inputs_from_cbor(tx: bytes) -> list[str]:
+    """The inputs a transaction spends.
+
+    Args:
+        tx (bytes): The cbor of the transaction, [body, witnesses, valid, data]
+
+    Returns:
+        list[str]: The inputs in the form id#idx
+    """
+    _, _, start = read_head(tx, 0)
+    body = cbor2.loads(tx[start:item_end(tx, start)])
+    return sorted(f"{tx_id.hex()}#{index}" for tx_id, index in body[0])
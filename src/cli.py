@@ -84,6 +84,46 @@ def does_utxo_exist(socket: str, txin: str, network: str, cli_path: str) -> bool
     return len(json_dict) != 0
 
 
+def query_existing_utxos(socket: str, txins: list[str], network: str, cli_path: str, chunk_size: int = 100) -> set[str]:
+    """Query which of many utxos exist, with every txin in one query. Very
+    long lists are split so the command line stays short.
+
+    Args:
+        socket (str): The node socket path
+        txins (list[str]): The txins in the form id#idx
+        network (str): The network flag
+        chunk_size (int | optional): The most txins in one query
+
+    Returns:
+        set[str]: The txins that exist
+    """
+    existing = set()
+    txins = list(dict.fromkeys(txins))
+    for i in range(0, len(txins), chunk_size):
+        func = [
+            cli_path,
+            'conway',
+            'query',
+            'utxo',
+            '--socket-path',
+            socket,
+            '--output-json',
+        ]
+        for txin in txins[i:i + chunk_size]:
+            func += ['--tx-in', txin]
+        func += network.split(" ")
+        p = subprocess.Popen(func, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        output, errors = p.communicate()
+
+        # exit application if node is not live
+        if "Connection refused" in errors.decode():
+            sys.exit(1)
+
+        # the utxo set is keyed by the txin
+        existing.update(json.loads(output.decode('utf-8')))
+    return existing
+
+
 def query_slot_number(socket: str, unix_time: int, network: str, cli_path: str, delta: int = 0) -> int:
     """Query the slot number for a given network and a given unix time.
 
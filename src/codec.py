@@ -0,0 +1,65 @@
+"""
+The json codec for oura payloads and the db datum and value columns.
+
+orjson is used when it is installed, otherwise the standard library json.
+orjson only handles integers up to 64 bits, a plutus datum can hold larger
+ones so those fall back to the standard library. orjson reads a wider
+integer as a float instead of failing, so json with a long run of digits
+is read by the standard library.
+"""
+import json
+import re
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+# an integer with fewer digits always fits in 64 bits
+_WIDE_INTEGER = re.compile(r'\d{19}')
+_WIDE_INTEGER_BYTES = re.compile(rb'\d{19}')
+
+
+def dumps(data) -> str:
+    """
+    Encode data as a json string.
+
+    Args:
+        data: The json serializable data
+
+    Returns:
+        str: The json string.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(data).decode()
+        except TypeError:
+            # integers wider than 64 bits
+            pass
+    return json.dumps(data)
+
+
+def loads(data: str | bytes):
+    """
+    Decode a json string or bytes.
+
+    Args:
+        data (str | bytes): The json data
+
+    Returns:
+        The decoded data.
+
+    Raises:
+        ValueError: When the data is not valid json.
+    """
+    if orjson is not None:
+        wide = _WIDE_INTEGER_BYTES if isinstance(data, bytes) else _WIDE_INTEGER
+        if wide.search(data) is None:
+            try:
+                return orjson.loads(data)
+            except ValueError:
+                # invalid json, json decides
+                pass
+    return json.loads(data)
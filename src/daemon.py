@@ -1,7 +1,7 @@
 import toml
 
 
-def create_toml_file(filename: str, node_socket: str, timestamp: int, block_hash: str, delay: int = 3, magic: str = "preprod") -> None:
+def create_toml_file(filename: str, node_socket: str, timestamp: int, block_hash: str, delay: int = 3, magic: str = "preprod", sink: str = "Webhook") -> None:
     """
     Creates a TOML file with the provided configuration settings.
 
@@ -12,6 +12,7 @@ def create_toml_file(filename: str, node_socket: str, timestamp: int, block_hash
         block_hash (str): The block hash to use for the intersect point.
         delay (int, optional): The minimum depth delay. Default is 3.
         magic (str, optional): The magic string for the network. Default is "preprod".
+        sink (str, optional): The oura sink, "Webhook" or "Stdout". Default is "Webhook".
 
     Returns:
         None
@@ -38,7 +39,15 @@ def create_toml_file(filename: str, node_socket: str, timestamp: int, block_hash
                 "max_backoff": 100000,
             },
         },
-        "sink": {
+    }
+
+    # the batcher reads the JSONL events straight from the oura stdout pipe
+    if sink == "Stdout":
+        data["sink"] = {
+            "type": "Stdout",
+        }
+    else:
+        data["sink"] = {
             "type": "Webhook",
             "url": "http://localhost:8008/webhook",
             "timeout": 60000,
@@ -49,8 +58,7 @@ def create_toml_file(filename: str, node_socket: str, timestamp: int, block_hash
                 "backoff_factor": 2,
                 "max_backoff": 100000,
             },
-        },
-    }
+        }
 
     with open(filename, 'w') as file:
         toml.dump(data, file)
@@ -1,7 +1,7 @@
 from pycardano import Network
 
 from src.address import from_pkh_sc
-from src.allowlist import asset_names, policy_ids, priority
+from src.allowlist import allowed, asset_names, policy_ids, priority
 from src.value import Value
 
 
@@ -9,6 +9,35 @@ def queue_validity(datum: dict) -> bool:
     """
     Validate that the queue datum is in the correct form for an order to be fulfilled.
 
+    Args:
+        datum (dict): The queue datum
+
+    Returns:
+        bool: True if valid else False
+    """
+    if queue_form_validity(datum) is False:
+        return False
+
+    try:
+        # incentive check
+        if datum['fields'][2]['fields'][0]['bytes'] not in policy_ids:
+            return False
+        if datum['fields'][2]['fields'][1]['bytes'] not in asset_names:
+            return False
+
+        # every thing seems good
+        return True
+
+    except KeyError:
+        # some field doesnt exist
+        return False
+
+
+def queue_form_validity(datum: dict) -> bool:
+    """
+    Validate the form of the queue datum without the incentive allowlist, so
+    the result does not change when the allowlist does.
+
     Args:
         datum (dict): The queue datum
 
@@ -35,10 +64,6 @@ def queue_validity(datum: dict) -> bool:
         # incentive check
         if len(datum['fields'][2]['fields']) != 3:
             return False
-        if datum['fields'][2]['fields'][0]['bytes'] not in policy_ids:
-            return False
-        if datum['fields'][2]['fields'][1]['bytes'] not in asset_names:
-            return False
         if datum['fields'][2]['fields'][2]['int'] <= 0:
             return False
 
@@ -239,3 +264,103 @@ def data_validity(datum: dict) -> bool:
 
     except KeyError:
         return False
+
+
+def datum_field(datum: dict, *path) -> any:
+    """
+    Walk a path of keys and indexes into a datum.
+
+    Args:
+        datum (dict): The datum
+        path: The keys and indexes to follow
+
+    Returns:
+        any: The value at the end of the path or None if it doesn't exist.
+    """
+    try:
+        for step in path:
+            datum = datum[step]
+        return datum
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
+def queue_projection(datum: dict) -> tuple:
+    """
+    The queue datum fields that are stored in their own columns.
+
+    Returns:
+        tuple: bundle amount, incentive policy, incentive token, incentive amount
+    """
+    incentive = datum_field(datum, 'fields', 2, 'fields')
+    return (
+        datum_field(datum, 'fields', 1, 'int'),
+        datum_field(incentive, 0, 'bytes'),
+        datum_field(incentive, 1, 'bytes'),
+        datum_field(incentive, 2, 'int'),
+    )
+
+
+def queue_order_projection(datum: dict) -> tuple:
+    """
+    The queue datum fields that decide if and where an order is sorted.
+
+    Returns:
+        tuple: well formed, valid, priority
+    """
+    policy = datum_field(datum, 'fields', 2, 'fields', 0, 'bytes')
+    return (
+        queue_form_validity(datum),
+        queue_validity(datum),
+        priority(policy) if policy in allowed else None,
+    )
+
+
+def sale_projection(datum: dict) -> tuple:
+    """
+    The sale datum fields that are stored in their own columns.
+
+    Returns:
+        tuple: bundle policy, bundle token, bundle amount, cost policy, cost token, cost amount, max bundle size
+    """
+    bundle = datum_field(datum, 'fields', 1, 'fields')
+    cost = datum_field(datum, 'fields', 2, 'fields')
+    return (
+        datum_field(bundle, 0, 'bytes'),
+        datum_field(bundle, 1, 'bytes'),
+        datum_field(bundle, 2, 'int'),
+        datum_field(cost, 0, 'bytes'),
+        datum_field(cost, 1, 'bytes'),
+        datum_field(cost, 2, 'int'),
+        datum_field(datum, 'fields', 3, 'int'),
+    )
+
+
+def oracle_projection(datum: dict) -> tuple:
+    """
+    The oracle datum fields that are stored in their own columns.
+
+    Returns:
+        tuple: price, start time, end time
+    """
+    feed = datum_field(datum, 'fields', 0, 'fields', 0, 'map')
+    return (
+        datum_field(feed, 0, 'v', 'int'),
+        datum_field(feed, 1, 'v', 'int'),
+        datum_field(feed, 2, 'v', 'int'),
+    )
+
+
+def data_projection(datum: dict) -> tuple:
+    """
+    The data datum fields that are stored in their own columns.
+
+    Returns:
+        tuple: profit policy, profit token, profit margin
+    """
+    profit = datum_field(datum, 'fields', 7, 'fields')
+    return (
+        datum_field(profit, 3, 'bytes'),
+        datum_field(profit, 4, 'bytes'),
+        datum_field(profit, 5, 'int'),
+    )
@@ -1,24 +1,25 @@
-import json
-import sqlite3
+from src import codec
+
+from .connection_manager import ConnectionManager
 
 
 class BaseDbManager:
-    def __init__(self, db_file='batcher.db'):
+    def __init__(self, db_file='batcher.db', connections: ConnectionManager = None):
         self.db_file = db_file
-        self.conn = sqlite3.connect(self.db_file)
+        self.connections = connections if connections is not None else ConnectionManager(db_file)
+
+    def reader(self):
+        return self.connections.reader()
 
-    def get_connection(self):
-        return sqlite3.connect(self.db_file)
+    def writer(self):
+        return self.connections.writer()
 
     def cleanup(self):
-        conn = self.get_connection()
-        try:
+        with self.writer() as conn:
             conn.commit()
-        finally:
-            conn.close()
 
     def data_to_json(self, dict_data):
-        return json.dumps(dict_data)
+        return codec.dumps(dict_data)
 
     def json_to_data(self, json_data):
-        return json.loads(json_data)
+        return codec.loads(json_data)
@@ -6,9 +6,9 @@ from .base_db_manager import BaseDbManager
 class BatcherDbManager(BaseDbManager):
     def initialize(self):
         # Initialize database tables
-        with self.conn:
+        with self.writer() as conn:
             # Table for batcher records
-            self.conn.execute("""
+            conn.execute("""
                 CREATE TABLE IF NOT EXISTS batcher (
                     tag TEXT PRIMARY KEY,
                     txid TEXT,
@@ -17,20 +17,15 @@ class BatcherDbManager(BaseDbManager):
             """)
 
     def create(self, tag, txid, value):
-        conn = self.get_connection()
-        try:
+        with self.writer() as conn:
             value_json = value.dump()
             conn.execute(
                 'INSERT OR REPLACE INTO batcher (tag, txid, value) VALUES (?, ?, ?)',
                 (tag, txid, value_json)
             )
-            conn.commit()
-        finally:
-            conn.close()
 
     def read(self, batcher_policy):
-        conn = self.get_connection()
-        try:
+        with self.reader() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT tag, txid, value FROM batcher')
             records = cursor.fetchall()
@@ -40,12 +35,9 @@ class BatcherDbManager(BaseDbManager):
                 if value.exists(batcher_policy):
                     return {'tag': tag, 'txid': txid, 'value': value}
             return None
-        finally:
-            conn.close()
 
     def read_all(self):
-        conn = self.get_connection()
-        try:
+        with self.reader() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT tag, txid, value FROM batcher')
             records = cursor.fetchall()
@@ -55,12 +47,9 @@ class BatcherDbManager(BaseDbManager):
                 value = self.json_to_data(value_json)
                 batcher_records.append({'tag': tag, 'txid': txid, 'value': Value(value)})
             return batcher_records
-        finally:
-            conn.close()
 
     def delete(self, tag):
-        conn = self.get_connection()
-        try:
+        with self.writer() as conn:
             cursor = conn.cursor()
             # Check if the record exists
             cursor.execute('SELECT EXISTS(SELECT 1 FROM batcher WHERE tag = ?)', (tag,))
@@ -68,9 +57,6 @@ class BatcherDbManager(BaseDbManager):
             if exists:
                 # If the record exists, delete it
                 cursor.execute('DELETE FROM batcher WHERE tag = ?', (tag,))
-                conn.commit()
                 return True  # Record existed and was deleted
             else:
                 return False  # Record did not exist
-        finally:
-            conn.close()
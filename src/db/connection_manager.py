@@ -0,0 +1,141 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# tuned for a single writer with a few concurrent readers
+PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    # negative values are in KiB, this is 64 MiB
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+]
+
+# prepared statements kept per connection
+CACHED_STATEMENTS = 256
+
+
+class ConnectionManager:
+    """
+    Hands out sqlite connections to the table managers.
+
+    Every table manager of a DbManager shares one ConnectionManager. There is
+    one persistent writer connection, guarded by a lock, and a small pool of
+    persistent reader connections. The db runs in WAL mode so readers, like
+    the analysis tool, never block the writer.
+
+    While a transaction is open on a thread, every read and write on that
+    thread uses the writer connection so the staged rows are visible and all
+    the writes commit or roll back together.
+    """
+
+    def __init__(self, db_file='batcher.db', pool_size: int = 4):
+        self.db_file = db_file
+        self.pool_size = pool_size
+        self._writer = None
+        self._write_lock = threading.RLock()
+        self._readers = []
+        self._pool_lock = threading.Lock()
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_file, check_same_thread=False, cached_statements=CACHED_STATEMENTS)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _depth(self) -> int:
+        return getattr(self._local, 'depth', 0)
+
+    def in_transaction(self) -> bool:
+        return self._depth() > 0
+
+    @contextmanager
+    def writer(self):
+        """
+        Yield the writer connection for a single table operation. Outside of
+        a transaction the work is committed when the block exits.
+        """
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = self._connect()
+
+            if self.in_transaction():
+                # the open transaction decides when to commit
+                yield self._writer
+                return
+
+            try:
+                yield self._writer
+                self._writer.commit()
+            except BaseException:
+                self._writer.rollback()
+                raise
+
+    @contextmanager
+    def reader(self):
+        """
+        Yield a pooled reader connection. Inside a transaction the writer is
+        used instead so uncommitted rows can be read back.
+        """
+        if self.in_transaction():
+            with self.writer() as conn:
+                yield conn
+            return
+
+        with self._pool_lock:
+            conn = self._readers.pop() if self._readers else None
+        if conn is None:
+            conn = self._connect()
+
+        try:
+            yield conn
+        finally:
+            with self._pool_lock:
+                if len(self._readers) < self.pool_size:
+                    self._readers.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Group every table operation inside the block into one transaction.
+        Nested transactions join the outer one.
+        """
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = self._connect()
+
+            self._local.depth = self._depth() + 1
+            try:
+                # sqlite3 only begins implicitly before inserts and updates,
+                # so schema changes and pragmas would commit on their own
+                if self._depth() == 1 and not self._writer.in_transaction:
+                    self._writer.execute('BEGIN')
+                yield
+                if self._depth() == 1:
+                    self._writer.commit()
+            except BaseException:
+                if self._depth() == 1:
+                    self._writer.rollback()
+                raise
+            finally:
+                self._local.depth -= 1
+
+    def close(self) -> None:
+        """
+        Close the writer and all the pooled readers.
+        """
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.commit()
+                self._writer.close()
+                self._writer = None
+        with self._pool_lock:
+            readers, self._readers = self._readers, []
+        for conn in readers:
+            conn.close()
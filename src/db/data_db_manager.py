@@ -1,14 +1,16 @@
+from src.datums import data_projection
 from src.value import Value
 
 from .base_db_manager import BaseDbManager
+from .record import Record, datum_column
 
 
 class DataDbManager(BaseDbManager):
     def initialize(self):
         # Initialize database tables
-        with self.conn:
+        with self.writer() as conn:
             # Table for data records
-            self.conn.execute("""
+            conn.execute("""
                 CREATE TABLE IF NOT EXISTS data (
                     id TEXT PRIMARY KEY,
                     txid TEXT,
@@ -18,44 +20,33 @@ class DataDbManager(BaseDbManager):
             """)
 
     def create(self, txid, datum, value):
-        conn = self.get_connection()
-        try:
-            datum_json = self.data_to_json(datum)
+        with self.writer() as conn:
+            datum_cbor = datum_column(datum)
             value_json = value.dump()
             conn.execute(
-                'INSERT OR IGNORE INTO data (id, txid, datum, value) VALUES (?, ?, ?, ?)',
-                ("unique_data", txid, datum_json, value_json)
+                'INSERT OR IGNORE INTO data (id, txid, datum, value, profit_policy, profit_token, profit_margin) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                ("unique_data", txid, datum_cbor, value_json) + data_projection(datum)
             )
-            conn.commit()
-        finally:
-            conn.close()
 
     def read(self):
-        conn = self.get_connection()
-        try:
+        with self.reader() as conn:
             cursor = conn.cursor()
             cursor.execute(
-                'SELECT txid, datum, value FROM data WHERE id = ?', ("unique_data",))
+                'SELECT txid, datum, value, profit_policy, profit_token, profit_margin FROM data WHERE id = ?', ("unique_data",))
             record = cursor.fetchone()  # there is only one
             if record:
-                txid, datum_json, value_json = record
-                datum = self.json_to_data(datum_json)
+                txid, datum_cbor, value_json, profit_policy, profit_token, profit_margin = record
                 value = self.json_to_data(value_json)
-                return {'txid': txid, 'datum': datum, 'value': Value(value)}
+                # the datum is decoded only when it is used
+                return Record(datum_cbor, txid=txid, value=Value(value), profit_policy=profit_policy, profit_token=profit_token, profit_margin=profit_margin)
             return None
-        finally:
-            conn.close()
 
     def update(self, txid, datum, value):
         # it only gets created once, so the id is always known
-        conn = self.get_connection()
-        try:
-            datum_json = self.data_to_json(datum)
+        with self.writer() as conn:
+            datum_cbor = datum_column(datum)
             value_json = value.dump()
             conn.execute(
-                'UPDATE data SET txid = ?, datum = ?, value = ? WHERE id = ?',
-                (txid, datum_json, value_json, "unique_data")
+                'UPDATE data SET txid = ?, datum = ?, value = ?, profit_policy = ?, profit_token = ?, profit_margin = ? WHERE id = ?',
+                (txid, datum_cbor, value_json) + data_projection(datum) + ("unique_data",)
             )
-            conn.commit()
-        finally:
-            conn.close()
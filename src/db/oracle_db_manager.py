@@ -1,14 +1,16 @@
+from src.datums import oracle_projection
 from src.value import Value
 
 from .base_db_manager import BaseDbManager
+from .record import Record, datum_column
 
 
 class OracleDbManager(BaseDbManager):
     def initialize(self):
         # Initialize database tables
-        with self.conn:
+        with self.writer() as conn:
             # Table for oracle records
-            self.conn.execute("""
+            conn.execute("""
                 CREATE TABLE IF NOT EXISTS oracle (
                     id TEXT PRIMARY KEY,
                     txid TEXT,
@@ -18,45 +20,35 @@ class OracleDbManager(BaseDbManager):
             """)
 
     def create(self, txid, datum, value):
-        conn = self.get_connection()
-        try:
-            datum_json = self.data_to_json(datum)
+        with self.writer() as conn:
+            datum_cbor = datum_column(datum)
             value_json = value.dump()
             conn.execute(
-                'INSERT OR IGNORE INTO oracle (id, txid, datum, value) VALUES (?, ?, ?, ?)',
-                ("unique_oracle", txid, datum_json, value_json)
+                'INSERT OR IGNORE INTO oracle (id, txid, datum, value, price, start_time, end_time) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                ("unique_oracle", txid, datum_cbor, value_json) + oracle_projection(datum)
             )
-            conn.commit()
-        finally:
-            conn.close()
 
     def read(self):
-        conn = self.get_connection()
-        try:
+        with self.reader() as conn:
             cursor = conn.cursor()
             cursor.execute(
-                'SELECT txid, datum, value FROM oracle WHERE id = ?', ("unique_oracle",))
+                'SELECT txid, datum, value, price, start_time, end_time, start_slot, end_slot FROM oracle WHERE id = ?', ("unique_oracle",))
             record = cursor.fetchone()  # there is only one
             if record:
-                txid, datum_json, value_json = record
-                datum = self.json_to_data(datum_json)
+                txid, datum_cbor, value_json, price, start_time, end_time, start_slot, end_slot = record
                 value = self.json_to_data(value_json)
-                return {'txid': txid, 'datum': datum, 'value': Value(value)}
+                # the datum is decoded only when it is used
+                return Record(datum_cbor, txid=txid, value=Value(value), price=price, start_time=start_time, end_time=end_time, start_slot=start_slot, end_slot=end_slot)
             return None
-        finally:
-            conn.close()
 
-    def update(self, txid, datum, value):
+    def update(self, txid, datum, value, slots=(None, None)):
         # it only gets created once, so the id is always known
         # value never changes
-        conn = self.get_connection()
-        try:
-            datum_json = self.data_to_json(datum)
+        # slots are the start and end slots of the oracle times when the network is known
+        with self.writer() as conn:
+            datum_cbor = datum_column(datum)
             value_json = value.dump()
             conn.execute(
-                'UPDATE oracle SET txid = ?, datum = ?, value = ? WHERE id = ?',
-                (txid, datum_json, value_json, "unique_oracle")
+                'UPDATE oracle SET txid = ?, datum = ?, value = ?, price = ?, start_time = ?, end_time = ?, start_slot = ?, end_slot = ? WHERE id = ?',
+                (txid, datum_cbor, value_json) + oracle_projection(datum) + tuple(slots) + ("unique_oracle",)
             )
-            conn.commit()
-        finally:
-            conn.close()
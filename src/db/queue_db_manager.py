@@ -1,14 +1,17 @@
+from src.allowlist import asset_names, policy_ids, priority
+from src.datums import queue_order_projection, queue_projection
 from src.value import Value
 
 from .base_db_manager import BaseDbManager
+from .record import Record, datum_column
 
 
 class QueueDbManager(BaseDbManager):
     def initialize(self):
         # Initialize database tables
-        with self.conn:
+        with self.writer() as conn:
             # Table for queue records
-            self.conn.execute("""
+            conn.execute("""
                 CREATE TABLE IF NOT EXISTS queue (
                     tag TEXT PRIMARY KEY,
                     txid TEXT,
@@ -21,54 +24,81 @@ class QueueDbManager(BaseDbManager):
             """)
 
     def create(self, tag, txid, tkn, datum, value, timestamp, tx_idx):
-        conn = self.get_connection()
-        try:
-            datum_json = self.data_to_json(datum)
+        with self.writer() as conn:
+            datum_cbor = datum_column(datum)
             value_json = value.dump()
             conn.execute(
-                'INSERT OR REPLACE INTO queue (tag, txid, tkn, datum, value, timestamp, tx_idx) VALUES (?, ?, ?, ?, ?, ?, ?)',
-                (tag, txid, tkn, datum_json, value_json, timestamp, tx_idx)
+                'INSERT OR REPLACE INTO queue (tag, txid, tkn, datum, value, timestamp, tx_idx, bundle_amount, incentive_policy, incentive_token, incentive_amount, well_formed, valid, priority) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (tag, txid, tkn, datum_cbor, value_json, timestamp, tx_idx) + queue_projection(datum) + queue_order_projection(datum)
             )
-            conn.commit()
-        finally:
-            conn.close()
 
     def read(self, tag):
-        conn = self.get_connection()
-        try:
+        with self.reader() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT txid, tkn, datum, value, timestamp, tx_idx FROM queue WHERE tag = ?', (tag,))
+            cursor.execute('SELECT tag, txid, tkn, datum, value, timestamp, tx_idx, bundle_amount, incentive_policy, incentive_token, incentive_amount FROM queue WHERE tag = ?', (tag,))
             record = cursor.fetchone()
             if record:
-                txid, tkn, datum_json, value_json, timestamp, tx_idx = record
-                datum = self.json_to_data(datum_json)
-                value = self.json_to_data(value_json)
-                return {'tag': tag, 'txid': txid, 'tkn': tkn, 'datum': datum, 'value': Value(value), 'timestamp': timestamp, 'tx_idx': tx_idx}
+                return self.to_record(record)
             return None
-        finally:
-            conn.close()
 
     def read_all(self, pointer: str):
-        conn = self.get_connection()
-        try:
+        with self.reader() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT tag, txid, tkn, datum, value, timestamp, tx_idx FROM queue WHERE tkn = ?', (pointer,))
+            cursor.execute('SELECT tag, txid, tkn, datum, value, timestamp, tx_idx, bundle_amount, incentive_policy, incentive_token, incentive_amount FROM queue WHERE tkn = ?', (pointer,))
             records = cursor.fetchall()
             queue_records = []
             for record in records:
-                tag, txid, tkn, datum_json, value_json, timestamp, tx_idx = record
-                datum = self.json_to_data(datum_json)
-                value = self.json_to_data(value_json)
-                queue_records.append((tag, {'tag': tag, 'txid': txid, 'tkn': tkn, 'datum': datum, 'value': Value(value), 'timestamp': timestamp, 'tx_idx': tx_idx}))
+                queue_records.append((record[0], self.to_record(record)))
             return queue_records
-        finally:
-            conn.close()
 
-    # get all queue records by tkn
+    def to_record(self, record):
+        tag, txid, tkn, datum_cbor, value_json, timestamp, tx_idx, bundle_amount, incentive_policy, incentive_token, incentive_amount = record
+        value = self.json_to_data(value_json)
+        # the datum is decoded only when it is used
+        return Record(
+            datum_cbor,
+            tag=tag, txid=txid, tkn=tkn, value=Value(value), timestamp=timestamp, tx_idx=tx_idx,
+            bundle_amount=bundle_amount, incentive_policy=incentive_policy, incentive_token=incentive_token, incentive_amount=incentive_amount
+        )
+
+    def sorted_tags(self):
+        """
+        The valid orders of every sale in fifo order. Orders are sorted by the
+        incentive priority, then the largest incentive, then the timestamp
+        and the tx index.
+
+        Returns:
+            list: (sale tkn, tag, timestamp, tx idx, incentive, priority) rows,
+            the tag is None for a sale without orders.
+        """
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT sale.tkn, queue.tag, queue.timestamp, queue.tx_idx, queue.incentive_amount, queue.priority
+                FROM sale LEFT JOIN queue ON queue.tkn = sale.tkn AND queue.valid = 1
+                ORDER BY sale.tkn, queue.priority, queue.incentive_amount DESC, queue.timestamp, queue.tx_idx
+            """)
+            return cursor.fetchall()
+
+    def refresh_validity(self):
+        """
+        Recompute the allowlist dependent columns from the stored datum form
+        and incentive, so a changed allowlist applies to existing orders.
+        """
+        priorities = [(pid, priority(pid)) for pid in policy_ids]
+        case = ' '.join('WHEN ? THEN ?' for _ in priorities)
+        with self.writer() as conn:
+            conn.execute(
+                f"""
+                UPDATE queue SET
+                    valid = (well_formed = 1 AND incentive_policy IN ({', '.join('?' * len(policy_ids))}) AND incentive_token IN ({', '.join('?' * len(asset_names))})),
+                    priority = CASE incentive_policy {case} ELSE NULL END
+                """,
+                tuple(policy_ids) + tuple(asset_names) + tuple(item for pair in priorities for item in pair)
+            )
 
     def delete(self, tag):
-        conn = self.get_connection()
-        try:
+        with self.writer() as conn:
             cursor = conn.cursor()
             # Check if the record exists with the given txid
             cursor.execute('SELECT EXISTS(SELECT 1 FROM queue WHERE tag = ?)', (tag,))
@@ -76,9 +106,6 @@ class QueueDbManager(BaseDbManager):
             if exists:
                 # If the record exists, delete it
                 cursor.execute('DELETE FROM queue WHERE tag = ?', (tag,))
-                conn.commit()
                 return True  # Record with the given txid existed and was deleted
             else:
                 return False  # No record with the given txid
-        finally:
-            conn.close()
@@ -0,0 +1,64 @@
+from dataclasses import dataclass
+
+from src import codec
+from src.cbor import cbor_to_datum, datum_to_cbor
+
+
+def datum_column(datum: dict) -> bytes | str:
+    """
+    The stored form of a datum, its cbor. A datum that is not plutus data can
+    never be spent by the batcher, it keeps its json so it reads back as is.
+    """
+    try:
+        return datum_to_cbor(datum)
+    except ValueError:
+        return codec.dumps(datum)
+
+
+class Record(dict):
+    """
+    A db row as a dict. The datum is stored as cbor, or as json when it is
+    not plutus data, and is only decoded the first time the datum key is read.
+    """
+
+    def __init__(self, datum_cbor: bytes, **fields) -> None:
+        super().__init__(**fields)
+        self.datum_cbor = datum_cbor
+
+    def __missing__(self, key):
+        if key != 'datum':
+            raise KeyError(key)
+        if isinstance(self.datum_cbor, str):
+            datum = codec.loads(self.datum_cbor)
+        else:
+            datum = cbor_to_datum(self.datum_cbor)
+        self['datum'] = datum
+        return datum
+
+    def get(self, key, default=None):
+        if key == 'datum':
+            return self['datum']
+        return super().get(key, default)
+
+    def __contains__(self, key):
+        return key == 'datum' or super().__contains__(key)
+
+    def __eq__(self, other):
+        # a decoded datum compares like any other key
+        if isinstance(other, dict) and 'datum' in other:
+            self['datum']
+            if isinstance(other, Record):
+                other['datum']
+        return super().__eq__(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+
+@dataclass
+class SaleOrders:
+    """
+    A live sale and its valid queue entries, keyed by tag in fifo order.
+    """
+    sale: Record
+    orders: dict[str, Record]
@@ -12,9 +12,9 @@ from .base_db_manager import BaseDbManager
 class ReferenceDbManager(BaseDbManager):
     def initialize(self):
         # Initialize database tables
-        with self.conn:
+        with self.writer() as conn:
             # Table for reference records
-            self.conn.execute("""
+            conn.execute("""
                 CREATE TABLE IF NOT EXISTS reference (
                     id TEXT PRIMARY KEY,
                     txid TEXT,
@@ -24,7 +24,6 @@ class ReferenceDbManager(BaseDbManager):
             """)
 
     def load(self, config):
-        conn = self.get_connection()
         # The parent directory for relative pathing
         parent_dir = parent_directory_path()
 
@@ -43,31 +42,29 @@ class ReferenceDbManager(BaseDbManager):
         vault_double_cbor = get_cbor_from_file(vault_path)
         vault_cbor = cbor2.loads(bytes.fromhex(vault_double_cbor)).hex()
 
-        try:
+        # the reference script size the fee is charged for is the size of the
+        # script bytes, so it is known without asking the node
+        with self.writer() as conn:
             conn.execute(
-                'INSERT OR REPLACE INTO reference (id, txid, cborHex, value) VALUES (?, ?, ?, ?)',
-                ("sale_reference", config["sale_ref_utxo"], sale_cbor, Value({"lovelace": config["sale_lovelace"]}).dump())
+                'INSERT OR REPLACE INTO reference (id, txid, cborHex, value, script_size) VALUES (?, ?, ?, ?, ?)',
+                ("sale_reference", config["sale_ref_utxo"], sale_cbor, Value({"lovelace": config["sale_lovelace"]}).dump(), len(sale_cbor) // 2)
             )
             conn.execute(
-                'INSERT OR REPLACE INTO reference (id, txid, cborHex, value) VALUES (?, ?, ?, ?)',
-                ("queue_reference", config["queue_ref_utxo"], queue_cbor, Value({"lovelace": config["queue_lovelace"]}).dump())
+                'INSERT OR REPLACE INTO reference (id, txid, cborHex, value, script_size) VALUES (?, ?, ?, ?, ?)',
+                ("queue_reference", config["queue_ref_utxo"], queue_cbor, Value({"lovelace": config["queue_lovelace"]}).dump(), len(queue_cbor) // 2)
             )
             conn.execute(
-                'INSERT OR REPLACE INTO reference (id, txid, cborHex, value) VALUES (?, ?, ?, ?)',
-                ("vault_reference", config["vault_ref_utxo"], vault_cbor, Value({"lovelace": config["vault_lovelace"]}).dump())
+                'INSERT OR REPLACE INTO reference (id, txid, cborHex, value, script_size) VALUES (?, ?, ?, ?, ?)',
+                ("vault_reference", config["vault_ref_utxo"], vault_cbor, Value({"lovelace": config["vault_lovelace"]}).dump(), len(vault_cbor) // 2)
             )
-            conn.commit()
-        finally:
-            conn.close()
 
     def read(self):
-        conn = self.get_connection()
         data = {
             "sale": {},
             "queue": {},
             "vault": {},
         }
-        try:
+        with self.reader() as conn:
             cursor = conn.cursor()
             references = {
                 "sale_reference": "sale",
@@ -76,12 +73,10 @@ class ReferenceDbManager(BaseDbManager):
             }
 
             for ref_id, key in references.items():
-                cursor.execute('SELECT txid, cborHex, value FROM reference WHERE id = ?', (ref_id,))
+                cursor.execute('SELECT txid, cborHex, value, script_size FROM reference WHERE id = ?', (ref_id,))
                 record = cursor.fetchone()  # there is only one
                 if record:
-                    txid, cborHex, value_json = record
+                    txid, cborHex, value_json, script_size = record
                     value = self.json_to_data(value_json)
-                    data[key] = {'txid': txid, 'cborHex': cborHex, 'value': Value(value)}
+                    data[key] = {'txid': txid, 'cborHex': cborHex, 'value': Value(value), 'script_size': script_size}
             return data
-        finally:
-            conn.close()
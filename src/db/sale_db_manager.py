@@ -1,14 +1,16 @@
+from src.datums import sale_projection
 from src.value import Value
 
 from .base_db_manager import BaseDbManager
+from .record import Record, datum_column
 
 
 class SaleDbManager(BaseDbManager):
     def initialize(self):
         # Initialize database tables
-        with self.conn:
+        with self.writer() as conn:
             # Table for sale records
-            self.conn.execute("""
+            conn.execute("""
                 CREATE TABLE IF NOT EXISTS sale (
                     tkn TEXT PRIMARY KEY,
                     txid TEXT,
@@ -18,36 +20,36 @@ class SaleDbManager(BaseDbManager):
             """)
 
     def create(self, tkn, txid, datum, value):
-        conn = self.get_connection()
-        try:
-            datum_json = self.data_to_json(datum)
+        with self.writer() as conn:
+            datum_cbor = datum_column(datum)
             value_json = value.dump()
             conn.execute(
-                'INSERT OR REPLACE INTO sale (tkn, txid, datum, value) VALUES (?, ?, ?, ?)',
-                (tkn, txid, datum_json, value_json)
+                'INSERT OR REPLACE INTO sale (tkn, txid, datum, value, bundle_policy, bundle_token, bundle_amount, cost_policy, cost_token, cost_amount, max_bundle_size) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (tkn, txid, datum_cbor, value_json) + sale_projection(datum)
             )
-            conn.commit()
-        finally:
-            conn.close()
 
     def read(self, tkn):
-        conn = self.get_connection()
-        try:
+        with self.reader() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT txid, datum, value FROM sale WHERE tkn = ?', (tkn,))
+            cursor.execute('SELECT txid, datum, value, bundle_policy, bundle_token, bundle_amount, cost_policy, cost_token, cost_amount, max_bundle_size FROM sale WHERE tkn = ?', (tkn,))
             record = cursor.fetchone()
             if record:
-                txid, datum_json, value_json = record
-                datum = self.json_to_data(datum_json)
-                value = self.json_to_data(value_json)
-                return {'txid': txid, 'datum': datum, 'value': Value(value)}
+                return self.to_record(record)
             return None
-        finally:
-            conn.close()
+
+    def to_record(self, record):
+        txid, datum_cbor, value_json, bundle_policy, bundle_token, bundle_amount, cost_policy, cost_token, cost_amount, max_bundle_size = record
+        value = self.json_to_data(value_json)
+        # the datum is decoded only when it is used
+        return Record(
+            datum_cbor,
+            txid=txid, value=Value(value),
+            bundle_policy=bundle_policy, bundle_token=bundle_token, bundle_amount=bundle_amount,
+            cost_policy=cost_policy, cost_token=cost_token, cost_amount=cost_amount, max_bundle_size=max_bundle_size
+        )
 
     def read_all(self):
-        conn = self.get_connection()
-        try:
+        with self.reader() as conn:
             cursor = conn.cursor()
             # lexicographical ordering for sales.
             cursor.execute('SELECT tkn FROM sale ORDER BY tkn')
@@ -57,12 +59,9 @@ class SaleDbManager(BaseDbManager):
                 tkn = record[0]  # only tkn is there (tkn, )
                 sale_records.append(tkn)
             return sale_records
-        finally:
-            conn.close()
 
     def delete(self, txid):
-        conn = self.get_connection()
-        try:
+        with self.writer() as conn:
             cursor = conn.cursor()
             # Check if the record exists with the given txid
             cursor.execute('SELECT EXISTS(SELECT 1 FROM sale WHERE txid = ?)', (txid,))
@@ -70,9 +69,6 @@ class SaleDbManager(BaseDbManager):
             if exists:
                 # If the record exists, delete it
                 cursor.execute('DELETE FROM sale WHERE txid = ?', (txid,))
-                conn.commit()
                 return True  # Record with the given txid existed and was deleted
             else:
                 return False  # No record with the given txid
-        finally:
-            conn.close()
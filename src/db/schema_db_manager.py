@@ -0,0 +1,139 @@
+from src import codec
+from src.cbor import cbor_to_datum
+from src.datums import (data_projection, oracle_projection,
+                        queue_order_projection, queue_projection,
+                        sale_projection)
+
+from .base_db_manager import BaseDbManager
+from .record import datum_column
+
+
+def _hot_lookup_indexes(conn):
+    # queue entries are read per sale in fifo order, the tag lets a lookup of
+    # only the tags skip the rows, read_all still reads them
+    conn.execute('CREATE INDEX IF NOT EXISTS queue_tkn_idx ON queue (tkn, timestamp, tx_idx, tag)')
+    # sales are deleted by their txid
+    conn.execute('CREATE INDEX IF NOT EXISTS sale_txid_idx ON sale (txid)')
+    # vaults are read by the batcher pkh
+    conn.execute('CREATE INDEX IF NOT EXISTS vault_pkh_idx ON vault (pkh)')
+    # seen is probed by the queue txid and pruned by the end time
+    conn.execute('CREATE INDEX IF NOT EXISTS seen_queue_txid_idx ON seen (queue_txid)')
+    conn.execute('CREATE INDEX IF NOT EXISTS seen_end_time_idx ON seen (end_time)')
+
+
+# table -> (columns after the datum, projected columns, projection)
+_CBOR_TABLES = {
+    'queue': (
+        'tag TEXT PRIMARY KEY, txid TEXT, tkn TEXT, datum BLOB, value TEXT, timestamp INTEGER, tx_idx INTEGER',
+        'bundle_amount INTEGER, incentive_policy TEXT, incentive_token TEXT, incentive_amount INTEGER',
+        queue_projection,
+    ),
+    'sale': (
+        'tkn TEXT PRIMARY KEY, txid TEXT, datum BLOB, value TEXT',
+        'bundle_policy TEXT, bundle_token TEXT, bundle_amount INTEGER, cost_policy TEXT, cost_token TEXT, cost_amount INTEGER, max_bundle_size INTEGER',
+        sale_projection,
+    ),
+    'vault': (
+        'tag TEXT PRIMARY KEY, txid TEXT, pkh TEXT, datum BLOB, value TEXT',
+        '',
+        None,
+    ),
+    'oracle': (
+        'id TEXT PRIMARY KEY, txid TEXT, datum BLOB, value TEXT',
+        'price INTEGER, start_time INTEGER, end_time INTEGER',
+        oracle_projection,
+    ),
+    'data': (
+        'id TEXT PRIMARY KEY, txid TEXT, datum BLOB, value TEXT',
+        'profit_policy TEXT, profit_token TEXT, profit_margin INTEGER',
+        data_projection,
+    ),
+}
+
+
+def _cbor_datums(conn):
+    # the datums become cbor blobs and the hot datum fields get columns
+    for table, (columns, projected, projection) in _CBOR_TABLES.items():
+        names = [column.split()[0] for column in columns.split(', ')]
+        datum_idx = names.index('datum')
+        conn.execute(f'CREATE TABLE {table}_cbor ({columns}{", " + projected if projected else ""})')
+
+        rows = []
+        for row in conn.execute(f'SELECT {", ".join(names)} FROM {table}'):
+            row = list(row)
+            datum = codec.loads(row[datum_idx])
+            row[datum_idx] = datum_column(datum)
+            rows.append(tuple(row) + (projection(datum) if projection else ()))
+
+        if rows:
+            placeholders = ', '.join('?' * len(rows[0]))
+            conn.executemany(f'INSERT INTO {table}_cbor VALUES ({placeholders})', rows)
+        conn.execute(f'DROP TABLE {table}')
+        conn.execute(f'ALTER TABLE {table}_cbor RENAME TO {table}')
+
+    # dropping the tables dropped their indexes
+    _hot_lookup_indexes(conn)
+
+
+def _queue_order_columns(conn):
+    # validity and priority are computed once so the fifo order is one query
+    conn.execute('ALTER TABLE queue ADD COLUMN well_formed INTEGER')
+    conn.execute('ALTER TABLE queue ADD COLUMN valid INTEGER')
+    conn.execute('ALTER TABLE queue ADD COLUMN priority INTEGER')
+    rows = [
+        queue_order_projection(cbor_to_datum(datum)) + (tag,)
+        for tag, datum in conn.execute('SELECT tag, datum FROM queue')
+    ]
+    conn.executemany('UPDATE queue SET well_formed = ?, valid = ?, priority = ? WHERE tag = ?', rows)
+    # the valid orders of a sale come out of the index already in fifo order
+    conn.execute('CREATE INDEX IF NOT EXISTS queue_order_idx ON queue (tkn, valid, priority, incentive_amount DESC, timestamp, tx_idx, tag)')
+
+
+def _oracle_slot_columns(conn):
+    # the oracle times as slots, converted once when the oracle is ingested
+    conn.execute('ALTER TABLE oracle ADD COLUMN start_slot INTEGER')
+    conn.execute('ALTER TABLE oracle ADD COLUMN end_slot INTEGER')
+
+
+def _reference_script_sizes(conn):
+    # the fee for a reference script depends on its size in bytes
+    conn.execute('ALTER TABLE reference ADD COLUMN script_size INTEGER')
+    conn.execute('UPDATE reference SET script_size = length(cborHex) / 2')
+
+
+# The schema version is the number of migrations applied. Append new
+# migrations to the end of the list, never reorder or remove them.
+MIGRATIONS = [
+    _hot_lookup_indexes,
+    _cbor_datums,
+    _queue_order_columns,
+    _oracle_slot_columns,
+    _reference_script_sizes,
+]
+
+
+class SchemaDbManager(BaseDbManager):
+    def initialize(self):
+        # The tables must exist before this runs
+        self.migrate()
+
+    def version(self) -> int:
+        with self.reader() as conn:
+            return conn.execute('PRAGMA user_version').fetchone()[0]
+
+    def migrate(self) -> int:
+        """
+        Upgrade the db in place by applying every migration that has not been
+        applied yet. Each migration commits together with its version bump,
+        a migration that fails leaves the schema and the version as they were.
+
+        Returns:
+            int: The schema version after migrating.
+        """
+        version = self.version()
+        for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+            with self.connections.transaction(), self.writer() as conn:
+                migration(conn)
+                conn.execute(f'PRAGMA user_version = {number}')
+            version = number
+        return version
@@ -4,9 +4,9 @@ from .base_db_manager import BaseDbManager
 class SeenDbManager(BaseDbManager):
     def initialize(self):
         # Initialize database tables
-        with self.conn:
+        with self.writer() as conn:
             # Table for the seen records
-            self.conn.execute("""
+            conn.execute("""
                 CREATE TABLE IF NOT EXISTS seen (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     queue_txid TEXT,
@@ -16,18 +16,13 @@ class SeenDbManager(BaseDbManager):
             """)
 
     def create(self, queue_txid: str, start_time: int, end_time: int):
-        conn = self.get_connection()
-        try:
+        with self.writer() as conn:
             conn.execute(
                 'INSERT OR REPLACE INTO seen (queue_txid, start_time, end_time) VALUES (?, ?, ?)',
                 (queue_txid, start_time, end_time))
-            conn.commit()
-        finally:
-            conn.close()
 
     def exists(self, txid: str) -> bool:
-        conn = self.get_connection()
-        try:
+        with self.reader() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 'SELECT 1 FROM seen WHERE queue_txid = ? LIMIT 1',
@@ -35,16 +30,17 @@ class SeenDbManager(BaseDbManager):
             )
             record = cursor.fetchone()
             return record is not None
-        finally:
-            conn.close()
 
     def delete(self, current_time: int):
-        conn = self.get_connection()
-        try:
+        with self.writer() as conn:
             conn.execute(
                 'DELETE FROM seen WHERE end_time <= ?',
                 (current_time,)
             )
-            conn.commit()
-        finally:
-            conn.close()
+
+    def next_expiry(self):
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            # the earliest time a seen entry stops blocking its order
+            cursor.execute('SELECT MIN(end_time) FROM seen')
+            return cursor.fetchone()[0]
@@ -5,9 +5,9 @@ from .base_db_manager import BaseDbManager
 class StatusDbManager(BaseDbManager):
     def initialize(self):
         # Initialize database tables
-        with self.conn:
+        with self.writer() as conn:
             # Table for status records
-            self.conn.execute("""
+            conn.execute("""
                 CREATE TABLE IF NOT EXISTS status (
                     id TEXT PRIMARY KEY,
                     block_number INTEGER,
@@ -17,8 +17,7 @@ class StatusDbManager(BaseDbManager):
             """)
 
     def load(self, config):
-        conn = self.get_connection()
-        try:
+        with self.writer() as conn:
             # use the default values in config
             conn.execute(
                 'INSERT OR IGNORE INTO status (id, block_number, block_hash, timestamp) VALUES (?, ?, ?, ?)',
@@ -29,25 +28,17 @@ class StatusDbManager(BaseDbManager):
                     config["starting_timestamp"]
                 )
             )
-            conn.commit()
-        finally:
-            conn.close()
 
     # it only gets created once, so the id is always known
     def update(self, block_number, block_hash, timestamp):
-        conn = self.get_connection()
-        try:
+        with self.writer() as conn:
             conn.execute(
                 'UPDATE status SET block_number = ?, block_hash = ?, timestamp = ? WHERE id = ?',
                 (block_number, block_hash, timestamp, "unique_status")
             )
-            conn.commit()
-        finally:
-            conn.close()
 
     def read(self):
-        conn = self.get_connection()
-        try:
+        with self.reader() as conn:
             cursor = conn.cursor()
             cursor.execute(
                 'SELECT block_number, block_hash, timestamp FROM status WHERE id = ?', ("unique_status",))
@@ -56,5 +47,3 @@ class StatusDbManager(BaseDbManager):
                 block_number, block_hash, timestamp = record
                 return {'block_number': block_number, 'block_hash': block_hash, 'timestamp': timestamp}
             return None
-        finally:
-            conn.close()
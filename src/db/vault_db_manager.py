@@ -1,14 +1,15 @@
 from src.value import Value
 
 from .base_db_manager import BaseDbManager
+from .record import Record, datum_column
 
 
 class VaultDbManager(BaseDbManager):
     def initialize(self):
         # Initialize database tables
-        with self.conn:
+        with self.writer() as conn:
             # Table for vault records
-            self.conn.execute("""
+            conn.execute("""
                 CREATE TABLE IF NOT EXISTS vault (
                     tag TEXT PRIMARY KEY,
                     txid TEXT,
@@ -19,54 +20,41 @@ class VaultDbManager(BaseDbManager):
             """)
 
     def create(self, tag, txid, pkh, datum, value):
-        conn = self.get_connection()
-        try:
-            datum_json = self.data_to_json(datum)
+        with self.writer() as conn:
+            datum_cbor = datum_column(datum)
             value_json = value.dump()
             conn.execute(
                 'INSERT OR REPLACE INTO vault (tag, txid, pkh, datum, value) VALUES (?, ?, ?, ?, ?)',
-                (tag, txid, pkh, datum_json, value_json)
+                (tag, txid, pkh, datum_cbor, value_json)
             )
-            conn.commit()
-        finally:
-            conn.close()
 
     def read(self, pkh):
-        conn = self.get_connection()
-        try:
+        with self.reader() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT txid, datum, value FROM vault WHERE pkh = ?', (pkh,))
             record = cursor.fetchone()
             if record:
-                txid, datum_json, value_json = record
-                datum = self.json_to_data(datum_json)
+                txid, datum_cbor, value_json = record
                 value = self.json_to_data(value_json)
-                return {'pkh': pkh, 'txid': txid, 'datum': datum, 'value': Value(value)}
+                return Record(datum_cbor, pkh=pkh, txid=txid, value=Value(value))
             return None
-        finally:
-            conn.close()
 
     def read_all(self, pkh):
-        conn = self.get_connection()
-        try:
+        with self.reader() as conn:
             cursor = conn.cursor()
             cursor.execute('SELECT txid, datum, value FROM vault WHERE pkh = ?', (pkh,))
             records = cursor.fetchall()  # Fetch all matching records
             if records:
                 results = []
                 for record in records:
-                    txid, datum_json, value_json = record
-                    datum = self.json_to_data(datum_json)
+                    txid, datum_cbor, value_json = record
                     value = self.json_to_data(value_json)
-                    results.append({'pkh': pkh, 'txid': txid, 'datum': datum, 'value': Value(value)})
+                    results.append(Record(datum_cbor, pkh=pkh, txid=txid, value=Value(value)))
                 return results
             return None
-        finally:
-            conn.close()
 
     def delete(self, tag):
-        conn = self.get_connection()
-        try:
+        with self.writer() as conn:
             cursor = conn.cursor()
             # Check if the record exists with the given txid
             cursor.execute('SELECT EXISTS(SELECT 1 FROM vault WHERE tag = ?)', (tag,))
@@ -74,9 +62,6 @@ class VaultDbManager(BaseDbManager):
             if exists:
                 # If the record exists, delete it
                 cursor.execute('DELETE FROM vault WHERE tag = ?', (tag,))
-                conn.commit()
                 return True  # Record with the given txid existed and was deleted
             else:
                 return False  # No record with the given txid
-        finally:
-            conn.close()
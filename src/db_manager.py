@@ -1,26 +1,43 @@
 from src.db.batcher_db_manager import BatcherDbManager
+from src.db.connection_manager import ConnectionManager
 from src.db.data_db_manager import DataDbManager
 from src.db.oracle_db_manager import OracleDbManager
 from src.db.queue_db_manager import QueueDbManager
+from src.db.record import SaleOrders
 from src.db.reference_db_manager import ReferenceDbManager
 from src.db.sale_db_manager import SaleDbManager
+from src.db.schema_db_manager import SchemaDbManager
 from src.db.seen_db_manager import SeenDbManager
 from src.db.status_db_manager import StatusDbManager
 from src.db.vault_db_manager import VaultDbManager
+from src.order_book import OrderBook
+from src.round_state import RoundState
+from src.utxo_cache import UTxOCache
 from src.value import Value
 
 
 class DbManager:
     def __init__(self, db_file='batcher.db'):
-        self.batcher = BatcherDbManager(db_file)
-        self.data = DataDbManager(db_file)
-        self.oracle = OracleDbManager(db_file)
-        self.queue = QueueDbManager(db_file)
-        self.reference = ReferenceDbManager(db_file)
-        self.sale = SaleDbManager(db_file)
-        self.seen = SeenDbManager(db_file)
-        self.status = StatusDbManager(db_file)
-        self.vault = VaultDbManager(db_file)
+        # all the tables share the connections so they can share a transaction
+        self.connections = ConnectionManager(db_file)
+        self.batcher = BatcherDbManager(db_file, self.connections)
+        self.data = DataDbManager(db_file, self.connections)
+        self.oracle = OracleDbManager(db_file, self.connections)
+        self.queue = QueueDbManager(db_file, self.connections)
+        self.reference = ReferenceDbManager(db_file, self.connections)
+        self.sale = SaleDbManager(db_file, self.connections)
+        self.schema = SchemaDbManager(db_file, self.connections)
+        self.seen = SeenDbManager(db_file, self.connections)
+        self.status = StatusDbManager(db_file, self.connections)
+        self.vault = VaultDbManager(db_file, self.connections)
+        # every outref inside the batcher, sale, queue, and vault tables
+        self.tracked = set()
+        # the valid orders of every sale in fifo order
+        self.order_book = OrderBook()
+        # what changed since the aggregation rounds last looked at each sale
+        self.round_state = RoundState()
+        # the outrefs known to exist on chain
+        self.utxo_cache = UTxOCache()
 
     def initialize(self, config):
         self.batcher.initialize()
@@ -32,6 +49,10 @@ class DbManager:
         self.seen.initialize()
         self.status.initialize()
         self.vault.initialize()
+        # upgrade the existing tables to the current schema
+        self.schema.initialize()
+        # the allowlist may have changed since the orders were stored
+        self.queue.refresh_validity()
         # load the start status from config
         self.status.load(config)
         # load the reference data here
@@ -40,6 +61,67 @@ class DbManager:
         self.oracle.create("", {}, Value({}))
         # create the start data from empty
         self.data.create("", {}, Value({}))
+        # the spendable outrefs the batcher knows about
+        self.load_tracked()
+        # the order book is only ever updated after this
+        self.load_order_book()
+
+    def load_tracked(self):
+        """
+        Rebuild the tracked outref set from the db. A spent input that is not
+        in the set can not be in any of the tables.
+        """
+        tracked = set()
+        with self.connections.reader() as conn:
+            for table in ('batcher', 'sale', 'queue', 'vault'):
+                tracked.update(record[0] for record in conn.execute(f'SELECT txid FROM {table}'))
+        self.tracked = tracked
+
+    def load_order_book(self):
+        """
+        Rebuild the in memory order book from the db. Any sale may have
+        changed so every sale is dirty again.
+        """
+        with self.connections.reader() as conn:
+            sales = conn.execute('SELECT tkn, txid FROM sale').fetchall()
+        self.order_book.load(self.queue.sorted_tags(), sales)
+        self.round_state.touch_all()
+
+    def read_order_book(self):
+        """
+        Every live sale with its valid queue entries in fifo order, read with
+        one join so a round does not query the db per sale or per order.
+
+        Returns:
+            dict: sale tkn -> SaleOrders, in sale order.
+        """
+        book = {}
+        with self.connections.reader() as conn:
+            cursor = conn.execute("""
+                SELECT
+                    sale.tkn, sale.txid, sale.datum, sale.value, sale.bundle_policy, sale.bundle_token, sale.bundle_amount,
+                    sale.cost_policy, sale.cost_token, sale.cost_amount, sale.max_bundle_size,
+                    queue.tag, queue.txid, queue.tkn, queue.datum, queue.value, queue.timestamp, queue.tx_idx,
+                    queue.bundle_amount, queue.incentive_policy, queue.incentive_token, queue.incentive_amount
+                FROM sale LEFT JOIN queue ON queue.tkn = sale.tkn AND queue.valid = 1
+                ORDER BY sale.tkn, queue.priority, queue.incentive_amount DESC, queue.timestamp, queue.tx_idx
+            """)
+            for row in cursor:
+                tkn = row[0]
+                entry = book.get(tkn)
+                if entry is None:
+                    entry = book[tkn] = SaleOrders(self.sale.to_record(row[1:11]), {})
+                # a sale without valid orders
+                if row[11] is None:
+                    continue
+                entry.orders[row[11]] = self.queue.to_record(row[11:])
+        return book
+
+    def transaction(self):
+        """
+        Every table write inside of the with block commits atomically.
+        """
+        return self.connections.transaction()
 
     def cleanup(self):
         self.batcher.cleanup()
@@ -48,6 +130,9 @@ class DbManager:
         self.queue.cleanup()
         self.reference.cleanup()
         self.sale.cleanup()
+        self.schema.cleanup()
         self.seen.cleanup()
         self.status.cleanup()
         self.vault.cleanup()
+        # release the persistent connections
+        self.connections.close()
@@ -1,16 +1,15 @@
 import copy
 import os
-import subprocess
 
 from src.address import pkh_from_address
-from src.cli import (calculate_min_fee, get_latest_slot_number,
-                     query_ref_script_size, query_slot_number, txid)
 from src.datums import (bundle_to_value, cost_to_value, get_number_of_bundles,
                         incentive_to_value, to_address)
-from src.json_file import write
+from src.fee import FeeEngine
 from src.redeemer import empty, token, tokens
+from src.slot import slot_converter
+from src.tx_builder import TxBuilder, language_views
 from src.tx_simulate import (calculate_total_fee, convert_execution_unit,
-                             get_cbor_from_file, get_index_in_order,
+                             get_index_in_order,
                              purchase_simulation, refund_simulation,
                              sort_lexicographically,
                              transaction_simulation_ogmios)
@@ -21,6 +20,26 @@ from src.value import Value
 
 class Endpoint:
 
+    @staticmethod
+    def validity_interval(utxo: UTxOManager, config: dict, delta: int) -> tuple[int, int, int]:
+        """
+        The slots a transaction using the oracle is valid between, inset by
+        delta seconds from the oracle times, and the current slot. The oracle
+        slots are converted at ingest, else they are converted here.
+
+        Returns:
+            tuple[int, int, int]: The start slot, the end slot and the current slot
+        """
+        slots = slot_converter(config)
+        feed = utxo.oracle.datum['fields'][0]['fields'][0]['map']
+        start_slot = utxo.oracle.start_slot
+        if start_slot is None:
+            start_slot = slots.slot(feed[1]['v']['int'])
+        end_slot = utxo.oracle.end_slot
+        if end_slot is None:
+            end_slot = slots.slot(feed[2]['v']['int'])
+        return start_slot + delta, end_slot - delta, slots.current_slot()
+
     @staticmethod
     def purchase(utxo: UTxOManager, config: dict, logger=None) -> tuple[UTxOManager, bool]:
         """
@@ -40,9 +59,6 @@ class Endpoint:
         # set success flag to false
         purchase_success_flag = False
 
-        # the cardano cli path
-        cli_path = config['cli_path']
-
         # reference UTxOs for the scripts
         data_ref_utxo = utxo.data.txid
         oracle_ref_utxo = utxo.oracle.txid
@@ -73,27 +89,16 @@ class Endpoint:
         out_file_path = os.path.join(parent_dir, "tmp/tx.draft")
 
         # redeemer for purchase
-        write(empty(0), "tmp/purchase-redeemer.json")
-        sale_redeemer_file_path = os.path.join(parent_dir, "tmp/purchase-redeemer.json")
-        queue_redeemer_file_path = os.path.join(parent_dir, "tmp/purchase-redeemer.json")
-        vault_redeemer_file_path = os.path.join(parent_dir, "tmp/add-tokens-redeemer.json")
+        purchase_redeemer = empty(0)
 
         # datums for purchase
         sale_datum = utxo.sale.datum
         sale_is_using_usd = sale_datum['fields'][2]['fields'][0]['bytes'] == usd_policy_id
-        write(sale_datum, "tmp/sale-datum.json")
         queue_datum = utxo.queue.datum
-        write(queue_datum, "tmp/queue-datum.json")
         vault_datum = utxo.vault.datum
-        write(vault_datum, "tmp/vault-datum.json")
         oracle_datum = utxo.oracle.datum
         data_datum = utxo.data.datum
 
-        # datum paths
-        sale_datum_file_path = os.path.join(parent_dir, "tmp/sale-datum.json")
-        queue_datum_file_path = os.path.join(parent_dir, "tmp/queue-datum.json")
-        vault_datum_file_path = os.path.join(parent_dir, "tmp/vault-datum.json")
-
         # profit vault
         usd_profit_margin = data_datum['fields'][7]['fields'][5]['int']
         newm_usd_price = oracle_datum['fields'][0]['fields'][0]['map'][0]['v']['int']
@@ -122,10 +127,10 @@ class Endpoint:
 
         # if set to zero then no profit
         if usd_profit_margin == 0:
-            write(tokens([]), "tmp/add-tokens-redeemer.json")
+            vault_redeemer = tokens([])
             vault_out_value = copy.deepcopy(vault_value)
         else:
-            write(tokens([token(profit_payment_pid, profit_payment_tkn, profit_payment_amt)]), "tmp/add-tokens-redeemer.json")
+            vault_redeemer = tokens([token(profit_payment_pid, profit_payment_tkn, profit_payment_amt)])
             vault_out_value = copy.deepcopy(vault_value) + copy.deepcopy(profit_value)
 
         # the number of bundles going to the queue entry
@@ -176,13 +181,8 @@ class Endpoint:
 
         # timeunits
         delta = 60
-        # start and end unix times
-        start_time = oracle_datum['fields'][0]['fields'][0]['map'][1]['v']['int']
-        end_time = oracle_datum['fields'][0]['fields'][0]['map'][2]['v']['int']
         # start and end slots
-        start_slot = query_slot_number(config['socket_path'], start_time, config['network'], cli_path, delta)
-        end_slot = query_slot_number(config['socket_path'], end_time, config['network'], cli_path, -delta)
-        latest_slot_number = get_latest_slot_number(config['socket_path'], 'tmp/tip.json', config['network'], cli_path)
+        start_slot, end_slot, latest_slot_number = Endpoint.validity_interval(utxo, config, delta)
 
         # will fail due to time validation logic
         if end_slot - latest_slot_number <= 0:
@@ -192,67 +192,29 @@ class Endpoint:
         # if true then the oracle is required
         is_oracle_required = usd_profit_margin != 0 or sale_is_using_usd is True
 
-        func = [
-            cli_path, 'conway', "transaction", "build-raw",
-            "--protocol-params-file", protocol_file_path,
-            "--out-file", out_file_path,
-            "--tx-in-collateral", config['collat_utxo'],
-        ]
+        fees = FeeEngine.load(protocol_file_path)
+        tx = TxBuilder(language_views(fees.cost_models['PlutusV3']))
+        tx.add_collateral(config['collat_utxo'])
         if is_oracle_required is True:
-            func += [
-                "--invalid-before", str(start_slot),
-                "--invalid-hereafter", str(end_slot),
-                "--read-only-tx-in-reference", oracle_ref_utxo,
-            ]
-        func += [
-            "--read-only-tx-in-reference", data_ref_utxo,
-            "--tx-in", utxo.batcher.txid,
-            "--tx-in", utxo.sale.txid,
-            "--spending-tx-in-reference", sale_ref_utxo,
-            "--spending-plutus-script-v3",
-            "--spending-reference-tx-in-inline-datum-present",
-            "--spending-reference-tx-in-execution-units", sale_execution_units,
-            "--spending-reference-tx-in-redeemer-file", sale_redeemer_file_path,
-            "--tx-in", utxo.queue.txid,
-            "--spending-tx-in-reference", queue_ref_utxo,
-            "--spending-plutus-script-v3",
-            "--spending-reference-tx-in-inline-datum-present",
-            "--spending-reference-tx-in-execution-units", queue_execution_units,
-            "--spending-reference-tx-in-redeemer-file", queue_redeemer_file_path,
-        ]
+            tx.set_validity(start_slot, end_slot)
+            tx.add_reference_input(oracle_ref_utxo)
+        tx.add_reference_input(data_ref_utxo)
+        tx.add_input(utxo.batcher.txid)
+        tx.add_script_input(utxo.sale.txid, sale_ref_utxo, purchase_redeemer)
+        tx.add_script_input(utxo.queue.txid, queue_ref_utxo, purchase_redeemer)
         if usd_profit_margin != 0:
-            func += [
-                "--tx-in", utxo.vault.txid,
-                "--spending-tx-in-reference", vault_ref_utxo,
-                "--spending-plutus-script-v3",
-                "--spending-reference-tx-in-inline-datum-present",
-                "--spending-reference-tx-in-execution-units", vault_execution_units,
-                "--spending-reference-tx-in-redeemer-file", vault_redeemer_file_path,
-                "--tx-out", vault_out_value.to_output(config['vault_address']),
-                "--tx-out-inline-datum-file", vault_datum_file_path,
-            ]
-        func += [
-            "--tx-out", sale_out_value.to_output(config['sale_address']),
-            "--tx-out-inline-datum-file", sale_datum_file_path,
-            "--tx-out", queue_out_value.to_output(config['queue_address']),
-            "--tx-out-inline-datum-file", queue_datum_file_path,
-            "--tx-out", batcher_out_value.to_output(batcher_address),
-            "--required-signer-hash", batcher_pkh,
-            "--required-signer-hash", collat_pkh,
-            "--fee", str(fee)
-        ]
-
-        # this saves to out file
-        p = subprocess.Popen(func, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        _, errors = p.communicate()
-
-        logger.debug(f"Purchase Build Errors: {errors}") if logger is not None else None
-
-        if "Command failed" in errors.decode():
-            return utxo, purchase_success_flag
+            tx.add_script_input(utxo.vault.txid, vault_ref_utxo, vault_redeemer)
+            tx.add_output(config['vault_address'], vault_out_value, vault_datum)
+        tx.add_output(config['sale_address'], sale_out_value, sale_datum)
+        queue_output = len(tx.outputs)
+        tx.add_output(config['queue_address'], queue_out_value, queue_datum)
+        tx.add_output(batcher_address, batcher_out_value)
+        tx.add_required_signer(batcher_pkh)
+        tx.add_required_signer(collat_pkh)
+        tx.fee = fee
 
         # At this point we should be able to simulate the tx draft
-        cborHex = get_cbor_from_file(out_file_path)
+        cborHex = tx.to_cbor().hex()
         if config['use_ogmios'] is True:
             execution_units = transaction_simulation_ogmios(cborHex, utxo, config)
         else:
@@ -266,26 +228,19 @@ class Endpoint:
         ordered_list = sort_lexicographically(utxo.sale.txid, utxo.queue.txid, utxo.vault.txid)
 
         # At this point we should be able to calculate the total fee
-        script_inputs = [
-            utxo.batcher.txid,
-            config['collat_utxo'],
-            utxo.vault.txid,
-            vault_ref_utxo,
-            utxo.sale.txid,
-            sale_ref_utxo,
-            utxo.queue.txid,
-            queue_ref_utxo,
-            oracle_ref_utxo,
-            data_ref_utxo,
-        ]
-        script_sizes = query_ref_script_size(config['socket_path'], config["network"], script_inputs, cli_path)
-        tx_fee = calculate_min_fee(out_file_path, protocol_file_path, cli_path, script_sizes)
-        total_fee = calculate_total_fee(tx_fee, execution_units)
+        # only the script reference inputs hold reference scripts
+        script_sizes = utxo.reference.sale.script_size + utxo.reference.queue.script_size + utxo.reference.vault.script_size
+        tx_fee = fees.min_fee(tx.to_cbor(), script_sizes=script_sizes)
+        total_fee = calculate_total_fee(tx_fee, execution_units, fees)
 
         fee_value = Value({"lovelace": total_fee})
+        tx.set_execution_units(utxo.sale.txid, execution_units[get_index_in_order(ordered_list, utxo.sale.txid)])
+        tx.set_execution_units(utxo.queue.txid, execution_units[get_index_in_order(ordered_list, utxo.queue.txid)])
         sale_execution_units = convert_execution_unit(execution_units[get_index_in_order(ordered_list, utxo.sale.txid)])
         queue_execution_units = convert_execution_unit(execution_units[get_index_in_order(ordered_list, utxo.queue.txid)])
-        vault_execution_units = convert_execution_unit(execution_units[get_index_in_order(ordered_list, utxo.vault.txid)])
+        if usd_profit_margin != 0:
+            tx.set_execution_units(utxo.vault.txid, execution_units[get_index_in_order(ordered_list, utxo.vault.txid)])
+            vault_execution_units = convert_execution_unit(execution_units[get_index_in_order(ordered_list, utxo.vault.txid)])
 
         if logger is not None:
             logger.debug(f"script sizes: {script_sizes}")
@@ -297,65 +252,16 @@ class Endpoint:
 
         # At this point we should be able to rebuild the tx draft
         queue_out_value = copy.deepcopy(queue_value) - copy.deepcopy(total_cost_value) + copy.deepcopy(total_bundle_value) - copy.deepcopy(incentive_value) - copy.deepcopy(fee_value) - copy.deepcopy(profit_value)
-
-        func = [
-            cli_path, 'conway', "transaction", "build-raw",
-            "--protocol-params-file", protocol_file_path,
-            "--out-file", out_file_path,
-            "--tx-in-collateral", config['collat_utxo'],
-        ]
-        if is_oracle_required is True:
-            func += [
-                "--invalid-before", str(start_slot),
-                "--invalid-hereafter", str(end_slot),
-                "--read-only-tx-in-reference", oracle_ref_utxo,
-            ]
-        func += [
-            "--read-only-tx-in-reference", data_ref_utxo,
-            "--tx-in", utxo.batcher.txid,
-            "--tx-in", utxo.sale.txid,
-            "--spending-tx-in-reference", sale_ref_utxo,
-            "--spending-plutus-script-v3",
-            "--spending-reference-tx-in-inline-datum-present",
-            "--spending-reference-tx-in-execution-units", sale_execution_units,
-            "--spending-reference-tx-in-redeemer-file", sale_redeemer_file_path,
-            "--tx-in", utxo.queue.txid,
-            "--spending-tx-in-reference", queue_ref_utxo,
-            "--spending-plutus-script-v3",
-            "--spending-reference-tx-in-inline-datum-present",
-            "--spending-reference-tx-in-execution-units", queue_execution_units,
-            "--spending-reference-tx-in-redeemer-file", queue_redeemer_file_path,
-        ]
-        if usd_profit_margin != 0:
-            func += [
-                "--tx-in", utxo.vault.txid,
-                "--spending-tx-in-reference", vault_ref_utxo,
-                "--spending-plutus-script-v3",
-                "--spending-reference-tx-in-inline-datum-present",
-                "--spending-reference-tx-in-execution-units", vault_execution_units,
-                "--spending-reference-tx-in-redeemer-file", vault_redeemer_file_path,
-                "--tx-out", vault_out_value.to_output(config['vault_address']),
-                "--tx-out-inline-datum-file", vault_datum_file_path,
-            ]
-        func += [
-            "--tx-out", sale_out_value.to_output(config['sale_address']),
-            "--tx-out-inline-datum-file", sale_datum_file_path,
-            "--tx-out", queue_out_value.to_output(config['queue_address']),
-            "--tx-out-inline-datum-file", queue_datum_file_path,
-            "--tx-out", batcher_out_value.to_output(batcher_address),
-            "--required-signer-hash", batcher_pkh,
-            "--required-signer-hash", collat_pkh,
-            "--fee", str(total_fee)
-        ]
+        tx.set_output_value(queue_output, queue_out_value)
+        tx.fee = total_fee
 
         # this saves to out file
-        p = subprocess.Popen(func, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        _, _ = p.communicate()
+        tx.write(out_file_path)
 
         # should be good to go
         purchase_success_flag = True
 
-        intermediate_txid = txid(out_file_path, cli_path)
+        intermediate_txid = tx.txid()
 
         if usd_profit_margin != 0:
             utxo.vault.txid = intermediate_txid + "#0"
@@ -388,9 +294,6 @@ class Endpoint:
         # usd policy id
         usd_policy_id = "555344"
 
-        # the cardano cli path
-        cli_path = config['cli_path']
-
         #
         refund_success_flag = False
 
@@ -419,8 +322,7 @@ class Endpoint:
         out_file_path = os.path.join(parent_dir, "tmp/tx.draft")
 
         # queue refund redeemer
-        write(empty(1), "tmp/refund-redeemer.json")
-        queue_redeemer_file_path = os.path.join(parent_dir, "tmp/refund-redeemer.json")
+        refund_redeemer = empty(1)
 
         # datums for refund
         queue_datum = utxo.queue.datum
@@ -457,54 +359,31 @@ class Endpoint:
 
         # time units
         delta = 60
-        start_slot = query_slot_number(config['socket_path'], oracle_datum['fields'][0]['fields'][0]['map'][1]['v']['int'], config['network'], cli_path, delta)
-        end_slot = query_slot_number(config['socket_path'], oracle_datum['fields'][0]['fields'][0]['map'][2]['v']['int'], config['network'], cli_path, -delta)
-        latest_slot_number = get_latest_slot_number(config['socket_path'], 'tmp/tip.json', config['network'], cli_path)
+        start_slot, end_slot, latest_slot_number = Endpoint.validity_interval(utxo, config, delta)
 
         # will fail due to time validation logic
         if end_slot - latest_slot_number <= 0:
             logger.warning(f"Refund Oracle: {abs(end_slot - latest_slot_number) / 60:.2f} minutes late") if logger is not None else None
             return utxo, refund_success_flag
 
-        func = [
-            cli_path, 'conway', 'transaction', 'build-raw',
-            '--protocol-params-file', protocol_file_path,
-            '--out-file', out_file_path,
-            "--tx-in-collateral", config['collat_utxo'],
-        ]
+        fees = FeeEngine.load(protocol_file_path)
+        tx = TxBuilder(language_views(fees.cost_models['PlutusV3']))
+        tx.add_collateral(config['collat_utxo'])
         if is_oracle_required is True:
-            func += [
-                "--invalid-before", str(start_slot),
-                "--invalid-hereafter", str(end_slot),
-                '--read-only-tx-in-reference', oracle_ref_utxo,
-            ]
-        func += [
-            '--read-only-tx-in-reference', data_ref_utxo,
-            '--read-only-tx-in-reference', utxo.sale.txid,
-            "--tx-in", utxo.batcher.txid,
-            '--tx-in', utxo.queue.txid,
-            '--spending-tx-in-reference', queue_ref_utxo,
-            '--spending-plutus-script-v3',
-            '--spending-reference-tx-in-inline-datum-present',
-            '--spending-reference-tx-in-execution-units', queue_execution_units,
-            '--spending-reference-tx-in-redeemer-file', queue_redeemer_file_path,
-            "--tx-out", batcher_out_value.to_output(batcher_address),
-            '--tx-out', queue_out_value.to_output(owner_address),
-            '--required-signer-hash', batcher_pkh,
-            "--required-signer-hash", collat_pkh,
-            '--fee', str(fee)
-        ]
-
-        # this saves to out file
-        p = subprocess.Popen(func, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        _, errors = p.communicate()
-
-        logger.debug(f"Refund Build Errors: {errors}") if logger is not None else None
+            tx.set_validity(start_slot, end_slot)
+            tx.add_reference_input(oracle_ref_utxo)
+        tx.add_reference_input(data_ref_utxo)
+        tx.add_reference_input(utxo.sale.txid)
+        tx.add_input(utxo.batcher.txid)
+        tx.add_script_input(utxo.queue.txid, queue_ref_utxo, refund_redeemer)
+        tx.add_output(batcher_address, batcher_out_value)
+        tx.add_output(owner_address, queue_out_value)
+        tx.add_required_signer(batcher_pkh)
+        tx.add_required_signer(collat_pkh)
+        tx.fee = fee
 
-        if "Command failed" in errors.decode():
-            return utxo, refund_success_flag
         # At this point we should be able to simulate the tx draft
-        cborHex = get_cbor_from_file(out_file_path)
+        cborHex = tx.to_cbor().hex()
         if config['use_ogmios'] is True:
             execution_units = transaction_simulation_ogmios(cborHex, utxo, config)
         else:
@@ -517,20 +396,13 @@ class Endpoint:
         ordered_list = sort_lexicographically(utxo.queue.txid)
 
         # At this point we should be able to calculate the total fee
-        script_inputs = [
-            utxo.batcher.txid,
-            config['collat_utxo'],
-            oracle_ref_utxo,
-            data_ref_utxo,
-            utxo.sale.txid,
-            utxo.queue.txid,
-            queue_ref_utxo,
-        ]
-        script_sizes = query_ref_script_size(config['socket_path'], config["network"], script_inputs, cli_path)
-        tx_fee = calculate_min_fee(out_file_path, protocol_file_path, cli_path, script_sizes)
-        total_fee = calculate_total_fee(tx_fee, execution_units)
+        # only the queue script reference input holds a reference script
+        script_sizes = utxo.reference.queue.script_size
+        tx_fee = fees.min_fee(tx.to_cbor(), script_sizes=script_sizes)
+        total_fee = calculate_total_fee(tx_fee, execution_units, fees)
 
         fee_value = Value({"lovelace": total_fee})
+        tx.set_execution_units(utxo.queue.txid, execution_units[get_index_in_order(ordered_list, utxo.queue.txid)])
         queue_execution_units = convert_execution_unit(execution_units[get_index_in_order(ordered_list, utxo.queue.txid)])
 
         if logger is not None:
@@ -541,44 +413,16 @@ class Endpoint:
 
         # At this point we should be able to rebuild the tx draft
         queue_out_value = copy.deepcopy(queue_value) - copy.deepcopy(incentive_value) - copy.deepcopy(fee_value)
-
-        func = [
-            cli_path, 'conway', 'transaction', 'build-raw',
-            '--protocol-params-file', protocol_file_path,
-            '--out-file', out_file_path,
-            "--tx-in-collateral", config['collat_utxo'],
-        ]
-        if is_oracle_required is True:
-            func += [
-                "--invalid-before", str(start_slot),
-                "--invalid-hereafter", str(end_slot),
-                '--read-only-tx-in-reference', oracle_ref_utxo,
-            ]
-        func += [
-            '--read-only-tx-in-reference', data_ref_utxo,
-            '--read-only-tx-in-reference', utxo.sale.txid,
-            "--tx-in", utxo.batcher.txid,
-            '--tx-in', utxo.queue.txid,
-            '--spending-tx-in-reference', queue_ref_utxo,
-            '--spending-plutus-script-v3',
-            '--spending-reference-tx-in-inline-datum-present',
-            '--spending-reference-tx-in-execution-units', queue_execution_units,
-            '--spending-reference-tx-in-redeemer-file', queue_redeemer_file_path,
-            "--tx-out", batcher_out_value.to_output(batcher_address),
-            '--tx-out', queue_out_value.to_output(owner_address),
-            '--required-signer-hash', batcher_pkh,
-            "--required-signer-hash", collat_pkh,
-            '--fee', str(total_fee)
-        ]
+        tx.set_output_value(1, queue_out_value)
+        tx.fee = total_fee
 
         # this saves to out file
-        p = subprocess.Popen(func, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        _, _ = p.communicate()
+        tx.write(out_file_path)
 
         # everything should be good to go
         refund_success_flag = True
 
-        intermediate_txid = txid(out_file_path, cli_path)
+        intermediate_txid = tx.txid()
 
         utxo.batcher.txid = intermediate_txid + "#0"
         utxo.batcher.value = batcher_out_value
@@ -599,9 +443,6 @@ class Endpoint:
         """
         profit_success_flag = False
 
-        # the cardano cli path
-        cli_path = config['cli_path']
-
         # empty batcher utxos list
         if len(batcher_infos) == 0:
             return None, profit_success_flag
@@ -630,7 +471,7 @@ class Endpoint:
         total_batcher_value = Value({})
 
         # there will be many batcher utxos to spend
-        tx_in_list = []
+        tx = TxBuilder()
         returning_batcher_info = None
         found_batcher_policy = False
         found_batcher_profit = False
@@ -657,8 +498,7 @@ class Endpoint:
 
             # sum all the values together
             total_batcher_value += copy.deepcopy(batcher_info['value'])
-            tx_in_list.append("--tx-in")
-            tx_in_list.append(batcher_info['txid'])
+            tx.add_input(batcher_info['txid'])
 
         # if the policy was never found then return
         if found_batcher_policy is False:
@@ -672,51 +512,28 @@ class Endpoint:
         batcher_out_value = Value({"lovelace": 5000000, config["batcher_policy"]: {batcher_tkn: 1}})
         batcher_profit_value = copy.deepcopy(total_batcher_value) - copy.deepcopy(batcher_out_value) - copy.deepcopy(fee_value)
 
-        func = [
-            cli_path, 'conway', 'transaction', 'build-raw',
-            '--protocol-params-file', protocol_file_path,
-            '--out-file', out_file_path,
-        ]
-        func += tx_in_list
-        func += [
-            "--tx-out", batcher_out_value.to_output(batcher_address),
-            "--tx-out", batcher_profit_value.to_output(config['profit_address']),
-            '--required-signer-hash', batcher_pkh,
-            '--fee', str(fee)
-        ]
-
-        # this saves to out file
-        p = subprocess.Popen(func, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        p.communicate()
+        tx.add_output(batcher_address, batcher_out_value)
+        tx.add_output(config['profit_address'], batcher_profit_value)
+        tx.add_required_signer(batcher_pkh)
+        tx.fee = fee
 
         # lets estimate the fee here
-        tx_fee = calculate_min_fee(out_file_path, protocol_file_path, cli_path)
+        tx_fee = FeeEngine.load(protocol_file_path).min_fee(tx.to_cbor())
         fee_value = Value({"lovelace": tx_fee})
 
         batcher_profit_value = copy.deepcopy(total_batcher_value) - copy.deepcopy(batcher_out_value) - copy.deepcopy(fee_value)
 
         # rebuild the tx with the correct fee
-        func = [
-            cli_path, 'conway', 'transaction', 'build-raw',
-            '--protocol-params-file', protocol_file_path,
-            '--out-file', out_file_path,
-        ]
-        func += tx_in_list
-        func += [
-            "--tx-out", batcher_out_value.to_output(batcher_address),
-            "--tx-out", batcher_profit_value.to_output(config['profit_address']),
-            '--required-signer-hash', batcher_pkh,
-            '--fee', str(tx_fee)
-        ]
+        tx.set_output_value(1, batcher_profit_value)
+        tx.fee = tx_fee
 
         # this saves to out file
-        p = subprocess.Popen(func, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        p.communicate()
+        tx.write(out_file_path)
 
         # check output / errors, if all good assume true here
         profit_success_flag = True
 
-        intermediate_txid = txid(out_file_path, cli_path)
+        intermediate_txid = tx.txid()
         tag = sha3_256(intermediate_txid + "#0")
         returning_batcher_info['tag'] = tag
         returning_batcher_info['txid'] = intermediate_txid + "#0"
@@ -0,0 +1,198 @@
+import json
+import math
+import os
+from fractions import Fraction
+
+import cbor2
+
+from src.cbor import item_end, read_head
+
+# a vkey witness is [vkey, signature], a 32 byte key and a 64 byte signature
+VKEY_WITNESS_SIZE = 1 + (2 + 32) + (2 + 64)
+# from the conway era on the vkey witnesses are a set, tag 258
+SET_TAG_SIZE = 3
+# every 25600 bytes of reference scripts cost 1.2 times more per byte
+REF_SCRIPT_SIZE_INCREMENT = 25600
+REF_SCRIPT_MULTIPLIER = Fraction(6, 5)
+
+# protocol file path -> (modified time, engine)
+_engines = {}
+
+
+def _head_size(argument: int) -> int:
+    """The size of a cbor header holding the argument."""
+    if argument < 24:
+        return 1
+    if argument < 0x100:
+        return 2
+    if argument < 0x10000:
+        return 3
+    if argument < 0x100000000:
+        return 5
+    return 9
+
+
+def _exact(number: float | int) -> Fraction:
+    """The protocol parameters are exact decimals written as json numbers."""
+    return Fraction(str(number))
+
+
+class FeeEngine:
+    """
+    The minimum fee of a transaction from the protocol parameters, the same
+    number cardano-cli transaction calculate-min-fee gives for a draft.
+
+    The size fee is charged for the transaction with the dummy vkey
+    witnesses added and the fee field holding the fee itself. Like the
+    ledger, the size does not count the is valid flag. The execution units
+    in the redeemers are priced together and rounded up, and the reference
+    scripts are priced in tiers.
+    """
+
+    def __init__(self, params: dict) -> None:
+        self.fee_per_byte = params['txFeePerByte']
+        self.fee_fixed = params['txFeeFixed']
+        prices = params['executionUnitPrices']
+        self.price_memory = _exact(prices['priceMemory'])
+        self.price_steps = _exact(prices['priceSteps'])
+        self.ref_script_cost_per_byte = _exact(params.get('minFeeRefScriptCostPerByte') or 0)
+        # the script integrity hash of a built transaction needs these
+        self.cost_models = params.get('costModels', {})
+
+    @classmethod
+    def load(cls, file_path: str) -> 'FeeEngine':
+        """
+        The engine for a protocol parameters file, read again only when the
+        file changes.
+
+        Args:
+            file_path (str): The path to the protocol parameters json
+
+        Returns:
+            FeeEngine: The fee engine for the parameters
+        """
+        modified = os.path.getmtime(file_path)
+        cached = _engines.get(file_path)
+        if cached is None or cached[0] != modified:
+            with open(file_path, 'r') as file:
+                cached = _engines[file_path] = (modified, cls(json.load(file)))
+        return cached[1]
+
+    def size_fee(self, size: int) -> int:
+        """
+        The linear fee for a transaction of size bytes.
+        """
+        return self.fee_per_byte * size + self.fee_fixed
+
+    def execution_fee(self, execution_units: list[dict[str, int]]) -> int:
+        """
+        The fee for the execution units of every script in a transaction.
+
+        Args:
+            execution_units (list[dict[str, int]]): The units, as dicts with cpu and mem
+
+        Returns:
+            int: The fee for the total units, rounded up
+        """
+        memory = sum(unit['mem'] for unit in execution_units if unit)
+        steps = sum(unit['cpu'] for unit in execution_units if unit)
+        return math.ceil(memory * self.price_memory + steps * self.price_steps)
+
+    def reference_script_fee(self, size: int) -> int:
+        """
+        The fee for size bytes of reference scripts, priced in tiers.
+
+        Args:
+            size (int): The total size of the reference scripts the transaction uses
+
+        Returns:
+            int: The reference script fee, rounded down
+        """
+        fee = Fraction(0)
+        price = self.ref_script_cost_per_byte
+        while size >= REF_SCRIPT_SIZE_INCREMENT:
+            fee += REF_SCRIPT_SIZE_INCREMENT * price
+            price *= REF_SCRIPT_MULTIPLIER
+            size -= REF_SCRIPT_SIZE_INCREMENT
+        return math.floor(fee + size * price)
+
+    def min_fee(self, tx: bytes, witness_count: int = 3, script_sizes: int = 0, conway: bool = True) -> int:
+        """
+        The minimum fee of an unwitnessed transaction.
+
+        Args:
+            tx (bytes): The cbor of the transaction, [body, witnesses, valid, data]
+            witness_count (int | optional): The number of vkey witnesses it will have
+            script_sizes (int | optional): The size of the reference scripts it uses
+            conway (bool | optional): If the transaction is a conway era one
+
+        Returns:
+            int: The minimum fee in lovelace
+        """
+        _, length, body_start = read_head(tx, 0)
+        body_end = item_end(tx, body_start)
+        witness_end = item_end(tx, body_end)
+
+        # the fee field is the only body field that changes
+        _, pairs, offset = read_head(tx, body_start)
+        fee_size = None
+        for _ in range(pairs):
+            _, key, value_start = read_head(tx, offset)
+            offset = item_end(tx, value_start)
+            if key == 2:
+                fee_size = offset - value_start
+        if fee_size is None:
+            raise ValueError("the transaction body has no fee")
+
+        witnesses = cbor2.loads(tx[body_end:witness_end])
+        if 0 in witnesses:
+            raise ValueError("the transaction already has vkey witnesses")
+
+        # the size is computed without the is valid flag
+        size = len(tx) - fee_size - (1 if length == 4 else 0)
+        if witness_count > 0:
+            size += _head_size(len(witnesses) + 1) - _head_size(len(witnesses))
+            size += 1 + (SET_TAG_SIZE if conway else 0) + _head_size(witness_count) + witness_count * VKEY_WITNESS_SIZE
+
+        fee = self.execution_fee(self.redeemer_units(witnesses.get(5)))
+        if script_sizes > 0:
+            fee += self.reference_script_fee(script_sizes)
+
+        # the fee field holds the fee, so it must be sized for its own value
+        min_fee = 0
+        while True:
+            next_fee = fee + self.size_fee(size + _head_size(min_fee))
+            if next_fee == min_fee:
+                return min_fee
+            min_fee = next_fee
+
+    def min_fee_from_file(self, tx_body_file: str, witness_count: int = 3, script_sizes: int = 0) -> int:
+        """
+        The minimum fee of a transaction draft file.
+
+        Args:
+            tx_body_file (str): The path to the draft from transaction build-raw
+            witness_count (int | optional): The number of vkey witnesses it will have
+            script_sizes (int | optional): The size of the reference scripts it uses
+
+        Returns:
+            int: The minimum fee in lovelace
+        """
+        with open(tx_body_file, 'r') as file:
+            envelope = json.load(file)
+        tx = bytes.fromhex(envelope['cborHex'])
+        return self.min_fee(tx, witness_count, script_sizes, conway='ConwayEra' in envelope.get('type', 'ConwayEra'))
+
+    @staticmethod
+    def redeemer_units(redeemers) -> list[dict[str, int]]:
+        """
+        The execution units of the redeemers in a witness set, in either the
+        list or the map form.
+        """
+        if not redeemers:
+            return []
+        if isinstance(redeemers, dict):
+            units = [value[1] for value in redeemers.values()]
+        else:
+            units = [redeemer[3] for redeemer in redeemers]
+        return [{'mem': mem, 'cpu': steps} for mem, steps in units]
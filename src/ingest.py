@@ -0,0 +1,196 @@
+import sqlite3
+
+from loguru._logger import Logger
+
+from src import codec
+from src.db_manager import DbManager
+from src.io_manager import IOManager
+
+
+class Ingest:
+    """
+    Stage the oura events for a block in memory and apply the whole block as
+    one unit of work. The UTxO tables and the sync status are written inside
+    a single transaction at the block boundary, so the status can never point
+    past a block that was only partially applied.
+    """
+
+    def __init__(self, db: DbManager, config: dict, logger: Logger) -> None:
+        self.db = db
+        self.config = config
+        self.logger = logger
+        self.io = IOManager(config)
+        # the staged tx inputs and outputs for the current block
+        self.events = []
+        # (block number, block hash, slot) of the current block
+        self.block = None
+
+    def push(self, data: dict) -> int | None:
+        """
+        Stage a single oura event. The staged block is committed when the
+        BlockEnd event arrives or when an event from a new block shows up.
+
+        Args:
+            data (dict): The oura event
+
+        Returns:
+            int | None: The block number that was committed, if any.
+        """
+        variant = data.get('variant')
+        context = data.get('context') or {}
+        block_number = context.get('block_number')
+        block_hash = context.get('block_hash')
+        block_slot = context.get('slot')
+
+        committed = None
+
+        # a new block number means the staged block is complete
+        if self.block is not None and block_number is not None and block_number != self.block[0]:
+            committed = self.commit()
+
+        if block_number is not None and block_hash is not None and block_slot is not None:
+            self.block = (block_number, block_hash, block_slot)
+
+        # if a rollback occurs we need to handle it somehow
+        if variant == 'RollBack':
+            # how do we handle it?
+            self.logger.critical(f"ROLLBACK: {block_number}")
+            # the live utxos may have changed
+            self.db.utxo_cache.clear()
+
+        if variant in ('TxInput', 'TxOutput'):
+            self.events.append(data)
+
+        if variant == 'BlockEnd':
+            committed = self.commit()
+
+        return committed
+
+    def feed(self, events: list) -> list:
+        """
+        Stage a batch of oura events. Every block the batch completes is
+        committed inside one outer transaction, so the whole batch is applied
+        or none of it is.
+
+        Args:
+            events (list): The oura events in chain order
+
+        Returns:
+            list: The block numbers that were committed, in order.
+        """
+        committed = []
+        try:
+            with self.db.transaction():
+                for data in events:
+                    block_number = self.push(data)
+                    if block_number is not None:
+                        committed.append(block_number)
+        except BaseException:
+            # the batch is sent again as a whole so drop what was staged
+            self.reset()
+            self.db.load_tracked()
+            self.db.load_order_book()
+            # the outputs and spends of the rolled back events were cached
+            self.db.utxo_cache.clear()
+            raise
+        return committed
+
+    def commit(self) -> int | None:
+        """
+        Apply all the staged events and the status update in one transaction.
+
+        Returns:
+            int | None: The block number that was committed, if any.
+        """
+        # nothing can be committed without knowing the block
+        if self.block is None:
+            return None
+
+        block_number, block_hash, block_slot = self.block
+        try:
+            with self.db.transaction():
+                for data in self.events:
+                    self.apply(data)
+                self.db.status.update(block_number, block_hash, block_slot)
+        except BaseException:
+            # the in memory outrefs must match what is really in the db
+            self.db.load_tracked()
+            self.db.load_order_book()
+            # the outputs and spends of the rolled back events were cached
+            self.db.utxo_cache.clear()
+            raise
+
+        self.reset()
+        return block_number
+
+    def reset(self) -> None:
+        """
+        Drop the staged block, its events are sent again.
+        """
+        self.events = []
+        self.block = None
+
+    def apply(self, data: dict) -> None:
+        """
+        Apply a tx input or tx output to the db.
+
+        Args:
+            data (dict): The oura event
+        """
+        # try to sync inputs and outputs
+        try:
+            # tx inputs
+            if data['variant'] == 'TxInput':
+                self.io.handle_input(self.db, data, self.logger)
+
+            # tx outputs
+            if data['variant'] == 'TxOutput':
+                self.io.handle_output(self.db, data, self.logger)
+
+        # a db failure must abort the whole block
+        except sqlite3.Error:
+            raise
+
+        # not the right form so pass it
+        except Exception:
+            pass
+
+
+def is_event(data) -> bool:
+    """
+    Check that parsed json has the shape of an oura event, so a body the
+    writer cannot stage is refused before it is queued.
+
+    Args:
+        data: The parsed json
+
+    Returns:
+        bool: True if the data is an event object.
+    """
+    if not isinstance(data, dict):
+        return False
+    context = data.get('context')
+    variant = data.get('variant')
+    return (context is None or isinstance(context, dict)) and (variant is None or isinstance(variant, str))
+
+
+def load_events(body: str | bytes) -> list:
+    """
+    Parse a batch of oura events. The body is either a json array of events,
+    a single json event, or newline delimited json with one event per line.
+
+    Args:
+        body (str | bytes): The raw request body
+
+    Returns:
+        list: The oura events.
+    """
+    body = body.strip()
+    if not body:
+        return []
+    try:
+        events = codec.loads(body)
+    except ValueError:
+        # newline delimited json, blank lines are ignored
+        return [codec.loads(line) for line in body.splitlines() if line.strip()]
+    return events if isinstance(events, list) else [events]
@@ -1,11 +1,32 @@
 from loguru._logger import Logger
 
+from src.datums import datum_field, oracle_projection, queue_order_projection
 from src.db_manager import DbManager
 from src.parse import asset_list_to_value
+from src.slot import SlotConverter
 from src.utility import sha3_256
+from src.value import Value
 
 
 class IOManager:
+    def __init__(self, config: dict) -> None:
+        self.config = config
+        # address -> output handlers, built once so an output costs one lookup
+        self.handlers = {}
+        for key, handler in (
+            ('batcher_address', self.batcher_output),
+            ('sale_address', self.sale_output),
+            ('queue_address', self.queue_output),
+            ('vault_address', self.vault_output),
+            ('oracle_address', self.oracle_output),
+            ('data_address', self.data_output),
+        ):
+            address = config[key]
+            self.handlers[address] = self.handlers.get(address, ()) + (handler,)
+        # the oracle times are stored as slots when the network is a known one
+        network = config.get('network')
+        self.slots = SlotConverter.for_network(network) if network is not None else None
+
     ###########################################################################
     # Inputs
     ###########################################################################
@@ -14,104 +35,153 @@ class IOManager:
         # the tx hash of this transaction
         input_utxo = data['tx_input']['tx_id'] + '#' + str(data['tx_input']['index'])
 
+        # a spent outref can not be live anymore
+        db.utxo_cache.spend(input_utxo)
+
+        # almost every input on chain is not tracked so skip it right away
+        if input_utxo not in db.tracked:
+            return
+
         # sha3_256 hash of the input utxo
         utxo_base_64 = sha3_256(input_utxo)
 
         # attempt to delete from the dbs
         if db.batcher.delete(utxo_base_64):
+            db.round_state.touch_all()
             logger.success(f"Spent Batcher Input @ {input_utxo} @ Timestamp {data['context']['timestamp']}")
 
         if db.sale.delete(input_utxo):
+            tkn = db.order_book.remove_sale(input_utxo)
+            if tkn is not None:
+                db.round_state.touch(tkn)
             logger.success(f"Spent Sale Input @ {input_utxo} @ Timestamp {data['context']['timestamp']}")
 
         if db.queue.delete(utxo_base_64):
+            # only the orders in the book can be aggregated
+            tkn = db.order_book.sale(utxo_base_64)
+            if tkn is not None:
+                db.order_book.remove(utxo_base_64)
+                db.round_state.touch(tkn)
             logger.success(f"Spent Queue Input: {input_utxo} @ Timestamp {data['context']['timestamp']}")
 
         if db.vault.delete(utxo_base_64):
+            db.round_state.touch_all()
             logger.success(f"Spent Vault Input: {input_utxo} @ Timestamp {data['context']['timestamp']}")
 
+        # it is spent so it can never show up again
+        db.tracked.discard(input_utxo)
+
     ###########################################################################
     # Outputs
     ###########################################################################
 
-    @staticmethod
-    def handle_output(db: DbManager, config: dict, data: dict, logger: Logger) -> None:
-        context = data['context']
-        # timestamp for ordering, equal timestamps use the tx_idx to order
-        timestamp = context['timestamp']
-        tx_idx = context['tx_idx']
-
-        output_utxo = context['tx_hash'] + '#' + str(context['output_idx'])
-        utxo_base_64 = sha3_256(output_utxo)
-
-        # check if its the batcher
-        if data['tx_output']['address'] == config['batcher_address']:
-            value_obj = asset_list_to_value(data['tx_output']['assets'])
-            value_obj.add_lovelace(data['tx_output']['amount'])
-
-            db.batcher.create(utxo_base_64, output_utxo, value_obj)
-            logger.success(f"Batcher Output @ {output_utxo} @ Timestamp: {context['timestamp']}")
-
-        # check if its the sale contract
-        if data['tx_output']['address'] == config['sale_address']:
-            # get the datum
-            sale_datum = data['tx_output']['inline_datum']['plutus_data'] if data['tx_output']['inline_datum'] is not None else {}
-
-            value_obj = asset_list_to_value(data['tx_output']['assets'])
-            value_obj.add_lovelace(data['tx_output']['amount'])
-
-            # only create a sale if the sale has the pointer token
-            if value_obj.exists(config['pointer_policy']):
-                # get the token name from the pointer policy
-                tkn = value_obj.get_token(config['pointer_policy'])
-                db.sale.create(tkn, output_utxo, sale_datum, value_obj)
-                logger.success(f"Sale Output @ {output_utxo} @ Timestamp: {context['timestamp']}")
+    def handle_output(self, db: DbManager, data: dict, logger: Logger) -> None:
+        # almost every output on chain is not ours so skip it right away
+        handlers = self.handlers.get(data['tx_output']['address'])
+        if handlers is None:
+            return
 
-        # check if its the queue contract
-        if data['tx_output']['address'] == config['queue_address']:
-            # get the queue datum
-            queue_datum = data['tx_output']['inline_datum']['plutus_data'] if data['tx_output']['inline_datum'] is not None else {}
+        # an output to one of our addresses is live until it is spent
+        db.utxo_cache.confirm(self.outref(data))
 
-            # get the pointer token
-            pointer_token = queue_datum['fields'][3]['bytes']
+        # the value is shared by every handler for this address
+        value_obj = asset_list_to_value(data['tx_output']['assets'])
+        value_obj.add_lovelace(data['tx_output']['amount'])
 
-            value_obj = asset_list_to_value(data['tx_output']['assets'])
-            value_obj.add_lovelace(data['tx_output']['amount'])
+        for handler in handlers:
+            handler(db, data, value_obj, logger)
 
-            db.queue.create(utxo_base_64, output_utxo, pointer_token, queue_datum, value_obj, timestamp, tx_idx)
-            logger.success(f"Queue Output @ {output_utxo} @ Timestamp: {timestamp}")
-
-        # check if its the vault contract
-        if data['tx_output']['address'] == config['vault_address']:
-            # get the queue datum
-            vault_datum = data['tx_output']['inline_datum']['plutus_data'] if data['tx_output']['inline_datum'] is not None else {}
-
-            pkh = vault_datum['fields'][0]['bytes']
-
-            value_obj = asset_list_to_value(data['tx_output']['assets'])
-            value_obj.add_lovelace(data['tx_output']['amount'])
-
-            db.vault.create(utxo_base_64, output_utxo, pkh, vault_datum, value_obj)
-            logger.success(f"Vault Output @ {output_utxo} @ Timestamp: {timestamp}")
-
-        # check if its the oracle contract
-        if data['tx_output']['address'] == config['oracle_address']:
-            oracle_datum = data['tx_output']['inline_datum']['plutus_data'] if data['tx_output']['inline_datum'] is not None else {}
-
-            value_obj = asset_list_to_value(data['tx_output']['assets'])
-            value_obj.add_lovelace(data['tx_output']['amount'])
-
-            if value_obj.get_quantity(config['oracle_policy'], config['oracle_asset']) == 1:
-                db.oracle.update(output_utxo, oracle_datum, value_obj)
-                logger.success(f"Oracle Output @ {output_utxo} @ Timestamp: {timestamp}")
-
-        # check if its the data contract
-        if data['tx_output']['address'] == config['data_address']:
-            data_datum = data['tx_output']['inline_datum']['plutus_data'] if data['tx_output']['inline_datum'] is not None else {}
+    @staticmethod
+    def datum(data: dict) -> dict:
+        inline_datum = data['tx_output']['inline_datum']
+        return inline_datum['plutus_data'] if inline_datum is not None else {}
 
-            value_obj = asset_list_to_value(data['tx_output']['assets'])
-            value_obj.add_lovelace(data['tx_output']['amount'])
+    @staticmethod
+    def outref(data: dict) -> str:
+        return data['context']['tx_hash'] + '#' + str(data['context']['output_idx'])
+
+    def batcher_output(self, db: DbManager, data: dict, value_obj: Value, logger: Logger) -> None:
+        output_utxo = self.outref(data)
+
+        db.batcher.create(sha3_256(output_utxo), output_utxo, value_obj)
+        db.round_state.touch_all()
+        db.tracked.add(output_utxo)
+        logger.success(f"Batcher Output @ {output_utxo} @ Timestamp: {data['context']['timestamp']}")
+
+    def sale_output(self, db: DbManager, data: dict, value_obj: Value, logger: Logger) -> None:
+        output_utxo = self.outref(data)
+        sale_datum = self.datum(data)
+
+        # only create a sale if the sale has the pointer token
+        if value_obj.exists(self.config['pointer_policy']):
+            # get the token name from the pointer policy
+            tkn = value_obj.get_token(self.config['pointer_policy'])
+            db.sale.create(tkn, output_utxo, sale_datum, value_obj)
+            db.order_book.add_sale(tkn, output_utxo)
+            db.round_state.touch(tkn)
+            db.tracked.add(output_utxo)
+            logger.success(f"Sale Output @ {output_utxo} @ Timestamp: {data['context']['timestamp']}")
+
+    def queue_output(self, db: DbManager, data: dict, value_obj: Value, logger: Logger) -> None:
+        context = data['context']
+        # timestamp for ordering, equal timestamps use the tx_idx to order
+        timestamp = context['timestamp']
+        tx_idx = context['tx_idx']
 
-            if value_obj.get_quantity(config['data_policy'], config['data_asset']) == 1:
-                db.data.update(output_utxo, data_datum, value_obj)
-                logger.success(f"Data Output @ {output_utxo} @ Timestamp: {timestamp}")
+        output_utxo = self.outref(data)
+        queue_datum = self.datum(data)
+
+        # get the pointer token
+        pointer_token = queue_datum['fields'][3]['bytes']
+
+        tag = sha3_256(output_utxo)
+        db.queue.create(tag, output_utxo, pointer_token, queue_datum, value_obj, timestamp, tx_idx)
+
+        # only valid orders are sorted, a replaced entry leaves the book
+        _, valid, priority = queue_order_projection(queue_datum)
+        if valid:
+            incentive = datum_field(queue_datum, 'fields', 2, 'fields', 2, 'int')
+            db.order_book.add(pointer_token, tag, timestamp, tx_idx, incentive, priority)
+        else:
+            db.order_book.remove(tag)
+        db.round_state.touch(pointer_token)
+        db.tracked.add(output_utxo)
+        logger.success(f"Queue Output @ {output_utxo} @ Timestamp: {timestamp}")
+
+    def vault_output(self, db: DbManager, data: dict, value_obj: Value, logger: Logger) -> None:
+        output_utxo = self.outref(data)
+        vault_datum = self.datum(data)
+
+        pkh = vault_datum['fields'][0]['bytes']
+
+        db.vault.create(sha3_256(output_utxo), output_utxo, pkh, vault_datum, value_obj)
+        db.round_state.touch_all()
+        db.tracked.add(output_utxo)
+        logger.success(f"Vault Output @ {output_utxo} @ Timestamp: {data['context']['timestamp']}")
+
+    def oracle_output(self, db: DbManager, data: dict, value_obj: Value, logger: Logger) -> None:
+        output_utxo = self.outref(data)
+        oracle_datum = self.datum(data)
+
+        if value_obj.get_quantity(self.config['oracle_policy'], self.config['oracle_asset']) == 1:
+            db.oracle.update(output_utxo, oracle_datum, value_obj, self.oracle_slots(oracle_datum))
+            db.round_state.touch_all()
+            logger.success(f"Oracle Output @ {output_utxo} @ Timestamp: {data['context']['timestamp']}")
+
+    def oracle_slots(self, oracle_datum: dict) -> tuple:
+        """
+        The start and end slots of the oracle times, None when either is unknown.
+        """
+        _, start_time, end_time = oracle_projection(oracle_datum)
+        if self.slots is None or start_time is None or end_time is None:
+            return None, None
+        return self.slots.slot(start_time), self.slots.slot(end_time)
+
+    def data_output(self, db: DbManager, data: dict, value_obj: Value, logger: Logger) -> None:
+        output_utxo = self.outref(data)
+        data_datum = self.datum(data)
+
+        if value_obj.get_quantity(self.config['data_policy'], self.config['data_asset']) == 1:
+            db.data.update(output_utxo, data_datum, value_obj)
+            db.round_state.touch_all()
+            logger.success(f"Data Output @ {output_utxo} @ Timestamp: {data['context']['timestamp']}")
@@ -0,0 +1,164 @@
+import socket as sockets
+
+import cbor2
+
+from src.cbor import item_end, txid_from_cbor
+from src.cli import does_tx_exists_in_mempool
+from src.slot import network_magic
+
+# node to client handshake and local tx monitor mini protocol numbers
+HANDSHAKE = 0
+LOCAL_TX_MONITOR = 9
+
+# node to client versions 16 to 19, the high bit marks node to client
+VERSIONS = [32784, 32785, 32786, 32787]
+
+
+class TxMonitor:
+    """
+    A minimal node to client local tx monitor client over the node socket.
+    Every message is a cbor item sent in a multiplexer segment with an
+    eight byte header: a timestamp, the mini protocol number with the high
+    bit set by the responder, and the payload length.
+    """
+
+    def __init__(self, socket_path: str, magic: int, timeout: float = 5.0) -> None:
+        self.conn = sockets.socket(sockets.AF_UNIX, sockets.SOCK_STREAM)
+        self.conn.settimeout(timeout)
+        self.conn.connect(socket_path)
+        # the bytes read for each mini protocol that are not a full message yet
+        self.buffers = {}
+        try:
+            self.handshake(magic)
+        except BaseException:
+            self.conn.close()
+            raise
+
+    def close(self) -> None:
+        try:
+            self.send(LOCAL_TX_MONITOR, [0])
+        finally:
+            self.conn.close()
+
+    def send(self, protocol: int, message: list) -> None:
+        payload = cbor2.dumps(message)
+        header = (0).to_bytes(4, 'big') + protocol.to_bytes(2, 'big') + len(payload).to_bytes(2, 'big')
+        self.conn.sendall(header + payload)
+
+    def read(self, size: int) -> bytes:
+        data = b''
+        while len(data) < size:
+            chunk = self.conn.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("node closed the socket")
+            data += chunk
+        return data
+
+    def receive(self, protocol: int) -> list:
+        buffer = self.buffers.get(protocol, b'')
+        while True:
+            # a message may span many segments
+            if buffer:
+                try:
+                    end = item_end(buffer)
+                except IndexError:
+                    pass
+                else:
+                    self.buffers[protocol] = buffer[end:]
+                    return cbor2.loads(buffer[:end])
+            header = self.read(8)
+            number = int.from_bytes(header[4:6], 'big') & 0x7fff
+            payload = self.read(int.from_bytes(header[6:8], 'big'))
+            if number == protocol:
+                buffer += payload
+            else:
+                self.buffers[number] = self.buffers.get(number, b'') + payload
+
+    def handshake(self, magic: int) -> None:
+        self.send(HANDSHAKE, [0, {version: [magic, False] for version in VERSIONS}])
+        reply = self.receive(HANDSHAKE)
+        if reply[0] != 1:
+            raise ConnectionError(f"node refused the handshake: {reply}")
+
+    def txids(self) -> set[str]:
+        """
+        Acquire a snapshot of the mempool and walk every transaction in it.
+
+        Returns:
+            set[str]: The ids of the transactions in the mempool
+        """
+        self.send(LOCAL_TX_MONITOR, [1])
+        self.receive(LOCAL_TX_MONITOR)
+        txids = set()
+        while True:
+            self.send(LOCAL_TX_MONITOR, [5])
+            reply = self.receive(LOCAL_TX_MONITOR)
+            # the end of the snapshot
+            if len(reply) < 2:
+                break
+            # [era, #6.24(tx bytes)]
+            tx = reply[1][1]
+            txids.add(txid_from_cbor(tx.value if isinstance(tx, cbor2.CBORTag) else tx))
+        self.send(LOCAL_TX_MONITOR, [3])
+        return txids
+
+
+class MempoolView:
+    """
+    The transactions in the node mempool, read once per aggregation round.
+
+    The snapshot is taken with one local tx monitor session the first time
+    it is needed, so every check in the round is a set lookup. The
+    transactions the batcher submits are added as they are submitted. If
+    the node socket can not be used the view falls back to asking the cli
+    about each transaction, once per round.
+    """
+
+    def __init__(self, config: dict, file_path: str) -> None:
+        self.config = config
+        self.file_path = file_path
+        self.txids = set()
+        # a round that builds nothing never reads the mempool
+        self.taken = False
+        # if the set holds the whole mempool or only the known answers
+        self.complete = False
+        # transaction id -> the cli answer for this round
+        self.answers = {}
+
+    def refresh(self) -> None:
+        """
+        Take a new snapshot of the mempool.
+        """
+        self.taken = True
+        self.answers = {}
+        try:
+            monitor = TxMonitor(self.config["socket_path"], network_magic(self.config["network"]))
+            try:
+                self.txids = monitor.txids()
+            finally:
+                monitor.close()
+            self.complete = True
+        except (OSError, ValueError, IndexError, cbor2.CBORError):
+            self.txids = set()
+            self.complete = False
+
+    def contains(self, tx_id: str) -> bool:
+        """
+        If a transaction is in the mempool.
+        """
+        if self.taken is False:
+            self.refresh()
+        if tx_id in self.txids:
+            return True
+        if self.complete:
+            return False
+        exists = self.answers.get(tx_id)
+        if exists is None:
+            exists = self.answers[tx_id] = does_tx_exists_in_mempool(self.config["socket_path"], tx_id, self.file_path, self.config["network"], self.config["cli_path"])
+        return exists
+
+    def add(self, tx_id: str) -> None:
+        """
+        A transaction was submitted to the mempool.
+        """
+        self.txids.add(tx_id)
@@ -0,0 +1,161 @@
+import threading
+from bisect import bisect_left
+
+
+class OrderBook:
+    """
+    The valid orders of every sale kept in fifo order in memory. Orders are
+    added and removed as the queue outputs are created and spent, so the
+    order book is never sorted again from scratch. Each sale keeps its order
+    keys in a sorted list, an order is placed or found with a binary search.
+
+    An order key is (priority, -incentive, timestamp, tx idx, tag), the same
+    order as the queue order index in the db.
+    """
+
+    def __init__(self) -> None:
+        # the ingest path writes while the aggregation worker reads
+        self.lock = threading.Lock()
+        # sale tkn -> sale txid and back, a sale is deleted by its txid
+        self.sales = {}
+        self.sale_txids = {}
+        # sale tkn -> sorted order keys and the orders in the same positions
+        self.keys = {}
+        self.orders = {}
+        # order tag -> (sale tkn, order key)
+        self.tags = {}
+        # sale tkn -> the order list handed out by the last snapshot
+        self.copies = {}
+
+    def __len__(self) -> int:
+        return len(self.tags)
+
+    def load(self, rows: list, sales: list) -> None:
+        """
+        Replace the order book with what is in the db.
+
+        Args:
+            rows (list): (sale tkn, tag, timestamp, tx idx, incentive, priority) rows in fifo order
+            sales (list): (sale tkn, sale txid) rows
+        """
+        keys = {}
+        orders = {}
+        tags = {}
+        for tkn, tag, timestamp, tx_idx, incentive, priority in rows:
+            # a sale without valid orders
+            if tag is None:
+                continue
+            key = (priority, -incentive, timestamp, tx_idx, tag)
+            keys.setdefault(tkn, []).append(key)
+            orders.setdefault(tkn, []).append((tag, timestamp, tx_idx, incentive, priority))
+            tags[tag] = (tkn, key)
+
+        # the rows are already in order but the db may order equal keys differently
+        for tkn in keys:
+            if keys[tkn] != sorted(keys[tkn]):
+                pairs = sorted(zip(keys[tkn], orders[tkn]))
+                keys[tkn] = [pair[0] for pair in pairs]
+                orders[tkn] = [pair[1] for pair in pairs]
+
+        with self.lock:
+            self.sales = dict(sales)
+            self.sale_txids = {txid: tkn for tkn, txid in sales}
+            self.keys = keys
+            self.orders = orders
+            self.tags = tags
+            self.copies = {}
+
+    def add_sale(self, tkn: str, txid: str) -> None:
+        """
+        A sale output was created, it replaces any older sale for the tkn.
+        """
+        with self.lock:
+            old = self.sales.get(tkn)
+            if old is not None:
+                self.sale_txids.pop(old, None)
+            self.sales[tkn] = txid
+            self.sale_txids[txid] = tkn
+
+    def remove_sale(self, txid: str) -> str | None:
+        """
+        A sale output was spent. Its orders stay in the book for the next sale
+        with the same tkn.
+
+        Returns:
+            str | None: The tkn of the spent sale, if it was in the book.
+        """
+        with self.lock:
+            tkn = self.sale_txids.pop(txid, None)
+            if tkn is not None and self.sales.get(tkn) == txid:
+                del self.sales[tkn]
+                self.copies.pop(tkn, None)
+            return tkn
+
+    def sale(self, tag: str) -> str | None:
+        """
+        The sale tkn of an order in the book.
+        """
+        with self.lock:
+            entry = self.tags.get(tag)
+            return entry[0] if entry is not None else None
+
+    def add(self, tkn: str, tag: str, timestamp: int, tx_idx: int, incentive: int, priority: int) -> None:
+        """
+        Place a valid order in its fifo position.
+        """
+        key = (priority, -incentive, timestamp, tx_idx, tag)
+        order = (tag, timestamp, tx_idx, incentive, priority)
+        with self.lock:
+            # a replaced queue entry moves to its new position
+            self._remove(tag)
+            keys = self.keys.setdefault(tkn, [])
+            index = bisect_left(keys, key)
+            keys.insert(index, key)
+            self.orders.setdefault(tkn, []).insert(index, order)
+            self.tags[tag] = (tkn, key)
+            self.copies.pop(tkn, None)
+
+    def remove(self, tag: str) -> bool:
+        """
+        Remove an order from the book.
+
+        Returns:
+            bool: If the order was in the book.
+        """
+        with self.lock:
+            return self._remove(tag)
+
+    def _remove(self, tag: str) -> bool:
+        entry = self.tags.pop(tag, None)
+        if entry is None:
+            return False
+        tkn, key = entry
+        keys = self.keys[tkn]
+        index = bisect_left(keys, key)
+        del keys[index]
+        del self.orders[tkn][index]
+        self.copies.pop(tkn, None)
+        if not keys:
+            del self.keys[tkn]
+            del self.orders[tkn]
+        return True
+
+    def snapshot(self) -> dict:
+        """
+        The fifo ordered orders of every sale, in the same form as
+        Sorting.fifo. The lists are copies so the ingest path can keep
+        changing the book while a round runs. Only the sales that changed
+        since the last snapshot are copied again, the rest are shared with
+        the last snapshot and must not be changed.
+
+        Returns:
+            dict: A fifo ordered sale-order dictionary.
+        """
+        with self.lock:
+            snapshot = {}
+            for tkn in sorted(self.sales):
+                orders = self.copies.get(tkn)
+                if orders is None:
+                    orders = self.copies[tkn] = list(self.orders.get(tkn, ()))
+                snapshot[tkn] = orders
+            return snapshot
@@ -0,0 +1,66 @@
+import os
+import select
+from typing import IO, Iterator
+
+from src import codec
+
+# bytes read from the pipe at a time
+CHUNK_SIZE = 1 << 16
+
+
+def is_idle(fd: int) -> bool:
+    """
+    Check if there is nothing waiting to be read on a file descriptor.
+
+    Args:
+        fd (int): The file descriptor
+
+    Returns:
+        bool: True if a read would block.
+    """
+    readable, _, _ = select.select([fd], [], [], 0)
+    return not readable
+
+
+def read_batches(stream: IO[bytes], batch_size: int = 1000) -> Iterator[list]:
+    """
+    Read the oura JSONL stream from a pipe and yield the events in batches. A
+    batch is yielded when it is full or when oura has nothing more waiting in
+    the pipe, so the tip is followed without delay. Nothing is read while a
+    batch is being applied, so a slow db fills the pipe and blocks oura.
+
+    Args:
+        stream (IO[bytes]): The stdout of the oura process
+        batch_size (int, optional): The max events per batch. Default is 1000.
+
+    Yields:
+        list: The oura events in chain order.
+    """
+    fd = stream.fileno()
+    buffer = b""
+    batch = []
+    while True:
+        chunk = os.read(fd, CHUNK_SIZE)
+        # oura has exited
+        if not chunk:
+            break
+
+        lines = (buffer + chunk).split(b"\n")
+        # the last line is incomplete until a newline shows up
+        buffer = lines.pop()
+        for line in lines:
+            if not line.strip():
+                continue
+            batch.append(codec.loads(line))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+
+        # we are caught up with oura so apply what we have
+        if batch and not buffer and is_idle(fd):
+            yield batch
+            batch = []
+
+    # a trailing line without a newline was cut off when oura stopped
+    if batch:
+        yield batch
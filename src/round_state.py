@@ -0,0 +1,134 @@
+import threading
+
+from src.utility import current_time
+
+
+class RoundState:
+    """
+    Track what changed since the aggregation rounds last looked at a sale.
+
+    The ingest path marks a sale dirty when its sale output or any of its
+    queue entries change, and marks everything dirty when an oracle, data,
+    batcher or vault output changes. Each mark moves a version forward, so
+    the state of a sale is the pair (global version, sale version).
+
+    A sale or an order that failed is recorded with the state the round read
+    it at. Until that state changes the same attempt would fail the same way,
+    so the round skips it without asking the node. A failure is tried again
+    after RETRY_AFTER seconds in case it was something off chain. A submit
+    that failed did not depend on the state, it is tried again after
+    SUBMIT_RETRY_AFTER seconds, about a block.
+
+    A whole round is only due when something was marked since the last round
+    began, or when something the last round waited on has expired.
+    """
+
+    RETRY_AFTER = 600
+    SUBMIT_RETRY_AFTER = 20
+
+    def __init__(self) -> None:
+        # the ingest path writes while the aggregation worker reads
+        self.lock = threading.Lock()
+        self.version = 0
+        self.sales = {}
+        # sale tkn -> order tag, or None for the sale itself -> (state, time)
+        self.failures = {}
+        # the first round always runs
+        self.changed = True
+        # the unix time in milliseconds the earliest wait expires
+        self.wake = None
+
+    def touch(self, tkn: str) -> None:
+        """
+        Mark a sale dirty.
+        """
+        with self.lock:
+            self.sales[tkn] = self.sales.get(tkn, 0) + 1
+            # none of the failures can match again
+            self.failures.pop(tkn, None)
+            self.changed = True
+
+    def touch_all(self) -> None:
+        """
+        Mark every sale dirty.
+        """
+        with self.lock:
+            self.version += 1
+            self.failures = {}
+            self.changed = True
+
+    def state(self, tkn: str) -> tuple:
+        """
+        The current state of a sale.
+        """
+        with self.lock:
+            return (self.version, self.sales.get(tkn, 0))
+
+    def snapshot(self) -> tuple:
+        """
+        The state of every sale, taken before a round reads its records.
+        """
+        with self.lock:
+            return (self.version, dict(self.sales))
+
+    @staticmethod
+    def state_of(snapshot: tuple, tkn: str) -> tuple:
+        """
+        The state of a sale inside of a snapshot.
+        """
+        version, sales = snapshot
+        return (version, sales.get(tkn, 0))
+
+    def begin(self) -> tuple:
+        """
+        Start a round. The change marks and waits are cleared and the state
+        of every sale is returned, the same as snapshot.
+        """
+        with self.lock:
+            self.changed = False
+            self.wake = None
+            return (self.version, dict(self.sales))
+
+    def due(self) -> bool:
+        """
+        If a round can do something different from the last round.
+        """
+        with self.lock:
+            return self.changed or (self.wake is not None and current_time() >= self.wake)
+
+    def wait_until(self, at: int | None) -> None:
+        """
+        Run a round once the unix time in milliseconds is reached.
+        """
+        if at is None:
+            return
+        with self.lock:
+            self._wait_until(at)
+
+    def _wait_until(self, at: int) -> None:
+        if self.wake is None or at < self.wake:
+            self.wake = at
+
+    def fail(self, tkn: str, state: tuple, tag: str = None) -> None:
+        """
+        Record that the sale, or one of its orders, failed at the given state.
+        """
+        now = current_time()
+        with self.lock:
+            self.failures.setdefault(tkn, {})[tag] = (state, now)
+            self._wait_until(now + 1000 * self.RETRY_AFTER)
+
+    def failed(self, tkn: str, tag: str = None) -> bool:
+        """
+        If the sale, or one of its orders, already failed at the current state.
+        """
+        with self.lock:
+            failure = self.failures.get(tkn, {}).get(tag)
+            if failure is None:
+                return False
+            state, at = failure
+            if state != (self.version, self.sales.get(tkn, 0)) or current_time() - at > 1000 * self.RETRY_AFTER:
+                return False
+            # the failure is skipped again so the retry is still waited on
+            self._wait_until(at + 1000 * self.RETRY_AFTER)
+            return True
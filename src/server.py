@@ -0,0 +1,205 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from loguru._logger import Logger
+
+from src import codec
+from src.ingest import Ingest, is_event, load_events
+
+# the largest request body that is accepted
+MAX_BODY_SIZE = 64 * 1024 * 1024
+
+REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    411: 'Length Required',
+    413: 'Payload Too Large',
+    503: 'Service Unavailable',
+}
+
+
+class HttpError(Exception):
+    def __init__(self, status: int) -> None:
+        super().__init__(REASONS[status])
+        self.status = status
+
+
+class IngestServer:
+    """
+    An asyncio http server for the oura webhook. Request bodies are parsed on
+    the event loop and the events are handed to a single writer task through
+    a bounded queue. A request is answered once its events are queued, when
+    the queue is full the requests wait, which holds back oura.
+
+    Queued events are only durable once their block is committed. If the
+    writer fails the server stops, and a restart resumes from the status.
+    """
+
+    def __init__(self, ingest: Ingest, logger: Logger, on_commit: Callable[[int], None] = None, queue_size: int = 1024, batch_size: int = 1000) -> None:
+        self.ingest = ingest
+        self.logger = logger
+        self.on_commit = on_commit
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.queue = None
+        self.server = None
+        self.writer_task = None
+        # every db write happens on this one thread
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest")
+
+    async def start(self, host: str = '0.0.0.0', port: int = 8008) -> None:
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self.writer_task = asyncio.create_task(self.write())
+        self.server = await asyncio.start_server(self.handle, host, port)
+
+    def port(self) -> int:
+        return self.server.sockets[0].getsockname()[1]
+
+    async def serve(self, host: str = '0.0.0.0', port: int = 8008) -> None:
+        """
+        Serve until the writer fails or the task is cancelled.
+        """
+        await self.start(host, port)
+        try:
+            await self.writer_task
+        finally:
+            await self.stop()
+
+    async def stop(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.writer_task is not None and not self.writer_task.done():
+            # let the writer apply what is already queued
+            await self.queue.join()
+            self.writer_task.cancel()
+        self.executor.shutdown(wait=True)
+
+    ###########################################################################
+    # Writer
+    ###########################################################################
+
+    async def write(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            events = [await self.queue.get()]
+            # take whatever else is already queued as one batch
+            while len(events) < self.batch_size and not self.queue.empty():
+                events.append(self.queue.get_nowait())
+
+            try:
+                committed = await loop.run_in_executor(self.executor, self.ingest.feed, events)
+            except Exception as e:
+                self.logger.critical(f"Ingest Failed, Stopping The Server: {e}")
+                raise
+            finally:
+                for _ in events:
+                    self.queue.task_done()
+
+            # only the latest block matters
+            if committed and self.on_commit is not None:
+                self.on_commit(committed[-1])
+
+    ###########################################################################
+    # Http
+    ###########################################################################
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    keep_alive = await self.request(reader)
+                    self.respond(writer, 200, 'Webhook Successful', keep_alive)
+                except HttpError as e:
+                    keep_alive = False
+                    self.respond(writer, e.status, REASONS[e.status], keep_alive)
+                except (ValueError, asyncio.LimitOverrunError):
+                    # a malformed request line, header or chunk size
+                    keep_alive = False
+                    self.respond(writer, 400, REASONS[400], keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            # the client hung up
+            pass
+        finally:
+            writer.close()
+
+    async def request(self, reader: asyncio.StreamReader) -> bool:
+        """
+        Read one http request and queue its events.
+
+        Returns:
+            bool: True if the connection is kept open.
+        """
+        head = await reader.readuntil(b"\r\n\r\n")
+        lines = head.decode('latin-1').split("\r\n")
+        try:
+            method, path, version = lines[0].split(" ")
+        except ValueError:
+            raise HttpError(400)
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+
+        body = await self.body(reader, headers)
+
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+
+        if path not in ('/webhook', '/webhook/batch'):
+            raise HttpError(404)
+        if method != 'POST':
+            raise HttpError(405)
+        if self.writer_task.done():
+            raise HttpError(503)
+
+        try:
+            events = [codec.loads(body)] if path == '/webhook' else load_events(body)
+        except ValueError:
+            raise HttpError(400)
+        # a bad event would stop the writer for every later request
+        if not all(is_event(event) for event in events):
+            raise HttpError(400)
+
+        for event in events:
+            await self.queue.put(event)
+        return keep_alive
+
+    async def body(self, reader: asyncio.StreamReader, headers: dict) -> bytes:
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            size = 0
+            while True:
+                length = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                size += length
+                if size > MAX_BODY_SIZE:
+                    raise HttpError(413)
+                chunk = await reader.readexactly(length + 2)
+                if length == 0:
+                    return b"".join(chunks)
+                chunks.append(chunk[:-2])
+
+        if 'content-length' not in headers:
+            raise HttpError(411)
+        length = int(headers['content-length'])
+        if length > MAX_BODY_SIZE:
+            raise HttpError(413)
+        return await reader.readexactly(length)
+
+    @staticmethod
+    def respond(writer: asyncio.StreamWriter, status: int, text: str, keep_alive: bool) -> None:
+        body = text.encode()
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+            f"Content-Type: text/plain\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            f"\r\n".encode() + body
+        )
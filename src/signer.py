@@ -0,0 +1,125 @@
+import hashlib
+import os
+
+import cbor2
+from nacl.signing import SigningKey
+from pycardano.crypto.bip32 import BIP32ED25519PrivateKey
+
+from src.cbor import _head, item_end, read_head
+from src.json_file import read, write
+from src.tx_builder import SET_TAG
+
+# the signed envelope, like transaction sign writes
+ENVELOPE_DESCRIPTION = "Ledger Cddl Format"
+
+# skey paths -> (modified times, signer)
+_signers = {}
+
+
+def _load_key(file_path: str) -> tuple[bytes, object]:
+    """
+    The verification key and the signing function of a cli signing key file.
+    The setup script converts extended keys, the key gen command makes plain
+    ones, so both are read.
+    """
+    envelope = read(file_path)
+    payload = cbor2.loads(bytes.fromhex(envelope['cborHex']))
+    if 'Extended' in envelope['type']:
+        # the extended secret, the verification key and the chain code
+        key = BIP32ED25519PrivateKey(payload[:64], payload[96:])
+        return key.public_key, key.sign
+    key = SigningKey(payload)
+    return key.verify_key.encode(), lambda message: key.sign(message).signature
+
+
+class Signer:
+    """
+    Sign transactions in memory with keys read once. The vkey witnesses are
+    added to the witness set of the transaction, everything else is left as
+    it was built, so the signed transaction has the id of the draft.
+    """
+
+    def __init__(self, *skey_paths: str) -> None:
+        keys = {}
+        for skey_path in skey_paths:
+            vkey, sign = _load_key(skey_path)
+            # the same key signing twice is one witness
+            keys[vkey] = sign
+        # the ledger sorts the witnesses by the hash of the key
+        self.keys = sorted(keys.items(), key=lambda item: hashlib.blake2b(item[0], digest_size=28).digest())
+
+    @classmethod
+    def load(cls, *skey_paths: str) -> 'Signer':
+        """
+        The signer for the signing key files, read again only when a file
+        changes.
+
+        Args:
+            skey_paths (str): The paths to the signing key files
+
+        Returns:
+            Signer: The signer for the keys
+        """
+        modified = tuple(os.path.getmtime(skey_path) for skey_path in skey_paths)
+        cached = _signers.get(skey_paths)
+        if cached is None or cached[0] != modified:
+            cached = _signers[skey_paths] = (modified, cls(*skey_paths))
+        return cached[1]
+
+    def witnesses(self, body: bytes, conway: bool = True) -> bytes:
+        """
+        The vkey witnesses of the keys for a transaction body.
+
+        Args:
+            body (bytes): The cbor of the transaction body
+            conway (bool | optional): If the transaction is a conway era one
+
+        Returns:
+            bytes: The cbor of the vkey witnesses
+        """
+        tx_hash = hashlib.blake2b(body, digest_size=32).digest()
+        witnesses = _head(4, len(self.keys)) + b''.join(cbor2.dumps([vkey, sign(tx_hash)]) for vkey, sign in self.keys)
+        return SET_TAG + witnesses if conway else witnesses
+
+    def sign(self, tx: bytes, conway: bool = True) -> bytes:
+        """
+        Add the vkey witnesses to an unwitnessed transaction.
+
+        Args:
+            tx (bytes): The cbor of the transaction, [body, witnesses, valid, data]
+            conway (bool | optional): If the transaction is a conway era one
+
+        Returns:
+            bytes: The cbor of the signed transaction
+        """
+        _, _, body_start = read_head(tx, 0)
+        body_end = item_end(tx, body_start)
+        _, pairs, offset = read_head(tx, body_end)
+        if pairs > 0 and read_head(tx, offset)[1] == 0:
+            raise ValueError("the transaction already has vkey witnesses")
+
+        # the vkey witnesses are key 0 so they go first
+        witnesses = _head(5, pairs + 1) + b'\x00' + self.witnesses(tx[body_start:body_end], conway)
+        return tx[:body_end] + witnesses + tx[offset:]
+
+    def sign_file(self, draft_file_path: str, signed_file_path: str) -> bytes:
+        """
+        Sign a transaction draft file and write the signed transaction for
+        submission.
+
+        Args:
+            draft_file_path (str): The path to the draft from the endpoint
+            signed_file_path (str): The path to write the signed transaction to
+
+        Returns:
+            bytes: The cbor of the signed transaction
+        """
+        envelope = read(draft_file_path)
+        conway = 'ConwayEra' in envelope['type']
+        tx = self.sign(bytes.fromhex(envelope['cborHex']), conway)
+        write({
+            "type": envelope['type'].replace("Unwitnessed", "Witnessed"),
+            "description": ENVELOPE_DESCRIPTION,
+            "cborHex": tx.hex(),
+        }, signed_file_path)
+        return tx
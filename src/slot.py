@@ -0,0 +1,101 @@
+import time
+
+from src.cli import query_slot_number
+
+MAINNET_MAGIC = 764824073
+
+# network magic -> (first shelley slot, unix time in seconds of that slot)
+# every slot from shelley on is one second long
+SHELLEY_START = {
+    MAINNET_MAGIC: (4492800, 1596059091),
+    # preprod
+    1: (86400, 1655769600),
+    # preview
+    2: (0, 1666656000),
+}
+
+# network flag -> converter, so an unknown network is only queried once
+_converters = {}
+
+
+def network_magic(network: str) -> int:
+    """
+    The network magic from the cardano-cli network flag.
+
+    Args:
+        network (str): The network flag, --mainnet or --testnet-magic N
+
+    Returns:
+        int: The network magic
+    """
+    parts = network.split()
+    if "--testnet-magic" in parts:
+        return int(parts[parts.index("--testnet-magic") + 1])
+    return MAINNET_MAGIC
+
+
+class SlotConverter:
+    """
+    Convert unix times to slots without asking the node. The conversion
+    is only for times from the shelley era on, where a slot is one second.
+    """
+
+    def __init__(self, slot: int, unix_time: int) -> None:
+        # any known slot and its unix time in seconds
+        self.start_slot = slot
+        self.start_time = unix_time
+
+    @classmethod
+    def for_network(cls, network: str) -> 'SlotConverter | None':
+        """
+        The converter of a known network, None for any other network.
+        """
+        start = SHELLEY_START.get(network_magic(network))
+        return cls(*start) if start is not None else None
+
+    def slot(self, unix_time: int, delta: int = 0) -> int:
+        """
+        The slot at a unix time, the same as cardano-cli query slot-number.
+
+        Args:
+            unix_time (int): The unix time in milliseconds
+            delta (int | optional): The seconds to be added to the unix time
+
+        Returns:
+            int: The slot of the unix time
+        """
+        return unix_time // 1000 + delta - self.start_time + self.start_slot
+
+    def unix_time(self, slot: int) -> int:
+        """
+        The unix time in milliseconds a slot starts at.
+        """
+        return 1000 * (slot - self.start_slot + self.start_time)
+
+    def current_slot(self) -> int:
+        """
+        The slot of the current time.
+        """
+        return self.slot(int(1000 * time.time()))
+
+
+def slot_converter(config: dict) -> SlotConverter:
+    """
+    The slot converter for the configured network. A network without known
+    constants asks the node for the current slot once.
+
+    Args:
+        config (dict): The batcher configuration
+
+    Returns:
+        SlotConverter: The converter for the network
+    """
+    network = config['network']
+    converter = _converters.get(network)
+    if converter is None:
+        converter = SlotConverter.for_network(network)
+        if converter is None:
+            now = int(time.time())
+            converter = SlotConverter(query_slot_number(config['socket_path'], 1000 * now, network, config['cli_path']), now)
+        _converters[network] = converter
+    return converter
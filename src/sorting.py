@@ -1,6 +1,5 @@
 
 
-from src.datums import get_incentive_amount, queue_validity
 from src.db_manager import DbManager
 
 
@@ -33,45 +32,29 @@ class Sorting:
 
     @staticmethod
     def fifo(db: DbManager) -> dict:
-        # query all the sale pointer tokens of valid sales
-        sales = db.sale.read_all()
+        """
+        The fifo ordered orders of every sale. The validity, incentive and
+        priority are stored with each queue entry, so the whole order book
+        is a single query and no datum is decoded.
+
+        Args:
+            db (DbManager): The batcher db
 
+        Returns:
+            dict: A fifo ordered sale-order dictionary.
+        """
         # initialize the sale to order dictionary
         sale_to_order_dict = {}
 
-        # there has to be at least one sale
-        if len(sales) == 0:
-            return {}
-
-        # loop sales and create a dictionary of orders per sale
-        for sale in sales:
-
+        for sale, order_hash, timestamp, tx_idx, incentive_amt, priority in db.queue.sorted_tags():
             # there will be a list of orders for some sale
-            sale_to_order_dict[sale] = []
+            orders = sale_to_order_dict.setdefault(sale, [])
 
-            orders = db.queue.read_all(sale)
-
-            # if there are no orders for this sale continue to the next one
-            if len(orders) == 0:
+            # a sale without valid orders
+            if order_hash is None:
                 continue
 
-            # loop the orders for some sale
-            for order in orders:
-                # order hash is the unique tag
-                order_hash = order[0]
-                # all the order data for this queue entry
-                order_data = order[1]
-
-                # try to validate the datum else continue to the next order
-                if queue_validity(order_data['datum']) is False:
-                    continue
-
-                # get the incentive amount
-                incentive_amt, priority = get_incentive_amount(order_data['datum'])
-                # Sort by incentive amount (descending), then by timestamp and tx_idx
-                #
-                # (order hash, timestamp, tx idx, incentive)
-                sale_to_order_dict[sale].append((order_hash, order_data['timestamp'], order_data['tx_idx'], incentive_amt, priority))
-
-        # fifo the queue list per each sale
-        return Sorting.fifo_sort(sale_to_order_dict)
+            # (order hash, timestamp, tx idx, incentive, priority)
+            orders.append((order_hash, timestamp, tx_idx, incentive_amt, priority))
+
+        return sale_to_order_dict
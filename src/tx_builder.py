@@ -0,0 +1,225 @@
+import hashlib
+
+import cbor2
+from pycardano import Address
+
+from src.cbor import _head, plutus_data_to_cbor, txid_from_cbor
+from src.json_file import write
+from src.value import Value
+
+# the redeemer tag of a spent input
+SPEND = 0
+
+# the language id of a plutus version in the script integrity hash
+LANGUAGES = {"PlutusV2": 1, "PlutusV3": 2}
+
+# conway sets are tagged arrays
+SET_TAG = b'\xd9\x01\x02'
+
+# a transaction without vkey witnesses, like transaction build-raw writes
+ENVELOPE_TYPE = "Unwitnessed Tx ConwayEra"
+ENVELOPE_DESCRIPTION = "Ledger Cddl Format"
+
+
+def _outref(txin: str) -> tuple[bytes, int]:
+    """An outref in the form id#idx as the transaction input pair."""
+    tx_id, index = txin.split("#")
+    return bytes.fromhex(tx_id), int(index)
+
+
+def _set(items: list[bytes]) -> bytes:
+    """A tagged set of encoded items, in the order the ledger sorts them."""
+    return SET_TAG + _head(4, len(items)) + b''.join(items)
+
+
+def _inputs(txins: list[str]) -> bytes:
+    return _set([cbor2.dumps(list(outref)) for outref in sorted(_outref(txin) for txin in txins)])
+
+
+def _value(value: Value) -> bytes:
+    """The lovelace alone, else the lovelace and the assets by policy."""
+    assets = {
+        bytes.fromhex(policy): {bytes.fromhex(asset): amount for asset, amount in sorted(tokens.items())}
+        for policy, tokens in sorted(value.inner.items())
+        if policy != 'lovelace'
+    }
+    lovelace = value.inner.get('lovelace', 0)
+    return cbor2.dumps([lovelace, assets] if assets else lovelace)
+
+
+def _output(address: str, value: Value, datum: dict | None) -> bytes:
+    """A legacy output without a datum, else a map with an inline datum."""
+    address_bytes = cbor2.dumps(Address.from_primitive(address).to_primitive())
+    if datum is None:
+        return b'\x82' + address_bytes + _value(value)
+    datum_bytes = plutus_data_to_cbor(datum)
+    return b'\xa3\x00' + address_bytes + b'\x01' + _value(value) + b'\x02\x82\x01\xd8\x18' + cbor2.dumps(datum_bytes)
+
+
+def language_views(cost_model: list[int], language: str = "PlutusV3") -> bytes:
+    """
+    The language views of the script integrity hash for one plutus version.
+
+    Args:
+        cost_model (list[int]): The cost model of the version from the protocol parameters
+        language (str | optional): The plutus version
+
+    Returns:
+        bytes: The cbor of the language views
+    """
+    return cbor2.dumps({LANGUAGES[language]: cost_model})
+
+
+class ScriptInput:
+    """
+    An input spent with a reference script and an inline datum.
+    """
+
+    def __init__(self, txin: str, redeemer: dict, execution_units: dict = None) -> None:
+        self.txin = txin
+        self.redeemer = plutus_data_to_cbor(redeemer)
+        self.execution_units = execution_units or {'cpu': 0, 'mem': 0}
+
+
+class TxBuilder:
+    """
+    Build a transaction in memory with the same bytes as cardano-cli
+    transaction build-raw, for the shapes the batcher submits: spent inputs,
+    reference inputs, inline datums, plutus spending redeemers, a validity
+    interval, required signers and collateral.
+
+    Everything but the fee and the execution units is encoded once, so a
+    rebuild with the simulated units only encodes those again.
+    """
+
+    def __init__(self, views: bytes = b'') -> None:
+        # the language views, needed when there are redeemers
+        self.views = views
+        self.inputs = []
+        self.script_inputs = []
+        self.reference_inputs = []
+        self.collateral = []
+        self.outputs = []
+        self.required_signers = []
+        self.invalid_before = None
+        self.invalid_hereafter = None
+        self.fee = 0
+        # the encoded fields that do not change between rebuilds
+        self.fields = None
+
+    def add_input(self, txin: str) -> 'TxBuilder':
+        self.inputs.append(txin)
+        self.fields = None
+        return self
+
+    def add_script_input(self, txin: str, script_reference: str, redeemer: dict, execution_units: dict = None) -> 'TxBuilder':
+        self.inputs.append(txin)
+        self.script_inputs.append(ScriptInput(txin, redeemer, execution_units))
+        return self.add_reference_input(script_reference)
+
+    def add_reference_input(self, txin: str) -> 'TxBuilder':
+        if txin not in self.reference_inputs:
+            self.reference_inputs.append(txin)
+        self.fields = None
+        return self
+
+    def add_collateral(self, txin: str) -> 'TxBuilder':
+        self.collateral.append(txin)
+        self.fields = None
+        return self
+
+    def add_output(self, address: str, value: Value, datum: dict = None) -> 'TxBuilder':
+        self.outputs.append((address, value, datum))
+        self.fields = None
+        return self
+
+    def add_required_signer(self, pkh: str) -> 'TxBuilder':
+        self.required_signers.append(pkh)
+        self.fields = None
+        return self
+
+    def set_validity(self, invalid_before: int, invalid_hereafter: int) -> 'TxBuilder':
+        self.invalid_before = invalid_before
+        self.invalid_hereafter = invalid_hereafter
+        self.fields = None
+        return self
+
+    def set_output_value(self, index: int, value: Value) -> 'TxBuilder':
+        address, _, datum = self.outputs[index]
+        self.outputs[index] = (address, value, datum)
+        self.fields = None
+        return self
+
+    def set_execution_units(self, txin: str, execution_units: dict) -> 'TxBuilder':
+        for script_input in self.script_inputs:
+            if script_input.txin == txin:
+                script_input.execution_units = execution_units
+        return self
+
+    def encode_fields(self) -> dict:
+        """
+        The body fields that do not depend on the fee or the execution units.
+        """
+        if self.fields is None:
+            fields = {0: _inputs(self.inputs)}
+            if self.collateral:
+                fields[13] = _inputs(self.collateral)
+            if self.reference_inputs:
+                fields[18] = _inputs(self.reference_inputs)
+            fields[1] = _head(4, len(self.outputs)) + b''.join(_output(*output) for output in self.outputs)
+            if self.invalid_hereafter is not None:
+                fields[3] = cbor2.dumps(self.invalid_hereafter)
+            if self.invalid_before is not None:
+                fields[8] = cbor2.dumps(self.invalid_before)
+            if self.required_signers:
+                fields[14] = _set([cbor2.dumps(pkh) for pkh in sorted(bytes.fromhex(pkh) for pkh in self.required_signers)])
+            self.fields = fields
+        return self.fields
+
+    def redeemers(self) -> bytes:
+        """
+        The redeemers as a map from the tag and the index of the input in the
+        sorted inputs to the redeemer and its execution units.
+        """
+        order = sorted(_outref(txin) for txin in self.inputs)
+        entries = sorted((order.index(_outref(script_input.txin)), script_input) for script_input in self.script_inputs)
+        return _head(5, len(entries)) + b''.join(
+            cbor2.dumps([SPEND, index]) + b'\x82' + script_input.redeemer + cbor2.dumps([script_input.execution_units['mem'], script_input.execution_units['cpu']])
+            for index, script_input in entries
+        )
+
+    def body(self, redeemers: bytes = None) -> bytes:
+        fields = dict(self.encode_fields())
+        fields[2] = cbor2.dumps(self.fee)
+        if self.script_inputs:
+            redeemers = self.redeemers() if redeemers is None else redeemers
+            fields[11] = cbor2.dumps(hashlib.blake2b(redeemers + self.views, digest_size=32).digest())
+        # the order cardano-cli writes the fields in
+        keys = [key for key in (0, 13, 18, 1, 2, 3, 8, 14, 11) if key in fields]
+        return _head(5, len(keys)) + b''.join(cbor2.dumps(key) + fields[key] for key in keys)
+
+    def to_cbor(self) -> bytes:
+        """
+        The unwitnessed transaction, [body, witnesses, valid, data].
+        """
+        if self.script_inputs:
+            redeemers = self.redeemers()
+            witnesses = b'\xa1\x05' + redeemers
+        else:
+            redeemers = None
+            witnesses = b'\xa0'
+        return b'\x84' + self.body(redeemers) + witnesses + b'\xf5\xf6'
+
+    def txid(self) -> str:
+        return txid_from_cbor(self.to_cbor())
+
+    def write(self, file_path: str) -> str:
+        """
+        Write the transaction as a text envelope, like transaction build-raw.
+
+        Returns:
+            str: The cbor hex of the transaction
+        """
+        cbor_hex = self.to_cbor().hex()
+        write({"type": ENVELOPE_TYPE, "description": ENVELOPE_DESCRIPTION, "cborHex": cbor_hex}, file_path)
+        return cbor_hex
@@ -12,6 +12,7 @@ import cbor2
 
 from src.address import bech32_to_hex
 from src.cbor import convert_datum, tag, to_bytes
+from src.fee import FeeEngine
 from src.ogmios import ogmios_simulate
 from src.utility import find_index_of_target
 from src.utxo_manager import UTxOManager
@@ -180,23 +181,18 @@ def simulate(tx_cbor: str, input_cbor: str, output_cbor: str, aiken_path: str, n
         return [{}]
 
 
-def calculate_total_fee(tx_fee: int, execution_units: list[dict[str, int]]) -> int:
+def calculate_total_fee(tx_fee: int, execution_units: list[dict[str, int]], fees: FeeEngine) -> int:
     """Given a set of executions and the tx fee calculate the total fee
 
     Args:
-        tx_fee (int): The tx fee calculated with the cli
+        tx_fee (int): The tx fee calculated from the draft
         execution_units (list[dict[str, int]]): The list of execution units, order does not matter
+        fees (FeeEngine): The fee engine holding the execution unit prices
 
     Returns:
         int: The total fee
     """
-    priceMemory = 5.77e-2
-    priceSteps = 7.21e-5
-    computational_fee = 0
-    for unit in execution_units:
-        computational_fee += unit['cpu'] * \
-            priceSteps + unit['mem'] * priceMemory
-    return int(tx_fee + computational_fee)
+    return tx_fee + fees.execution_fee(execution_units)
 
 
 def convert_execution_unit(execution_unit: dict[str, int]) -> str:
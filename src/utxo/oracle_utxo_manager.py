@@ -13,6 +13,14 @@ class OracleUTxOManager:
     def datum(self):
         return self._data.get('datum')
 
+    @property
+    def start_slot(self):
+        return self._data.get('start_slot')
+
+    @property
+    def end_slot(self):
+        return self._data.get('end_slot')
+
     @property
     def value(self):
         return self._data.get('value')
@@ -10,6 +10,10 @@ class Reference:
     def cborHex(self):
         return self._data.get('cborHex')
 
+    @property
+    def script_size(self):
+        return self._data.get('script_size')
+
     @property
     def value(self):
         return self._data.get('value')
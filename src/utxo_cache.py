@@ -0,0 +1,144 @@
+import threading
+
+from src.utility import current_time
+
+
+class UTxOCache:
+    """
+    Remember which outrefs exist on chain so a round does not ask the node
+    again about utxos it already knows.
+
+    An output seen in a block is confirmed live and an input seen in a block
+    is forgotten. Oura follows the chain delay_depth blocks behind the node
+    tip, so an output it reports may already be spent at the tip. Every
+    answer, from a block or from a node query, is asked again after TTL
+    seconds, and a rollback clears the cache.
+
+    The inputs of a transaction the batcher submitted are marked spent, so
+    the rounds before its block is ingested do not try to spend them again.
+
+    The node is asked without holding the lock. An outref spent while it is
+    being asked about keeps the spend, the answer for it is not remembered.
+    """
+
+    TTL = 60
+
+    def __init__(self) -> None:
+        # the ingest path writes while the aggregation worker reads
+        self.lock = threading.Lock()
+        # outref -> (exists, unix time in milliseconds it expires)
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        # the node queries running and the outrefs spent while they run
+        self.queries = 0
+        self.spent = set()
+        # moves forward when the cache is cleared
+        self.generation = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def confirm(self, outref: str) -> None:
+        """
+        An output was created on chain.
+        """
+        with self.lock:
+            self.entries[outref] = (True, current_time() + 1000 * self.TTL)
+
+    def spend(self, outref: str) -> None:
+        """
+        An input was spent on chain.
+        """
+        with self.lock:
+            self.entries.pop(outref, None)
+            if self.queries > 0:
+                self.spent.add(outref)
+
+    def mark_spent(self, outrefs: list[str]) -> None:
+        """
+        The inputs of a transaction the batcher submitted.
+        """
+        expires = current_time() + 1000 * self.TTL
+        with self.lock:
+            for outref in outrefs:
+                self.entries[outref] = (False, expires)
+            if self.queries > 0:
+                self.spent.update(outrefs)
+
+    def clear(self) -> None:
+        """
+        Forget everything, the chain may have rolled back.
+        """
+        with self.lock:
+            self.entries = {}
+            self.generation += 1
+
+    def put(self, outref: str, exists: bool) -> None:
+        """
+        Remember what the node said about an outref.
+        """
+        with self.lock:
+            self.entries[outref] = (exists, current_time() + 1000 * self.TTL)
+
+    def get(self, outref: str) -> bool | None:
+        """
+        If the outref exists, or None when it is not known.
+        """
+        with self.lock:
+            entry = self.entries.get(outref)
+            if entry is not None and current_time() < entry[1]:
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            return None
+
+    def existing(self, outrefs: list[str], query) -> set[str]:
+        """
+        Which outrefs exist. The ones that are not known are asked for with
+        a single call to query, and its answers are remembered.
+
+        Args:
+            outrefs (list[str]): The outrefs in the form id#idx
+            query (Callable[[list[str]], set[str]]): Ask the node which outrefs exist
+
+        Returns:
+            set[str]: The outrefs that exist
+        """
+        existing = set()
+        missing = []
+        for outref in outrefs:
+            exists = self.get(outref)
+            if exists is None:
+                missing.append(outref)
+            elif exists is True:
+                existing.add(outref)
+        if missing:
+            with self.lock:
+                self.queries += 1
+                generation = self.generation
+            found = None
+            try:
+                found = query(missing)
+            finally:
+                with self.lock:
+                    self.queries -= 1
+                    if found is not None:
+                        found = set(found) - self.spent
+                        # a rollback during the query makes the answers stale
+                        if generation == self.generation:
+                            expires = current_time() + 1000 * self.TTL
+                            for outref in missing:
+                                if outref not in self.spent:
+                                    self.entries[outref] = (outref in found, expires)
+                    if self.queries == 0:
+                        self.spent = set()
+            existing.update(found)
+        return existing
+
+    def stats(self) -> dict:
+        """
+        The cache size and the hit and miss counters.
+        """
+        with self.lock:
+            return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses}
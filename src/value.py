@@ -1,6 +1,7 @@
 import json
 from dataclasses import dataclass
 
+from src import codec
 from src.allowlist import allowed
 from src.cbor import to_bytes
 
@@ -139,7 +140,7 @@ class Value:
         """
         Do a json dumps of the self.
         """
-        return json.dumps(self.inner)
+        return codec.dumps(self.inner)
 
     def exists(self, policy) -> bool:
         """
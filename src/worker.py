@@ -0,0 +1,97 @@
+import threading
+
+from loguru._logger import Logger
+
+from src.aggregate import Aggregate
+from src.db_manager import DbManager
+
+
+class AggregationWorker(threading.Thread):
+    """
+    Run the order aggregation rounds off the webhook request path. The ingest
+    path signals each committed block and returns right away. A block that is
+    signalled while a round is running does not queue up behind it, only the
+    latest block is kept and it starts the next round.
+    """
+
+    def __init__(self, db: DbManager, config: dict, logger: Logger) -> None:
+        super().__init__(name="aggregation", daemon=True)
+        self.db = db
+        self.config = config
+        self.logger = logger
+        self.condition = threading.Condition()
+        # the latest committed block that has not been aggregated yet
+        self.pending = None
+        self.stopped = False
+        # rounds that ran and rounds skipped because nothing could change
+        self.rounds_run = 0
+        self.rounds_skipped = 0
+
+    def signal(self, block_number: int) -> None:
+        """
+        Tell the worker that a block was committed. This never blocks on a
+        running round.
+
+        Args:
+            block_number (int): The committed block number
+        """
+        with self.condition:
+            self.pending = block_number
+            self.condition.notify()
+
+    def stop(self, timeout: float = None) -> None:
+        """
+        Stop the worker after the current round finishes.
+        """
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+        if self.is_alive():
+            self.join(timeout)
+
+    def run(self) -> None:
+        while True:
+            with self.condition:
+                while self.pending is None and self.stopped is False:
+                    self.condition.wait()
+                if self.stopped is True:
+                    return
+                block_number = self.pending
+                self.pending = None
+
+            # a failed round must not kill the worker, the next block retries
+            try:
+                self.aggregate(block_number)
+            except Exception as e:
+                self.logger.error(f"Aggregation Failed @ Block {block_number}: {e}")
+
+    def aggregate(self, block_number: int) -> None:
+        """
+        One aggregation round at the given block.
+
+        Args:
+            block_number (int): The latest committed block number
+        """
+        # no tracked utxo changed and nothing the last round waited on expired
+        if self.db.round_state.due() is False:
+            self.rounds_skipped += 1
+            self.logger.debug(f"Round Skipped @ Block {block_number}: {self.rounds_skipped} Skipped, {self.rounds_run} Ran")
+            return
+        self.rounds_run += 1
+
+        # the state of every sale before anything is read
+        states = self.db.round_state.begin()
+        try:
+            # the order book is kept sorted as the blocks are ingested
+            sorted_queue = self.db.order_book.snapshot()
+            # the sale and order records for the whole round in one query
+            book = self.db.read_order_book()
+            # then batch
+            Aggregate.orders(self.db, sorted_queue, self.config, self.logger, book, states)
+        except BaseException:
+            # a failed round runs again on the next block
+            self.db.round_state.touch_all()
+            raise
+
+        # a seen order can be tried again once its entry expires
+        self.db.round_state.wait_until(self.db.seen.next_expiry())
@@ -16,3 +16,108 @@ def is_node_live(socket, magic=1, cli_path='cardano-cli'):
         return result.returncode == 0
     except Exception:
         return False
+
+
+NEWM = ("682fe60c9918842b3323c43b5144bc3d52a23bd2fb81345560d73f63", "4e45574d")
+ADA = ("", "")
+
+CONFIG = {
+    "starting_block_number": 0,
+    "starting_blockhash": "acab",
+    "starting_timestamp": 1,
+    "sale_ref_utxo": "acab",
+    "sale_lovelace": 0,
+    "queue_ref_utxo": "acab",
+    "queue_lovelace": 0,
+    "vault_ref_utxo": "acab",
+    "vault_lovelace": 0,
+    "batcher_address": "addr_batcher",
+    "sale_address": "addr_sale",
+    "queue_address": "addr_queue",
+    "vault_address": "addr_vault",
+    "oracle_address": "addr_oracle",
+    "data_address": "addr_data",
+    "pointer_policy": "acab",
+    "oracle_policy": "cafe",
+    "oracle_asset": "cafe",
+    "data_policy": "fade",
+    "data_asset": "fade",
+}
+
+
+def queue_datum(pointer, incentive, amount):
+    return {"constructor": 0, "fields": [
+        {"constructor": 0, "fields": [{"bytes": "acab" * 14}, {"bytes": ""}]},
+        {"int": 1},
+        {"constructor": 0, "fields": [{"bytes": incentive[0]}, {"bytes": incentive[1]}, {"int": amount}]},
+        {"bytes": pointer},
+    ]}
+
+
+def context(block_number: int, tx_hash: str = "", output_idx: int = 0, tx_idx: int = 0, timestamp: int = 0) -> dict:
+    return {
+        "block_number": block_number,
+        "block_hash": f"{block_number:064x}",
+        "slot": block_number * 20,
+        "timestamp": timestamp,
+        "tx_hash": tx_hash,
+        "tx_idx": tx_idx,
+        "output_idx": output_idx,
+    }
+
+
+def tx_output_event(block_number: int, tx_hash: str, output_idx: int, address: str, amount: int, assets: list = [], inline_datum: dict = None, tx_idx: int = 0) -> dict:
+    return {
+        "variant": "TxOutput",
+        "context": context(block_number, tx_hash, output_idx, tx_idx, block_number),
+        "tx_output": {
+            "address": address,
+            "amount": amount,
+            "assets": assets,
+            "inline_datum": {"plutus_data": inline_datum} if inline_datum is not None else None,
+        },
+    }
+
+
+def tx_input_event(block_number: int, tx_id: str, index: int) -> dict:
+    return {
+        "variant": "TxInput",
+        "context": context(block_number),
+        "tx_input": {
+            "tx_id": tx_id,
+            "index": index,
+        },
+    }
+
+
+def block_end_event(block_number: int) -> dict:
+    return {
+        "variant": "BlockEnd",
+        "context": context(block_number),
+    }
+
+
+def synthetic_chain(first_block: int, blocks: int, address: str, outputs: int = 2) -> list:
+    # every block pays the address and spends the outputs of the block before
+    events = []
+    for block_number in range(first_block, first_block + blocks):
+        for idx in range(outputs):
+            if block_number > first_block:
+                events.append(tx_input_event(block_number, f"{block_number - 1:064x}", idx))
+            events.append(tx_output_event(block_number, f"{block_number:064x}", idx, address, 5000000))
+        events.append(block_end_event(block_number))
+    return events
+
+
+async def http_post(reader, writer, path: str, body: bytes, close: bool = False) -> tuple:
+    # a minimal keep alive http client for the ingest server
+    connection = "close" if close else "keep-alive"
+    writer.write(
+        f"POST {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\nConnection: {connection}\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ")[1])
+    length = int(head.lower().split(b"content-length: ")[1].split(b"\r\n")[0])
+    return status, await reader.readexactly(length)
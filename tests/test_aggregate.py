@@ -0,0 +1,104 @@
+import os
+
+import pytest
+
+from src.aggregate import Aggregate
+from src.cbor import txid_from_cbor
+from src.db_manager import DbManager
+from src.mempool import MempoolView
+from src.tx_builder import TxBuilder
+from src.utility import current_time
+from src.utxo_cache import UTxOCache
+from src.value import Value
+from tests.helpers import CONFIG, NEWM, queue_datum
+
+
+@pytest.fixture
+def db():
+    manager = DbManager(db_file='test_aggregate.db')
+    manager.initialize(CONFIG)
+    yield manager
+    manager.cleanup()
+    os.remove('test_aggregate.db')
+
+
+def test_round_checks_every_utxo_at_once(db):
+    sales = ["aa" * 32, "bb" * 32]
+    for sale in sales:
+        db.sale.create(sale, sale + "#0", {}, Value({"lovelace": 1}))
+    for i in range(3):
+        db.queue.create(f"{i:064x}", f"{i:064x}#1", sales[0], queue_datum(sales[0], NEWM, i + 1), Value({"lovelace": 1}), i, 0)
+    db.load_order_book()
+    sorted_queue = db.order_book.snapshot()
+    book = db.read_order_book()
+
+    # the empty oracle and data have no utxo yet
+    txins = Aggregate.txins(db, sorted_queue, book, [{"txid": "cc" * 32 + "#0"}], [db.oracle.read(), db.data.read()])
+    assert txins == ["cc" * 32 + "#0", sales[0] + "#0", f"{2:064x}#1", f"{1:064x}#1", f"{0:064x}#1", sales[1] + "#0"]
+
+    # sales and orders that already failed are not asked for again
+    state = db.round_state.snapshot()
+    db.round_state.fail(sales[0], (state[0], 0), f"{1:064x}")
+    db.round_state.fail(sales[1], (state[0], 0))
+    txins = Aggregate.txins(db, sorted_queue, book)
+    assert txins == [sales[0] + "#0", f"{2:064x}#1", f"{0:064x}#1"]
+
+
+def signed_tx(*txins):
+    tx = TxBuilder()
+    for txin in txins:
+        tx.add_input(txin)
+    tx.add_output("addr_test1vrs4fk7ea6rg2fvd00sa8um5unp0rt474kngwpc38v2z9vqujprdk", Value({"lovelace": 5000000}))
+    return tx.to_cbor()
+
+
+def test_failed_submit_runs_the_next_round(db, monkeypatch):
+    mempool = MempoolView(CONFIG, "mempool.json")
+    mempool.taken = mempool.complete = True
+    db.round_state.begin()
+
+    now = current_time()
+    monkeypatch.setattr("src.aggregate.current_time", lambda: now)
+    tx = signed_tx("bb" * 32 + "#0")
+    Aggregate.submitted(db, mempool, False, tx, "bb" * 32 + "#0", 0, 1)
+    assert mempool.contains(txid_from_cbor(tx)) is False
+    assert db.seen.exists("bb" * 32 + "#0") is False
+    assert db.utxo_cache.get("bb" * 32 + "#0") is None
+    # nothing the round read changed but the submit is tried again
+    monkeypatch.setattr("src.round_state.current_time", lambda: now)
+    assert db.round_state.due() is False
+    monkeypatch.setattr("src.round_state.current_time", lambda: now + 20000)
+    assert db.round_state.due() is True
+
+
+def test_successful_submit_waits_on_the_mempool(db):
+    mempool = MempoolView(CONFIG, "mempool.json")
+    mempool.taken = mempool.complete = True
+    db.round_state.begin()
+
+    tx = signed_tx("bb" * 32 + "#0", "cc" * 32 + "#1")
+    Aggregate.submitted(db, mempool, True, tx, "bb" * 32 + "#0", 0, current_time() + 60000)
+    assert mempool.contains(txid_from_cbor(tx)) is True
+    assert db.seen.exists("bb" * 32 + "#0") is True
+    assert db.round_state.due() is False
+    # the next rounds do not try to spend the inputs again
+    assert db.utxo_cache.existing(["bb" * 32 + "#0", "cc" * 32 + "#1"], lambda missing: set(missing)) == set()
+
+
+def test_round_reruns_after_a_dropped_profit_tx(db, monkeypatch):
+    clock = [current_time()]
+    for module in ("src.aggregate", "src.round_state", "src.utxo_cache"):
+        monkeypatch.setattr(f"{module}.current_time", lambda: clock[0])
+    db.round_state.begin()
+
+    batcher = "bb" * 32 + "#0"
+    Aggregate.profit_submitted(db, signed_tx(batcher))
+    # the batcher utxo is spent as far as the next rounds know
+    assert db.utxo_cache.existing([batcher], lambda missing: set(missing)) == set()
+    assert db.round_state.due() is False
+
+    # the profit was dropped so nothing is ingested, the round runs anyway
+    clock[0] += 1000 * UTxOCache.TTL
+    assert db.round_state.due() is True
+    assert db.utxo_cache.existing([batcher], lambda missing: set(missing)) == {batcher}
+
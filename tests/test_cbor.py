@@ -1,8 +1,14 @@
+import json
+import os
+
+import cbor2
 import pytest
 from cbor2 import dumps
 
 from src.address import header_byte_from_address, pkh_from_address
-from src.cbor import convert_datum, dumps_with_indefinite_array, tag, to_bytes
+from src.cbor import (cbor_to_datum, convert_datum, datum_to_cbor,
+                      dumps_with_indefinite_array, inputs_from_cbor, item_end,
+                      tag, to_bytes, txid_from_cbor)
 
 
 @pytest.fixture
@@ -493,3 +499,71 @@ def test_tx_simulatlion_list_input_structure():
         ((to_bytes("8b6f7e58e6f3ab8300d779986e9efed5199620e65f2e81662aa76b913bb67ad3"), 2)),
     ]
     assert dumps(inputs).hex() == answer
+
+
+def test_datum_to_cbor_matches_convert_datum(good_reference_datum):
+    assert datum_to_cbor(good_reference_datum) == convert_datum(good_reference_datum)
+
+
+def test_cbor_to_datum_round_trip(good_reference_datum):
+    assert cbor_to_datum(datum_to_cbor(good_reference_datum)) == good_reference_datum
+
+
+def test_cbor_datum_edge_cases():
+    datum = {"constructor": 9, "fields": [
+        {"constructor": 200, "fields": []},
+        {"bytes": "ab" * 100},
+        {"int": -2 ** 80},
+        {"list": [{"int": 1}, {"bytes": ""}]},
+        {"map": [{"k": {"constructor": 0, "fields": []}, "v": {"int": 1}}]},
+    ]}
+    cbor = datum_to_cbor(datum)
+    # tag 1282 for constructor 9
+    assert cbor[:3] == bytes.fromhex("d90502")
+    assert cbor_to_datum(cbor) == datum
+
+
+def test_empty_datum_is_empty_bytes():
+    assert datum_to_cbor({}) == b''
+    assert cbor_to_datum(b'') == {}
+    with pytest.raises(ValueError):
+        datum_to_cbor({"key": "value"})
+
+
+def test_item_end_slices_nested_items():
+    items = [0, 23, 24, 2 ** 40, -500, b"", b"a" * 300, "text", [1, [2, 3]], {1: [b"x"], 2: {}}, cbor2.CBORTag(24, b"\x01"), 1.5, None, True]
+    data = b"".join(cbor2.dumps(item) for item in items)
+    offset = 0
+    for item in items:
+        end = item_end(data, offset)
+        assert cbor2.loads(data[offset:end]) == item
+        offset = end
+    assert offset == len(data)
+
+    # indefinite lengths end at the break
+    indefinite = b"\xd8\x79\x9f\x01\x9f\x02\xff\x5f\x41a\x41b\xff\xff"
+    assert item_end(indefinite + b"\x00") == len(indefinite)
+    assert cbor2.loads(indefinite) == cbor2.CBORTag(121, [1, [2], b"ab"])
+
+    with pytest.raises(IndexError):
+        item_end(cbor2.dumps([1, b"abcdef"])[:-2])
+
+
+def test_txid_from_cbor():
+    def tx(name):
+        with open(os.path.join(os.path.dirname(__file__), 'test_files', name)) as f:
+            return json.load(f)['cborHex']
+
+    # the cardano-cli answer in test_cli
+    answer = "1c471e439d9bfea40eb818e8dd2cb2ec081c3858ca5d92b51f2ec028ff0a1e89"
+    assert txid_from_cbor(tx('test_tx.signed')) == answer
+    # the witnesses are not part of the id
+    assert txid_from_cbor(tx('test_tx.draft')) == answer
+    assert txid_from_cbor(bytes.fromhex(tx('test_tx.draft'))) == answer
+
+
+def test_inputs_from_cbor():
+    with open(os.path.join(os.path.dirname(__file__), 'test_files', 'test_tx.draft')) as f:
+        tx = bytes.fromhex(json.load(f)['cborHex'])
+    txid = "e21921bcc1e85febb9cdc39cffa4471eb1cd498410a9e6d749c0987d29a6de20"
+    assert inputs_from_cbor(tx) == [txid + "#0", txid + "#1"]
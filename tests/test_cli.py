@@ -4,6 +4,8 @@ import os
 import pytest
 
 from src import cli
+from src.cbor import txid_from_cbor
+from src.tx_simulate import get_cbor_from_file
 from tests.helpers import is_node_live
 
 
@@ -124,6 +126,12 @@ def test_tx_id_of_test_file(test_signed_file_path, config):
     assert result == answer
 
 
+@pytest.mark.parametrize("name", ["test_tx.draft", "test_tx2.draft", "test_tx3.draft", "test_tx.signed", "test_tx2.signed"])
+def test_native_tx_id_matches_the_cli(name, config):
+    file_path = os.path.join(os.path.dirname(__file__), 'test_files', name)
+    assert txid_from_cbor(get_cbor_from_file(file_path)) == cli.txid(file_path, config["cli"])
+
+
 def test_sign_a_tx_that_doesnt_exist(test_skey_file_path, config):
     with pytest.raises(SystemExit) as excinfo:
         cli.sign("", config["file_path"], config["network"], test_skey_file_path, config["cli"])
@@ -203,6 +211,20 @@ def test_query_utxo_does_not_exist(live_node):
     assert output is False
 
 
+@pytest.mark.live_node
+def test_query_existing_utxos(live_node):
+    txins = [
+        "1e0b413409dd9591b2a69bca80d7d776e8bb5130f02af0bf886e08ce5b6e183a#0",
+        "aacee651c33ed033402e96e8e946a82a3cc3c0be29bf0897ee465817be227255#2",
+    ]
+    output = cli.query_existing_utxos(live_node["socket"], txins, live_node["network"], live_node["cli"], chunk_size=1)
+    assert output == {txins[0]}
+
+
+def test_query_existing_utxos_without_txins(live_node):
+    assert cli.query_existing_utxos(live_node["socket"], [], live_node["network"], live_node["cli"]) == set()
+
+
 def test_query_utxo_with_no_socket(live_node):
     with pytest.raises(SystemExit) as excinfo:
         cli.does_utxo_exist("", "aacee651c33ed033402e96e8e946a82a3cc3c0be29bf0897ee465817be227255#2", live_node["network"], live_node["cli"])
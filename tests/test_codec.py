@@ -0,0 +1,35 @@
+import json
+
+import pytest
+
+from src import codec
+
+
+def test_round_trip():
+    datum = {"constructor": 0, "fields": [{"bytes": "acab"}, {"int": 1234567}, {"list": []}]}
+    assert codec.loads(codec.dumps(datum)) == datum
+
+
+def test_reads_stdlib_json():
+    # rows written before the codec existed
+    datum = {"constructor": 0, "fields": [{"bytes": "acab"}, {"int": -1}]}
+    assert codec.loads(json.dumps(datum, indent=4)) == datum
+    assert codec.loads(json.dumps(datum).encode()) == datum
+
+
+def test_big_integers_round_trip():
+    datum = {"int": 2 ** 100}
+    assert codec.loads(codec.dumps(datum)) == datum
+    assert codec.loads(codec.dumps({"int": -2 ** 70})) == {"int": -2 ** 70}
+
+
+@pytest.mark.parametrize("number", [2 ** 64 + 1, 2 ** 100 + 1, -2 ** 63 - 1])
+def test_wide_integers_are_not_floats(number):
+    body = '{"int": %d}' % number
+    assert codec.loads(body) == {"int": number}
+    assert codec.loads(body.encode()) == {"int": number}
+
+
+def test_invalid_json_raises_value_error():
+    with pytest.raises(ValueError):
+        codec.loads("{not json")
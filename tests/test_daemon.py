@@ -1,6 +1,7 @@
 import os
 
 import pytest
+import tomllib
 
 from src.daemon import create_toml_file
 
@@ -20,3 +21,21 @@ def test_create_toml_file_defaults(cleanup):
 
     create_toml_file(filename, node_socket, timestamp, block_hash)
     assert os.path.exists(filename)
+
+
+def test_create_toml_file_stdout_sink(cleanup):
+    filename = 'test_daemon.toml'
+    create_toml_file(filename, '/tmp/node.socket', 1625097600, 'abc123', sink="Stdout")
+    with open(filename, 'rb') as file:
+        data = tomllib.load(file)
+    assert data['sink'] == {'type': 'Stdout'}
+    assert data['source']['intersect']['value'] == [1625097600, 'abc123']
+
+
+def test_create_toml_file_webhook_sink(cleanup):
+    filename = 'test_daemon.toml'
+    create_toml_file(filename, '/tmp/node.socket', 1625097600, 'abc123')
+    with open(filename, 'rb') as file:
+        data = tomllib.load(file)
+    assert data['sink']['type'] == 'Webhook'
+    assert data['sink']['url'] == 'http://localhost:8008/webhook'
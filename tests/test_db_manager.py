@@ -1,9 +1,16 @@
+import json
+import multiprocessing
 import os
+import sqlite3
+import threading
 
 import pytest
 
+from src.cbor import convert_datum
+from src.db.schema_db_manager import MIGRATIONS
 from src.db_manager import DbManager
 from src.value import Value
+from tests.helpers import CONFIG
 
 
 @pytest.fixture
@@ -15,17 +22,7 @@ def cleanup():
 
 @pytest.fixture
 def config():
-    return {
-        "starting_block_number": 0,
-        "starting_blockhash": "acab",
-        "starting_timestamp": 1,
-        "sale_ref_utxo": "acab",
-        "sale_lovelace": 0,
-        "queue_ref_utxo": "acab",
-        "queue_lovelace": 0,
-        "vault_ref_utxo": "acab",
-        "vault_lovelace": 0,
-    }
+    return dict(CONFIG)
 
 
 @pytest.fixture
@@ -232,6 +229,14 @@ def test_update_oracle(db_manager, sample_value):
     assert datum2 == _datum
 
 
+def test_reference_script_sizes(db_manager):
+    references = db_manager.reference.read()
+    # the size of the script bytes, not of the cbor hex
+    assert references['sale']['script_size'] == 4957
+    assert references['queue']['script_size'] == 6849
+    assert references['vault']['script_size'] == 3270
+
+
 def test_create_vault(db_manager, sample_value):
     tag = "acab"
     pkh = "acab"
@@ -285,3 +290,158 @@ def test_update_data(db_manager, sample_value):
     _datum = record['datum']
     assert txid2 == _txid
     assert datum2 == _datum
+
+
+def test_db_uses_wal(db_manager):
+    with db_manager.connections.reader() as conn:
+        mode = conn.execute('PRAGMA journal_mode').fetchone()[0]
+    assert mode == "wal"
+
+
+def test_transaction_reads_staged_rows(db_manager, sample_value):
+    with db_manager.transaction():
+        db_manager.queue.create("acab", "test_txid", "test_tkn", {}, sample_value, 1, 0)
+        assert db_manager.queue.read("acab") is not None
+    assert db_manager.queue.read("acab") is not None
+
+
+def test_readers_do_not_see_uncommitted_rows(db_manager, sample_value):
+    seen = []
+
+    def read_from_another_thread():
+        seen.append(db_manager.queue.read("acab"))
+
+    with db_manager.transaction():
+        db_manager.queue.create("acab", "test_txid", "test_tkn", {}, sample_value, 1, 0)
+        thread = threading.Thread(target=read_from_another_thread)
+        thread.start()
+        thread.join()
+    assert seen == [None]
+
+
+def test_schema_is_current(db_manager):
+    assert db_manager.schema.version() == len(MIGRATIONS)
+    # migrating again is a no op
+    assert db_manager.schema.migrate() == len(MIGRATIONS)
+
+
+def test_queue_lookup_uses_index(db_manager):
+    conn = sqlite3.connect('test_batcher.db')
+    plan = conn.execute('EXPLAIN QUERY PLAN SELECT tag FROM queue WHERE tkn = ? ORDER BY timestamp, tx_idx', ("acab",)).fetchall()
+    conn.close()
+    assert "COVERING INDEX queue_tkn_idx" in str(plan)
+
+
+def test_existing_db_upgrades_in_place(cleanup, config, sample_value):
+    old = sqlite3.connect('test_batcher.db')
+    old.execute('CREATE TABLE queue (tag TEXT PRIMARY KEY, txid TEXT, tkn TEXT, datum TEXT, value TEXT, timestamp INTEGER, tx_idx INTEGER)')
+    old.execute('INSERT INTO queue VALUES (?, ?, ?, ?, ?, ?, ?)', ("acab", "test_txid", "test_tkn", "{}", sample_value.dump(), 1, 0))
+    old.commit()
+    old.close()
+
+    manager = DbManager(db_file='test_batcher.db')
+    manager.initialize(config)
+    assert manager.schema.version() == len(MIGRATIONS)
+    assert manager.queue.read("acab")['txid'] == "test_txid"
+    manager.cleanup()
+
+
+def test_old_json_datums_become_cbor(cleanup, config, sample_value):
+    datum = {"constructor": 0, "fields": [
+        {"constructor": 0, "fields": [{"bytes": "acab" * 14}, {"bytes": ""}]},
+        {"int": 5},
+        {"constructor": 0, "fields": [{"bytes": "cafe" * 14}, {"bytes": "beef"}, {"int": 100}]},
+        {"bytes": "fade" * 16},
+    ]}
+    old = sqlite3.connect('test_batcher.db')
+    old.execute('CREATE TABLE queue (tag TEXT PRIMARY KEY, txid TEXT, tkn TEXT, datum TEXT, value TEXT, timestamp INTEGER, tx_idx INTEGER)')
+    old.execute('INSERT INTO queue VALUES (?, ?, ?, ?, ?, ?, ?)', ("acab", "test_txid", "fade" * 16, json.dumps(datum), sample_value.dump(), 1, 0))
+    old.commit()
+    old.close()
+
+    manager = DbManager(db_file='test_batcher.db')
+    manager.initialize(config)
+    with manager.connections.reader() as conn:
+        stored = conn.execute('SELECT datum FROM queue WHERE tag = ?', ("acab",)).fetchone()[0]
+    assert stored == convert_datum(datum)
+    record = manager.queue.read("acab")
+    assert record['bundle_amount'] == 5
+    assert record['incentive_amount'] == 100
+    assert record['datum'] == datum
+    manager.cleanup()
+
+
+def test_datum_is_decoded_on_use(db_manager, sample_value, monkeypatch):
+    datum = {"constructor": 0, "fields": [{"bytes": "acab"}]}
+    db_manager.vault.create("tag", "test_txid", "pkh", datum, sample_value)
+
+    decoded = []
+    monkeypatch.setattr("src.db.record.cbor_to_datum", lambda data: decoded.append(data) or datum)
+    record = db_manager.vault.read("pkh")
+    assert record['txid'] == "test_txid"
+    assert decoded == []
+    assert record.get('datum') == datum
+    assert record['datum'] == datum
+    assert len(decoded) == 1
+
+
+def test_failed_migration_leaves_the_schema_unchanged(cleanup, config, monkeypatch):
+    manager = DbManager(db_file='test_batcher.db')
+    manager.initialize(config)
+
+    def broken(conn):
+        conn.execute('ALTER TABLE queue ADD COLUMN broken INTEGER')
+        conn.execute('CREATE TABLE broken (id INTEGER)')
+        raise RuntimeError("migration failed")
+
+    monkeypatch.setattr("src.db.schema_db_manager.MIGRATIONS", MIGRATIONS + [broken])
+    with pytest.raises(RuntimeError):
+        manager.schema.migrate()
+
+    assert manager.schema.version() == len(MIGRATIONS)
+    with manager.connections.reader() as conn:
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(queue)')]
+        tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+    assert 'broken' not in columns
+    assert 'broken' not in tables
+    manager.cleanup()
+
+
+def write_in_child(db_manager, sample_value):
+    db_manager.queue.create("acab", "test_txid", "test_tkn", {}, sample_value, 1, 0)
+
+
+def test_closed_connections_reopen_in_a_forked_process(db_manager, sample_value):
+    assert db_manager.schema.version() == len(MIGRATIONS)
+    db_manager.connections.close()
+
+    process = multiprocessing.get_context('fork').Process(target=write_in_child, args=(db_manager, sample_value))
+    process.start()
+    process.join()
+    assert process.exitcode == 0
+    assert db_manager.queue.read("acab")['txid'] == "test_txid"
+
+
+def test_queue_order_columns(db_manager, sample_value):
+    sale = "fade" * 16
+    newm = "682fe60c9918842b3323c43b5144bc3d52a23bd2fb81345560d73f63"
+    datum = {"constructor": 0, "fields": [
+        {"constructor": 0, "fields": [{"bytes": "acab" * 14}, {"bytes": ""}]},
+        {"int": 5},
+        {"constructor": 0, "fields": [{"bytes": newm}, {"bytes": "4e45574d"}, {"int": 100}]},
+        {"bytes": sale},
+    ]}
+    db_manager.sale.create(sale, "sale_txid", {"constructor": 0, "fields": []}, sample_value)
+    db_manager.queue.create("acab", "test_txid", sale, datum, sample_value, 1, 0)
+    db_manager.queue.create("cafe", "test_txid2", sale, {"key": "value"}, sample_value, 2, 0)
+
+    with db_manager.connections.reader() as conn:
+        rows = dict((row[0], row[1:]) for row in conn.execute('SELECT tag, bundle_amount, incentive_amount, well_formed, valid, priority FROM queue'))
+    assert rows["acab"][:4] == (5, 100, 1, 1)
+    assert rows["acab"][4] is not None
+    # a datum that is not a queue datum is stored but never sorted
+    assert rows["cafe"][2:4] == (0, 0)
+
+    book = db_manager.read_order_book()
+    assert list(book[sale].orders) == ["acab"]
+    assert book[sale].orders["acab"]['datum'] == datum
@@ -0,0 +1,46 @@
+import os
+
+import pytest
+
+from src.fee import FeeEngine
+from src.tx_simulate import calculate_total_fee
+
+
+def file_path(name):
+    return os.path.join(os.path.dirname(__file__), 'test_files', name)
+
+
+@pytest.fixture
+def fees():
+    return FeeEngine.load(file_path('test_protocol.json'))
+
+
+# the answers of cardano-cli transaction calculate-min-fee in test_cli
+def test_min_fee_matches_the_cli(fees):
+    assert fees.min_fee_from_file(file_path('test_tx.draft')) == 180681
+
+
+def test_min_fee_of_a_conway_draft_matches_the_cli(fees):
+    # the draft has a zero fee so the fee field grows with the fee
+    assert fees.min_fee_from_file(file_path('test_tx3.draft')) == 239245
+
+
+def test_min_fee_with_reference_scripts_matches_the_cli(fees):
+    assert fees.min_fee_from_file(file_path('test_tx3.draft'), script_sizes=29266) == 689233
+
+
+def test_reference_scripts_are_priced_in_tiers(fees):
+    assert fees.reference_script_fee(9486) == 9486 * 15
+    assert fees.reference_script_fee(25600) == 25600 * 15
+    assert fees.reference_script_fee(25601) == 25600 * 15 + 18
+
+
+def test_execution_units_use_the_protocol_prices(fees):
+    units = [{'cpu': 1000000, 'mem': 10000}, {'cpu': 1, 'mem': 1}]
+    # 10001 * 0.0577 + 1000001 * 0.0000721 rounded up
+    assert fees.execution_fee(units) == 650
+    assert calculate_total_fee(100, units, fees) == 750
+
+
+def test_engine_is_loaded_once(fees):
+    assert FeeEngine.load(file_path('test_protocol.json')) is fees
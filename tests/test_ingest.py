@@ -0,0 +1,216 @@
+import json
+import os
+
+import pytest
+from loguru import logger
+
+from src.db_manager import DbManager
+from src.ingest import Ingest, load_events
+from src.parse import asset_list_to_value
+from tests.helpers import (CONFIG, block_end_event, synthetic_chain,
+                           tx_input_event, tx_output_event)
+
+
+@pytest.fixture
+def cleanup():
+    yield
+    if os.path.exists('test_ingest.db'):
+        os.remove('test_ingest.db')
+
+
+@pytest.fixture
+def config():
+    return dict(CONFIG)
+
+
+@pytest.fixture
+def db(cleanup, config):
+    manager = DbManager(db_file='test_ingest.db')
+    manager.initialize(config)
+    yield manager
+    manager.cleanup()
+
+
+@pytest.fixture
+def ingest(db, config):
+    return Ingest(db, config, logger)
+
+
+def test_events_are_staged_until_block_end(db, ingest):
+    committed = ingest.push(tx_output_event(1, "aa" * 32, 0, "addr_batcher", 5000000))
+    assert committed is None
+    assert db.batcher.read_all() == []
+    assert db.status.read()['block_number'] == 0
+
+    committed = ingest.push(block_end_event(1))
+    assert committed == 1
+    assert len(db.batcher.read_all()) == 1
+    assert db.status.read()['block_number'] == 1
+
+
+def test_new_block_number_commits_the_staged_block(db, ingest):
+    ingest.push(tx_output_event(1, "aa" * 32, 0, "addr_batcher", 5000000))
+    committed = ingest.push(tx_output_event(2, "bb" * 32, 0, "addr_batcher", 5000000))
+    assert committed == 1
+    assert len(db.batcher.read_all()) == 1
+    assert db.status.read()['block_number'] == 1
+
+    ingest.push(block_end_event(2))
+    assert len(db.batcher.read_all()) == 2
+    assert db.status.read()['block_number'] == 2
+
+
+def test_spend_inside_the_same_block(db, ingest):
+    ingest.push(tx_output_event(1, "aa" * 32, 0, "addr_batcher", 5000000))
+    ingest.push(tx_input_event(1, "aa" * 32, 0))
+    ingest.push(block_end_event(1))
+    assert db.batcher.read_all() == []
+
+
+def test_failed_block_does_not_move_status(db, ingest, monkeypatch):
+    def broken_update(*args):
+        raise RuntimeError("disk full")
+    monkeypatch.setattr(db.status, "update", broken_update)
+
+    ingest.push(tx_output_event(1, "aa" * 32, 0, "addr_batcher", 5000000))
+    with pytest.raises(RuntimeError):
+        ingest.push(block_end_event(1))
+    assert db.batcher.read_all() == []
+    assert db.status.read()['block_number'] == 0
+
+
+def test_malformed_event_is_skipped(db, ingest):
+    # a queue output without a datum can not be parsed
+    ingest.push(tx_output_event(1, "aa" * 32, 0, "addr_queue", 5000000))
+    ingest.push(tx_output_event(1, "aa" * 32, 1, "addr_batcher", 5000000))
+    assert ingest.push(block_end_event(1)) == 1
+    assert db.queue.read_all("") == []
+    assert len(db.batcher.read_all()) == 1
+
+
+def test_untracked_input_skips_the_db(db, ingest, monkeypatch):
+    def no_db(*args):
+        raise AssertionError("untracked inputs must not touch the db")
+    monkeypatch.setattr(db.batcher, "delete", no_db)
+    monkeypatch.setattr(db.sale, "delete", no_db)
+    monkeypatch.setattr(db.queue, "delete", no_db)
+    monkeypatch.setattr(db.vault, "delete", no_db)
+
+    ingest.push(tx_input_event(1, "cc" * 32, 0))
+    assert ingest.push(block_end_event(1)) == 1
+
+
+def test_tracked_outrefs_follow_the_db(db, ingest):
+    ingest.push(tx_output_event(1, "aa" * 32, 0, "addr_batcher", 5000000))
+    ingest.push(block_end_event(1))
+    assert "aa" * 32 + "#0" in db.tracked
+
+    ingest.push(tx_input_event(2, "aa" * 32, 0))
+    ingest.push(block_end_event(2))
+    assert "aa" * 32 + "#0" not in db.tracked
+
+
+def test_tracked_outrefs_are_rebuilt(db, ingest, config):
+    ingest.push(tx_output_event(1, "aa" * 32, 0, "addr_batcher", 5000000))
+    ingest.push(block_end_event(1))
+
+    restarted = DbManager(db_file='test_ingest.db')
+    restarted.initialize(config)
+    assert restarted.tracked == {"aa" * 32 + "#0"}
+    restarted.cleanup()
+
+
+def test_failed_block_restores_tracked_outrefs(db, ingest, monkeypatch):
+    def broken_update(*args):
+        raise RuntimeError("disk full")
+    monkeypatch.setattr(db.status, "update", broken_update)
+
+    ingest.push(tx_output_event(1, "aa" * 32, 0, "addr_batcher", 5000000))
+    with pytest.raises(RuntimeError):
+        ingest.push(block_end_event(1))
+    assert db.tracked == set()
+
+
+def test_unmatched_output_skips_parsing(db, ingest, monkeypatch):
+    def no_parse(*args):
+        raise AssertionError("unmatched outputs must not be parsed")
+    monkeypatch.setattr("src.io_manager.asset_list_to_value", no_parse)
+
+    ingest.push(tx_output_event(1, "aa" * 32, 0, "addr_someone", 5000000))
+    assert ingest.push(block_end_event(1)) == 1
+    assert db.batcher.read_all() == []
+
+
+def test_shared_address_runs_every_handler(db, config, monkeypatch):
+    config["data_address"] = config["oracle_address"]
+    ingest = Ingest(db, config, logger)
+    assert len(ingest.io.handlers["addr_oracle"]) == 2
+
+    parsed = []
+
+    def counting(assets):
+        parsed.append(assets)
+        return asset_list_to_value(assets)
+    monkeypatch.setattr("src.io_manager.asset_list_to_value", counting)
+
+    assets = [{"policy": "fade", "asset": "fade", "amount": 1}]
+    ingest.push(tx_output_event(1, "aa" * 32, 0, "addr_oracle", 5000000, assets, {"int": 1}))
+    ingest.push(block_end_event(1))
+    assert len(parsed) == 1
+    assert db.data.read()['txid'] == "aa" * 32 + "#0"
+
+
+def test_feed_commits_every_block_in_the_batch(db, ingest):
+    committed = ingest.feed(synthetic_chain(1, 50, "addr_batcher"))
+    assert committed == list(range(1, 51))
+    assert db.status.read()['block_number'] == 50
+    # only the outputs of the last block are unspent
+    assert sorted(b['txid'] for b in db.batcher.read_all()) == [f"{50:064x}#0", f"{50:064x}#1"]
+
+
+def test_feed_leaves_an_unfinished_block_staged(db, ingest):
+    events = synthetic_chain(1, 2, "addr_batcher")
+    events.pop()  # no block end for block 2
+    assert ingest.feed(events) == [1]
+    assert db.status.read()['block_number'] == 1
+    assert ingest.push(block_end_event(2)) == 2
+
+
+def test_reset_drops_the_staged_block(db, ingest):
+    events = synthetic_chain(1, 2, "addr_batcher")
+    events.pop()  # no block end for block 2
+    ingest.feed(events)
+    ingest.reset()
+    assert ingest.events == [] and ingest.block is None
+    # the staged outputs of block 2 are sent again by the stream
+    assert ingest.push(block_end_event(2)) == 2
+    assert sorted(b['txid'] for b in db.batcher.read_all()) == [f"{1:064x}#0", f"{1:064x}#1"]
+
+
+def test_failed_batch_applies_nothing(db, ingest, monkeypatch):
+    update = db.status.update
+
+    def broken_update(block_number, *args):
+        if block_number == 3:
+            raise RuntimeError("disk full")
+        update(block_number, *args)
+    monkeypatch.setattr(db.status, "update", broken_update)
+
+    with pytest.raises(RuntimeError):
+        ingest.feed(synthetic_chain(1, 5, "addr_batcher"))
+    assert db.status.read()['block_number'] == 0
+    assert db.batcher.read_all() == []
+    assert db.tracked == set()
+    assert ingest.events == []
+
+
+def test_load_events_formats():
+    events = synthetic_chain(1, 2, "addr_batcher")
+    array = json.dumps(events)
+    ndjson = "\n".join(json.dumps(event) for event in events) + "\n"
+    assert load_events(array) == events
+    assert load_events(ndjson.encode()) == events
+    assert load_events(json.dumps(events[0])) == [events[0]]
+    assert load_events(b"  ") == []
+    with pytest.raises(ValueError):
+        load_events("{not json")
@@ -0,0 +1,80 @@
+import json
+import os
+import socket
+import tempfile
+import threading
+
+import cbor2
+import pytest
+
+from src.cbor import txid_from_cbor
+from src.mempool import MempoolView, TxMonitor
+
+
+@pytest.fixture
+def signed_tx():
+    with open(os.path.join(os.path.dirname(__file__), 'test_files', 'test_tx.signed')) as f:
+        return bytes.fromhex(json.load(f)['cborHex'])
+
+
+def node(path: str, txs: list, segment: int = 5) -> threading.Thread:
+    # answers one handshake and one local tx monitor snapshot, in small segments
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(1)
+
+    def send(conn, protocol, message):
+        payload = cbor2.dumps(message)
+        for i in range(0, len(payload), segment):
+            chunk = payload[i:i + segment]
+            conn.sendall((0).to_bytes(4, 'big') + (protocol | 0x8000).to_bytes(2, 'big') + len(chunk).to_bytes(2, 'big') + chunk)
+
+    def receive(conn):
+        header = conn.recv(8, socket.MSG_WAITALL)
+        payload = conn.recv(int.from_bytes(header[6:8], 'big'), socket.MSG_WAITALL)
+        return int.from_bytes(header[4:6], 'big'), cbor2.loads(payload)
+
+    def serve():
+        conn, _ = server.accept()
+        _, (_, versions) = receive(conn)
+        version = max(versions)
+        send(conn, 0, [1, version, versions[version]])
+        remaining = list(txs)
+        while True:
+            protocol, message = receive(conn)
+            assert protocol == 9
+            if message == [1]:
+                send(conn, 9, [2, 1234])
+            elif message == [5]:
+                send(conn, 9, [6, [6, cbor2.CBORTag(24, remaining.pop(0))]] if remaining else [6])
+            elif message == [0]:
+                break
+        conn.close()
+        server.close()
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_monitor_reads_the_whole_mempool(signed_tx):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "node.socket")
+        thread = node(path, [signed_tx])
+        monitor = TxMonitor(path, 1)
+        assert monitor.txids() == {txid_from_cbor(signed_tx)}
+        monitor.close()
+        thread.join(5)
+
+
+def test_view_is_read_once_per_round(signed_tx):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "node.socket")
+        thread = node(path, [signed_tx])
+        view = MempoolView({"socket_path": path, "network": "--testnet-magic 1", "cli_path": "cardano-cli"}, os.path.join(tmp, "mempool.json"))
+        assert view.contains(txid_from_cbor(signed_tx)) is True
+        thread.join(5)
+        # the node is gone but the snapshot answers the rest of the round
+        assert view.contains("acab" * 16) is False
+        view.add("acab" * 16)
+        assert view.contains("acab" * 16) is True
@@ -0,0 +1,125 @@
+import os
+import random
+
+import pytest
+from loguru import logger
+
+from src.db_manager import DbManager
+from src.ingest import Ingest
+from src.order_book import OrderBook
+from src.sorting import Sorting
+from tests.helpers import (ADA, CONFIG, NEWM, block_end_event, queue_datum,
+                           tx_input_event, tx_output_event)
+
+
+@pytest.fixture
+def db():
+    manager = DbManager(db_file='test_order_book.db')
+    manager.initialize(CONFIG)
+    yield manager
+    manager.cleanup()
+    os.remove('test_order_book.db')
+
+
+def test_orders_are_placed_in_fifo_order():
+    book = OrderBook()
+    book.add_sale("aa", "aa#0")
+    orders = [
+        ("acab", 2, 4, 4, 1),
+        ("cafe", 0, 0, 2, 0),
+        ("fade", 2, 0, 1, 2),
+        ("beef", 2, 2, 5, 0),
+        ("dead", 0, 1, 1, 1),
+        ("face", 1, 0, 2, 0),
+    ]
+    for tag, timestamp, tx_idx, incentive, priority in orders:
+        book.add("aa", tag, timestamp, tx_idx, incentive, priority)
+    assert book.snapshot() == Sorting.fifo_sort({"aa": orders})
+
+    assert book.remove("beef") is True
+    assert book.remove("beef") is False
+    assert [order[0] for order in book.snapshot()["aa"]] == ["cafe", "face", "acab", "dead", "fade"]
+
+
+def test_only_live_sales_are_in_the_snapshot():
+    book = OrderBook()
+    # an order can show up before its sale
+    book.add("aa", "acab", 0, 0, 1, 0)
+    assert book.snapshot() == {}
+
+    book.add_sale("bb", "bb#0")
+    book.add_sale("aa", "aa#0")
+    assert book.snapshot() == {"aa": [("acab", 0, 0, 1, 0)], "bb": []}
+    assert list(book.snapshot()) == ["aa", "bb"]
+
+    # the sale is spent and recreated, the orders stay with the tkn
+    book.add_sale("aa", "aa#1")
+    book.remove_sale("aa#0")
+    assert "aa" in book.snapshot()
+    book.remove_sale("aa#1")
+    assert book.snapshot() == {"bb": []}
+
+
+def test_snapshot_is_not_changed_by_later_orders():
+    book = OrderBook()
+    book.add_sale("aa", "aa#0")
+    book.add("aa", "acab", 0, 0, 1, 0)
+    snapshot = book.snapshot()
+    book.add("aa", "cafe", 0, 0, 9, 0)
+    book.remove("acab")
+    assert snapshot == {"aa": [("acab", 0, 0, 1, 0)]}
+
+
+def test_ingested_orders_match_the_db(db):
+    ingest = Ingest(db, CONFIG, logger)
+    rng = random.Random(7)
+    sales = [f"{i:064x}" for i in range(3)]
+    live = []
+    for block_number in range(1, 30):
+        events = []
+        for idx in range(4):
+            tx_hash = f"{block_number:032x}{idx:032x}"
+            if block_number % 10 == 1 and idx < len(sales):
+                # the sales are spent and recreated every so often
+                sale = sales[idx]
+                events.append(tx_output_event(block_number, tx_hash, 0, "addr_sale", 5000000, [{"policy": "acab", "asset": sale, "amount": 1}], {"int": 1}, idx))
+                continue
+            incentive = rng.choice((NEWM, ADA, ("dead", "beef")))
+            datum = queue_datum(rng.choice(sales), incentive, rng.randrange(3))
+            events.append(tx_output_event(block_number, tx_hash, 0, "addr_queue", 5000000, [], datum, idx))
+            live.append((tx_hash, 0))
+        # spend a few of the live orders
+        for _ in range(2):
+            if live:
+                tx_id, index = live.pop(rng.randrange(len(live)))
+                events.insert(0, tx_input_event(block_number, tx_id, index))
+        events.append(block_end_event(block_number))
+        ingest.feed(events)
+        assert db.order_book.snapshot() == Sorting.fifo(db)
+
+    assert len(db.order_book) > 0
+    # a restart builds the same book from the db
+    rebuilt = DbManager(db_file='test_order_book.db')
+    rebuilt.load_order_book()
+    assert rebuilt.order_book.snapshot() == db.order_book.snapshot()
+    rebuilt.cleanup()
+
+
+def test_failed_batch_rebuilds_the_book(db):
+    ingest = Ingest(db, CONFIG, logger)
+    sale = "aa" * 32
+    ingest.feed([
+        tx_output_event(1, "aa" * 32, 0, "addr_sale", 5000000, [{"policy": "acab", "asset": sale, "amount": 1}], {"int": 1}),
+        block_end_event(1),
+    ])
+
+    def failing_status(*args):
+        raise RuntimeError("disk full")
+
+    db.status.update = failing_status
+    with pytest.raises(RuntimeError):
+        ingest.feed([
+            tx_output_event(2, "bb" * 32, 0, "addr_queue", 5000000, [], queue_datum(sale, NEWM, 1)),
+            block_end_event(2),
+        ])
+    assert db.order_book.snapshot() == {sale: []}
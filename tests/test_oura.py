@@ -0,0 +1,38 @@
+import json
+import os
+import threading
+
+from src.oura import read_batches
+from tests.helpers import synthetic_chain
+
+
+def write_lines(fd, events):
+    with os.fdopen(fd, 'wb') as pipe:
+        for event in events:
+            pipe.write(json.dumps(event).encode() + b"\n")
+
+
+def test_read_batches_yields_every_event_in_order():
+    events = synthetic_chain(1, 200, "addr_batcher")
+    read_fd, write_fd = os.pipe()
+    writer = threading.Thread(target=write_lines, args=(write_fd, events))
+    writer.start()
+    with os.fdopen(read_fd, 'rb') as stream:
+        batches = list(read_batches(stream, batch_size=64))
+    writer.join()
+    assert [event for batch in batches for event in batch] == events
+    assert all(len(batch) <= 64 for batch in batches)
+
+
+def test_read_batches_flushes_when_caught_up():
+    events = synthetic_chain(1, 1, "addr_batcher")
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, b"".join(json.dumps(event).encode() + b"\n" for event in events))
+    with os.fdopen(read_fd, 'rb') as stream:
+        batches = read_batches(stream, batch_size=1000)
+        # oura is still running but has nothing more to send
+        assert next(batches) == events
+        os.write(write_fd, b'{"variant": "BlockEnd"')
+        os.close(write_fd)
+        # the cut off line is dropped when oura stops
+        assert list(batches) == []
@@ -0,0 +1,106 @@
+import os
+
+import pytest
+from loguru import logger
+
+from src.db_manager import DbManager
+from src.ingest import Ingest
+from src.round_state import RoundState
+from src.utility import current_time
+from tests.helpers import (CONFIG, NEWM, block_end_event, queue_datum,
+                           tx_input_event, tx_output_event)
+
+
+@pytest.fixture
+def db():
+    manager = DbManager(db_file='test_round_state.db')
+    manager.initialize(CONFIG)
+    yield manager
+    manager.cleanup()
+    os.remove('test_round_state.db')
+
+
+def test_failures_are_skipped_until_the_sale_changes():
+    rounds = RoundState()
+    state = rounds.state("aa")
+    rounds.fail("aa", state, "acab")
+    rounds.fail("bb", rounds.state("bb"))
+    assert rounds.failed("aa", "acab") is True
+    assert rounds.failed("aa", "cafe") is False
+    assert rounds.failed("aa") is False
+    assert rounds.failed("bb") is True
+
+    rounds.touch("aa")
+    assert rounds.failed("aa", "acab") is False
+    assert rounds.failed("bb") is True
+
+    rounds.touch_all()
+    assert rounds.failed("bb") is False
+
+
+def test_failure_read_before_a_change_does_not_stick():
+    rounds = RoundState()
+    states = rounds.snapshot()
+    # the sale changes while the round is still working on the old records
+    rounds.touch("aa")
+    rounds.fail("aa", RoundState.state_of(states, "aa"), "acab")
+    assert rounds.failed("aa", "acab") is False
+
+
+def test_failures_are_retried_after_a_while(monkeypatch):
+    rounds = RoundState()
+    rounds.fail("aa", rounds.state("aa"), "acab")
+    monkeypatch.setattr(RoundState, "RETRY_AFTER", -1)
+    assert rounds.failed("aa", "acab") is False
+
+
+def test_ingest_marks_what_changed(db):
+    ingest = Ingest(db, CONFIG, logger)
+    sale = "aa" * 32
+    other = "bb" * 32
+    ingest.feed([
+        tx_output_event(1, "aa" * 32, 0, "addr_sale", 5000000, [{"policy": "acab", "asset": sale, "amount": 1}], {"int": 1}),
+        tx_output_event(1, "bb" * 32, 0, "addr_sale", 5000000, [{"policy": "acab", "asset": other, "amount": 1}], {"int": 1}),
+        tx_output_event(1, "cc" * 32, 0, "addr_queue", 5000000, [], queue_datum(sale, NEWM, 1)),
+        block_end_event(1),
+    ])
+
+    version = db.round_state.snapshot()
+    ingest.feed([
+        tx_input_event(2, "cc" * 32, 0),
+        block_end_event(2),
+    ])
+    assert db.round_state.state(sale) != RoundState.state_of(version, sale)
+    assert db.round_state.state(other) == RoundState.state_of(version, other)
+
+    # a new batcher utxo can change every sale
+    ingest.feed([
+        tx_output_event(3, "dd" * 32, 0, "addr_batcher", 5000000),
+        block_end_event(3),
+    ])
+    assert db.round_state.state(other) != RoundState.state_of(version, other)
+
+
+def test_round_is_due_after_a_change_or_a_wait():
+    rounds = RoundState()
+    assert rounds.due() is True
+    rounds.begin()
+    assert rounds.due() is False
+
+    rounds.touch("aa")
+    assert rounds.due() is True
+    rounds.begin()
+
+    rounds.wait_until(current_time() - 1)
+    assert rounds.due() is True
+    rounds.begin()
+    rounds.wait_until(current_time() + 60000)
+    assert rounds.due() is False
+
+    # a skipped failure keeps its retry waited on
+    state = rounds.begin()
+    rounds.fail("aa", RoundState.state_of(state, "aa"), "acab")
+    rounds.begin()
+    assert rounds.wake is None
+    assert rounds.failed("aa", "acab") is True
+    assert rounds.wake is not None
@@ -0,0 +1,125 @@
+import asyncio
+import json
+import os
+
+import pytest
+from loguru import logger
+
+from src.db_manager import DbManager
+from src.ingest import Ingest
+from src.server import IngestServer
+from tests.helpers import CONFIG, http_post, synthetic_chain
+
+
+@pytest.fixture
+def cleanup():
+    yield
+    if os.path.exists('test_server.db'):
+        os.remove('test_server.db')
+
+
+@pytest.fixture
+def config():
+    return dict(CONFIG)
+
+
+@pytest.fixture
+def db(cleanup, config):
+    manager = DbManager(db_file='test_server.db')
+    manager.initialize(config)
+    yield manager
+    manager.cleanup()
+
+
+def serve(db, config, client, queue_size=1024):
+    # run the server on a free port with the client coroutine against it
+    committed = []
+
+    async def main():
+        server = IngestServer(Ingest(db, config, logger), logger, committed.append, queue_size=queue_size)
+        await server.start('127.0.0.1', 0)
+        reader, writer = await asyncio.open_connection('127.0.0.1', server.port())
+        try:
+            return await client(reader, writer)
+        finally:
+            writer.close()
+            await server.stop()
+
+    return asyncio.run(main()), committed
+
+
+def test_webhook_events_are_applied(db, config):
+    events = synthetic_chain(1, 20, "addr_batcher")
+
+    async def client(reader, writer):
+        return [await http_post(reader, writer, '/webhook', json.dumps(event).encode()) for event in events]
+
+    responses, committed = serve(db, config, client, queue_size=8)
+    assert responses == [(200, b'Webhook Successful')] * len(events)
+    assert db.status.read()['block_number'] == 20
+    assert committed[-1] == 20
+    assert sorted(b['txid'] for b in db.batcher.read_all()) == [f"{20:064x}#0", f"{20:064x}#1"]
+
+
+def test_batch_endpoint_accepts_ndjson(db, config):
+    events = synthetic_chain(1, 5, "addr_batcher")
+    body = b"\n".join(json.dumps(event).encode() for event in events)
+
+    async def client(reader, writer):
+        return await http_post(reader, writer, '/webhook/batch', body)
+
+    response, committed = serve(db, config, client)
+    assert response == (200, b'Webhook Successful')
+    assert db.status.read()['block_number'] == 5
+
+
+def test_chunked_body(db, config):
+    event = json.dumps(synthetic_chain(1, 1, "addr_batcher")[-1]).encode()
+
+    async def client(reader, writer):
+        writer.write(
+            b"POST /webhook HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n"
+            + f"{len(event[:10]):x}\r\n".encode() + event[:10] + b"\r\n"
+            + f"{len(event[10:]):x}\r\n".encode() + event[10:] + b"\r\n0\r\n\r\n"
+        )
+        await writer.drain()
+        return await reader.readuntil(b"Webhook Successful")
+
+    response, committed = serve(db, config, client)
+    assert response.startswith(b"HTTP/1.1 200 OK")
+    assert committed == [1]
+
+
+@pytest.mark.parametrize("path, body, status", [
+    ('/webhook', b'{not json', 400),
+    ('/other', b'{}', 404),
+    ('/webhook', b'[1]', 400),
+    ('/webhook/batch', b'[1]', 400),
+    ('/webhook', b'{"variant": "TxInput", "context": 1}', 400),
+    ('/webhook', b'{"variant": ["TxInput"]}', 400),
+])
+def test_bad_requests(db, config, path, body, status):
+    async def client(reader, writer):
+        return await http_post(reader, writer, path, body)
+
+    response, committed = serve(db, config, client)
+    assert response[0] == status
+    assert db.status.read()['block_number'] == 0
+
+
+def test_bad_event_does_not_stop_the_writer(db, config):
+    event = json.dumps(synthetic_chain(1, 1, "addr_batcher")[-1]).encode()
+
+    async def client(reader, writer):
+        bad = await http_post(reader, writer, '/webhook/batch', b'[{"variant": "TxInput", "context": []}]')
+        # the bad request closes its connection so post on a new one
+        reader, writer = await asyncio.open_connection(*writer.get_extra_info('peername'))
+        try:
+            return bad, await http_post(reader, writer, '/webhook', event)
+        finally:
+            writer.close()
+
+    (bad, good), committed = serve(db, config, client)
+    assert bad[0] == 400
+    assert good == (200, b'Webhook Successful')
+    assert committed == [1]
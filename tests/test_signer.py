@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+
+import cbor2
+import pytest
+from nacl.bindings import crypto_scalarmult_ed25519_base_noclamp
+from nacl.signing import VerifyKey
+
+from src.cbor import txid_from_cbor
+from src.json_file import write
+from src.signer import Signer
+
+
+def file_path(name):
+    return os.path.join(os.path.dirname(__file__), 'test_files', name)
+
+
+def cbor_hex(name):
+    with open(file_path(name), 'r') as file:
+        return bytes.fromhex(json.load(file)['cborHex'])
+
+
+@pytest.fixture
+def extended_skey(tmp_path):
+    # an extended key like the setup script converts, with a clamped secret
+    secret = bytearray(hashlib.sha512(b"collat").digest())
+    secret[0] &= 0xf8
+    secret[31] = (secret[31] & 0x1f) | 0x40
+    public = crypto_scalarmult_ed25519_base_noclamp(bytes(secret[:32]))
+    payload = bytes(secret) + public + bytes(32)
+    skey = str(tmp_path / "collat.skey")
+    write({
+        "type": "PaymentExtendedSigningKeyShelley_ed25519_bip32",
+        "description": "",
+        "cborHex": cbor2.dumps(payload).hex(),
+    }, skey)
+    return skey
+
+
+def verify(tx):
+    body, witnesses, _, _ = cbor2.loads(tx)
+    tx_hash = bytes.fromhex(txid_from_cbor(tx))
+    for vkey, signature in witnesses[0]:
+        VerifyKey(vkey).verify(tx_hash, signature)
+    return witnesses
+
+
+def test_sign_a_babbage_draft():
+    draft = cbor_hex('test_tx.draft')
+    tx = Signer(file_path('test_payment.skey')).sign(draft, conway=False)
+    witnesses = verify(tx)
+    assert len(witnesses[0]) == 1
+    # the cli signed the same draft with another key
+    assert len(tx) == len(cbor_hex('test_tx.signed'))
+    assert txid_from_cbor(tx) == txid_from_cbor(draft)
+
+
+def test_sign_a_conway_draft_with_both_keys(extended_skey):
+    draft = cbor_hex('test_tx3.draft')
+    tx = Signer(file_path('test_payment.skey'), extended_skey).sign(draft)
+    witnesses = verify(tx)
+    assert len(witnesses[0]) == 2
+    # the redeemers are kept and the vkey witnesses are a tagged set first
+    assert witnesses[5] == cbor2.loads(draft)[1][5]
+    assert txid_from_cbor(tx) == txid_from_cbor(draft)
+    assert b'\xa2\x00\xd9\x01\x02\x82' in tx
+
+
+def test_same_key_is_one_witness():
+    signer = Signer(file_path('test_payment.skey'), file_path('test_payment.skey'))
+    assert len(signer.keys) == 1
+
+
+def test_sign_a_signed_tx():
+    with pytest.raises(ValueError):
+        Signer(file_path('test_payment.skey')).sign(cbor_hex('test_tx.signed'), conway=False)
+
+
+def test_sign_file_writes_a_witnessed_envelope(tmp_path):
+    signed_file = str(tmp_path / "tx.signed")
+    tx = Signer(file_path('test_payment.skey')).sign_file(file_path('test_tx3.draft'), signed_file)
+    with open(signed_file, 'r') as file:
+        envelope = json.load(file)
+    assert envelope['type'] == "Witnessed Tx ConwayEra"
+    assert envelope['cborHex'] == tx.hex()
+
+
+def test_keys_are_loaded_once():
+    signer = Signer.load(file_path('test_payment.skey'))
+    assert Signer.load(file_path('test_payment.skey')) is signer
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+from loguru import logger
+
+from src.db_manager import DbManager
+from src.ingest import Ingest
+from src.slot import SlotConverter, network_magic, slot_converter
+from tests.helpers import CONFIG, block_end_event, tx_output_event
+
+
+def oracle_datum(start_time, end_time):
+    return {"constructor": 0, "fields": [{"constructor": 2, "fields": [{"map": [
+        {"k": {"int": 0}, "v": {"int": 300000}},
+        {"k": {"int": 1}, "v": {"int": start_time}},
+        {"k": {"int": 2}, "v": {"int": end_time}},
+    ]}]}]}
+
+
+@pytest.fixture
+def db():
+    manager = DbManager(db_file='test_slot.db')
+    manager.initialize(CONFIG)
+    yield manager
+    manager.cleanup()
+    os.remove('test_slot.db')
+
+
+def test_network_magic():
+    assert network_magic("--mainnet") == 764824073
+    assert network_magic("--testnet-magic 1") == 1
+
+
+def test_slots_match_the_cli():
+    # cardano-cli query slot-number answers on preprod
+    slots = SlotConverter.for_network("--testnet-magic 1")
+    assert slots.slot(1722466813112) == 66783613
+    assert slots.slot(1722466813112, 21) == 66783634
+    assert slots.slot(1722466813112, -21) == 66783592
+    assert slots.unix_time(66783613) == 1722466813000
+
+
+def test_unknown_networks_are_calibrated_once(monkeypatch):
+    calls = []
+
+    def query(socket, unix_time, network, cli_path):
+        calls.append(unix_time)
+        return 1000
+
+    monkeypatch.setattr("src.slot.query_slot_number", query)
+    config = {"network": "--testnet-magic 4", "socket_path": "node.socket", "cli_path": "cardano-cli"}
+    slots = slot_converter(config)
+    assert slots.slot(calls[0]) == 1000
+    assert slots.slot(calls[0] + 5000) == 1005
+    assert slot_converter(config) is slots
+    assert len(calls) == 1
+
+
+def test_oracle_slots_are_stored_at_ingest(db):
+    Ingest(db, {**CONFIG, "network": "--testnet-magic 1"}, logger).feed([
+        tx_output_event(1, "aa" * 32, 0, "addr_oracle", 5000000, [{"policy": "cafe", "asset": "cafe", "amount": 1}], oracle_datum(1722466813112, 1722467813112)),
+        block_end_event(1),
+    ])
+    record = db.oracle.read()
+    assert record['start_slot'] == 66783613
+    assert record['end_slot'] == 66784613
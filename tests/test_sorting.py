@@ -1,6 +1,14 @@
+import os
+import sqlite3
+
 import pytest
 
+from src.allowlist import allowed
+from src.datums import get_incentive_amount, queue_validity
+from src.db_manager import DbManager
 from src.sorting import Sorting
+from src.value import Value
+from tests.helpers import CONFIG
 
 
 @pytest.fixture
@@ -109,3 +117,90 @@ def test_sort_many_incentive(single_sale_many_incentive):
         ]
     }
     assert result == answer
+
+
+NEWM = ("682fe60c9918842b3323c43b5144bc3d52a23bd2fb81345560d73f63", "4e45574d")
+ADA = ("", "")
+
+
+def queue_datum(pointer, incentive, amount, bundle=1):
+    return {"constructor": 0, "fields": [
+        {"constructor": 0, "fields": [{"bytes": "acab" * 14}, {"bytes": ""}]},
+        {"int": bundle},
+        {"constructor": 0, "fields": [{"bytes": incentive[0]}, {"bytes": incentive[1]}, {"int": amount}]},
+        {"bytes": pointer},
+    ]}
+
+
+@pytest.fixture
+def db():
+    manager = DbManager(db_file='test_sorting.db')
+    manager.initialize(CONFIG)
+    yield manager
+    manager.cleanup()
+    os.remove('test_sorting.db')
+
+
+def test_fifo_from_the_db(db):
+    sales = ["aa" * 32, "bb" * 32, "cc" * 32]
+    for sale in sales:
+        db.sale.create(sale, sale + "#0", {}, Value({"lovelace": 1}))
+
+    orders = [
+        # (sale, incentive, amount, timestamp, tx_idx)
+        (sales[0], NEWM, 5, 3, 0),
+        (sales[0], ADA, 9, 1, 0),
+        (sales[0], NEWM, 5, 2, 1),
+        (sales[0], NEWM, 7, 4, 0),
+        (sales[0], NEWM, 5, 2, 0),
+        (sales[1], ADA, 2, 1, 0),
+        (sales[1], ("dead", "beef"), 100, 0, 0),
+        (sales[1], NEWM, 0, 0, 0),
+    ]
+    expected = {sale: [] for sale in sales}
+    for i, (sale, incentive, amount, timestamp, tx_idx) in enumerate(orders):
+        datum = queue_datum(sale, incentive, amount)
+        db.queue.create(f"{i:064x}", f"{i:064x}#0", sale, datum, Value({"lovelace": 1}), timestamp, tx_idx)
+        # what the sort did before the columns existed
+        if queue_validity(datum):
+            expected[sale].append((f"{i:064x}", timestamp, tx_idx) + get_incentive_amount(datum))
+
+    assert Sorting.fifo(db) == Sorting.fifo_sort(expected)
+    assert [order[0] for order in Sorting.fifo(db)[sales[0]]] == [f"{i:064x}" for i in (3, 4, 2, 0, 1)]
+    assert Sorting.fifo(db)[sales[2]] == []
+
+
+def test_fifo_follows_the_allowlist(db, monkeypatch):
+    sale = "aa" * 32
+    db.sale.create(sale, sale + "#0", {}, Value({"lovelace": 1}))
+    db.queue.create("acab", "acab#0", sale, queue_datum(sale, ("dead", "beef"), 1), Value({"lovelace": 1}), 0, 0)
+    assert Sorting.fifo(db) == {sale: []}
+
+    monkeypatch.setitem(allowed, "dead", {"beef": {"priority": 2, "threshold": 1}})
+    monkeypatch.setattr("src.db.queue_db_manager.policy_ids", list(allowed))
+    monkeypatch.setattr("src.db.queue_db_manager.asset_names", [next(iter(allowed[key])) for key in allowed])
+    db.queue.refresh_validity()
+    assert Sorting.fifo(db) == {sale: [("acab", 0, 0, 1, 2)]}
+
+
+def test_fifo_reads_the_order_index(db):
+    conn = sqlite3.connect('test_sorting.db')
+    plan = conn.execute('EXPLAIN QUERY PLAN SELECT tag FROM queue WHERE tkn = ? AND valid = 1 ORDER BY priority, incentive_amount DESC, timestamp, tx_idx', ("acab",)).fetchall()
+    conn.close()
+    assert "COVERING INDEX queue_order_idx" in str(plan)
+    assert "TEMP B-TREE" not in str(plan)
+
+
+def test_order_book_is_one_read(db):
+    sales = ["aa" * 32, "bb" * 32]
+    for sale in sales:
+        db.sale.create(sale, sale + "#0", {}, Value({"lovelace": 1}))
+    for i, (sale, incentive, amount) in enumerate([(sales[0], NEWM, 1), (sales[0], ADA, 5), (sales[0], NEWM, 3), (sales[0], ("dead", "beef"), 9)]):
+        db.queue.create(f"{i:064x}", f"{i:064x}#0", sale, queue_datum(sale, incentive, amount), Value({"lovelace": 1}), i, 0)
+
+    book = db.read_order_book()
+    assert list(book) == sales
+    assert book[sales[0]].sale == db.sale.read(sales[0])
+    assert list(book[sales[0]].orders) == [f"{i:064x}" for i in (2, 0, 1)]
+    assert book[sales[0]].orders[f"{0:064x}"] == db.queue.read(f"{0:064x}")
+    assert book[sales[1]].orders == {}
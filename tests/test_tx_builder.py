@@ -0,0 +1,315 @@
+import json
+import os
+import subprocess
+
+import cbor2
+import pytest
+from pycardano import Address
+
+from src import cli
+from src.address import pkh_from_address
+from src.cbor import cbor_to_datum, plutus_data_to_cbor, txid_from_cbor
+from src.fee import FeeEngine
+from src.json_file import write
+from src.redeemer import empty, token, tokens
+from src.tx_builder import TxBuilder, language_views
+from src.tx_simulate import convert_execution_unit
+from src.value import Value
+
+CLI = "/usr/local/bin/cardano-cli"
+ADDRESS = "addr_test1vrs4fk7ea6rg2fvd00sa8um5unp0rt474kngwpc38v2z9vqujprdk"
+SCRIPT_ADDRESS = "addr_test1wrwamhwamhwamhwamhwamhwamhwamhwamhwamhwamhwamhgxl2v20"
+PKH = pkh_from_address(ADDRESS)
+POLICY = "769c4c6e9bc3ba5406b9b89fb7beb6819e638ff2e2de63f008d5bcff"
+TOKEN = "744e45574d"
+
+
+def file_path(name):
+    return os.path.join(os.path.dirname(__file__), 'test_files', name)
+
+
+def outref(txin):
+    return txin[0].hex() + "#" + str(txin[1])
+
+
+def to_value(value):
+    if isinstance(value, int):
+        return Value({"lovelace": value})
+    inner = {"lovelace": value[0]}
+    for policy, assets in value[1].items():
+        inner[policy.hex()] = {name.hex(): amount for name, amount in assets.items()}
+    return Value(inner)
+
+
+@pytest.fixture
+def draft():
+    with open(file_path('test_tx3.draft'), 'r') as file:
+        return bytes.fromhex(json.load(file)['cborHex'])
+
+
+@pytest.fixture
+def builder(draft):
+    # rebuild the cardano-cli draft from its parts, it was built with plutus v2
+    body, witnesses, _, _ = cbor2.loads(draft)
+    fees = FeeEngine.load(file_path('test_protocol.json'))
+    tx = TxBuilder(language_views(fees.cost_models['PlutusV2'], "PlutusV2"))
+    script_reference = outref(sorted(body[18])[0])
+    for index, txin in enumerate(sorted(body[0])):
+        if (0, index) in witnesses[5]:
+            data, (mem, steps) = witnesses[5][(0, index)]
+            redeemer = cbor_to_datum(cbor2.dumps(data))
+            tx.add_script_input(outref(txin), script_reference, redeemer, {'mem': mem, 'cpu': steps})
+        else:
+            tx.add_input(outref(txin))
+    for txin in body[18]:
+        tx.add_reference_input(outref(txin))
+    for txin in body[13]:
+        tx.add_collateral(outref(txin))
+    for output in body[1]:
+        if isinstance(output, list):
+            tx.add_output(Address.from_primitive(output[0]).encode(), to_value(output[1]))
+        else:
+            tx.add_output(Address.from_primitive(output[0]).encode(), to_value(output[1]), cbor_to_datum(output[2][1].value))
+    tx.set_validity(body[8], body[3])
+    for pkh in body[14]:
+        tx.add_required_signer(pkh.hex())
+    tx.fee = body[2]
+    return tx
+
+
+def test_builder_matches_the_cli(builder, draft):
+    assert builder.to_cbor() == draft
+    assert builder.txid() == txid_from_cbor(draft)
+
+
+def test_rebuild_only_changes_the_fee_and_units(builder, draft):
+    fields = builder.encode_fields()
+    txin = builder.script_inputs[0].txin
+    builder.set_execution_units(txin, {'mem': 1234, 'cpu': 5678})
+    builder.fee = 250000
+    assert builder.encode_fields() is fields
+
+    tx = cbor2.loads(builder.to_cbor())
+    before = cbor2.loads(draft)
+    assert tx[0][2] == 250000
+    assert tx[0][11] != before[0][11]
+    assert {key: value for key, value in tx[0].items() if key not in (2, 11)} == {key: value for key, value in before[0].items() if key not in (2, 11)}
+    assert [1234, 5678] in [units for _, units in tx[1][5].values()]
+
+
+def test_write_is_a_build_raw_envelope(builder, draft, tmp_path):
+    out_file = str(tmp_path / "tx.draft")
+    assert builder.write(out_file) == draft.hex()
+    with open(out_file, 'r') as file:
+        envelope = json.load(file)
+    assert envelope['type'] == "Unwitnessed Tx ConwayEra"
+    assert envelope['cborHex'] == draft.hex()
+
+
+def test_plain_transaction_has_no_redeemers():
+    tx = TxBuilder()
+    tx.add_input("aa" * 32 + "#1")
+    tx.add_input("aa" * 32 + "#0")
+    tx.add_output("addr_test1vrs4fk7ea6rg2fvd00sa8um5unp0rt474kngwpc38v2z9vqujprdk", Value({"lovelace": 5000000}))
+    tx.fee = 170000
+    body, witnesses, valid, data = cbor2.loads(tx.to_cbor())
+    # the inputs are a tagged set sorted by outref
+    txid = bytes.fromhex("aa" * 32)
+    assert tx.encode_fields()[0].hex() == "d90102" + cbor2.dumps([[txid, 0], [txid, 1]]).hex()
+    assert body[2] == 170000
+    assert 11 not in body
+    assert witnesses == {}
+    assert valid is True and data is None
+
+
+def test_plutus_data_uses_definite_empty_lists():
+    assert plutus_data_to_cbor({"constructor": 0, "fields": []}).hex() == "d87980"
+    assert plutus_data_to_cbor({"list": []}).hex() == "80"
+    assert plutus_data_to_cbor({"constructor": 1, "fields": [{"int": 1}]}).hex() == "d87a9f01ff"
+
+
+def txin(i):
+    return f"{i:064x}#{i % 3}"
+
+
+def datum(amount):
+    return {
+        "constructor": 0,
+        "fields": [
+            {"constructor": 0, "fields": [{"bytes": PKH}, {"bytes": ""}]},
+            {"constructor": 0, "fields": [{"bytes": POLICY}, {"bytes": TOKEN}, {"int": amount}]},
+        ],
+    }
+
+
+LOVELACE = Value({"lovelace": 5000000})
+TOKENS = Value({"lovelace": 5000000, POLICY: {TOKEN: 1000000}})
+
+# the transactions the endpoints build, script inputs are (txin, script reference, redeemer, units)
+SHAPES = {
+    "purchase": {
+        "collateral": [txin(1)],
+        "validity": (1000, 2000),
+        "references": [txin(2), txin(3)],
+        "inputs": [txin(4)],
+        "scripts": [
+            (txin(5), txin(6), empty(0), {'mem': 123456, 'cpu': 98765432}),
+            (txin(7), txin(8), empty(0), {'mem': 234567, 'cpu': 87654321}),
+            (txin(9), txin(10), tokens([token(POLICY, TOKEN, 10)]), {'mem': 345678, 'cpu': 76543210}),
+        ],
+        "outputs": [
+            (SCRIPT_ADDRESS, TOKENS, datum(10)),
+            (SCRIPT_ADDRESS, TOKENS, datum(1)),
+            (SCRIPT_ADDRESS, TOKENS, datum(2)),
+            (ADDRESS, LOVELACE, None),
+        ],
+        "signers": [PKH, "cc" * 28],
+        "fee": 612345,
+    },
+    "purchase-without-tokens": {
+        "collateral": [txin(1)],
+        "validity": None,
+        "references": [txin(3)],
+        "inputs": [txin(4)],
+        "scripts": [
+            (txin(5), txin(6), empty(0), {'mem': 123456, 'cpu': 98765432}),
+            (txin(7), txin(8), empty(0), {'mem': 234567, 'cpu': 87654321}),
+        ],
+        "outputs": [
+            (SCRIPT_ADDRESS, LOVELACE, datum(1)),
+            (SCRIPT_ADDRESS, LOVELACE, datum(2)),
+            (ADDRESS, LOVELACE, None),
+        ],
+        "signers": [PKH, "cc" * 28],
+        "fee": 512345,
+    },
+    "refund": {
+        "collateral": [txin(1)],
+        "validity": (1000, 2000),
+        "references": [txin(2), txin(3), txin(11)],
+        "inputs": [txin(4)],
+        "scripts": [
+            (txin(7), txin(8), empty(1), {'mem': 234567, 'cpu': 87654321}),
+        ],
+        "outputs": [
+            (ADDRESS, LOVELACE, None),
+            (ADDRESS, TOKENS, None),
+        ],
+        "signers": [PKH, "cc" * 28],
+        "fee": 412345,
+    },
+    "profit": {
+        "collateral": [],
+        "validity": None,
+        "references": [],
+        "inputs": [txin(4), txin(12), txin(13)],
+        "scripts": [],
+        "outputs": [
+            (ADDRESS, TOKENS, None),
+            (SCRIPT_ADDRESS, LOVELACE, None),
+        ],
+        "signers": [PKH],
+        "fee": 212345,
+    },
+    "profit-without-tokens": {
+        "collateral": [],
+        "validity": None,
+        "references": [],
+        "inputs": [txin(4), txin(12)],
+        "scripts": [],
+        "outputs": [
+            (ADDRESS, LOVELACE, None),
+            (SCRIPT_ADDRESS, LOVELACE, None),
+        ],
+        "signers": [PKH],
+        "fee": 192345,
+    },
+}
+
+
+def build(shape):
+    # like the endpoints, only a transaction with redeemers has language views
+    views = b''
+    if shape["scripts"]:
+        views = language_views(FeeEngine.load(file_path('test_protocol.json')).cost_models['PlutusV3'])
+    tx = TxBuilder(views)
+    for collateral in shape["collateral"]:
+        tx.add_collateral(collateral)
+    if shape["validity"] is not None:
+        tx.set_validity(*shape["validity"])
+    for reference in shape["references"]:
+        tx.add_reference_input(reference)
+    for txin in shape["inputs"]:
+        tx.add_input(txin)
+    for txin, script_reference, redeemer, execution_units in shape["scripts"]:
+        tx.add_script_input(txin, script_reference, redeemer, execution_units)
+    for address, value, inline_datum in shape["outputs"]:
+        tx.add_output(address, value, inline_datum)
+    for pkh in shape["signers"]:
+        tx.add_required_signer(pkh)
+    tx.fee = shape["fee"]
+    return tx
+
+
+def cli_build(shape, tmp_path):
+    # the build-raw call the endpoints made before the builder
+    out_file = str(tmp_path / "tx.draft")
+    func = [
+        CLI, 'conway', 'transaction', 'build-raw',
+        '--protocol-params-file', file_path('test_protocol.json'),
+        '--out-file', out_file,
+    ]
+    for collateral in shape["collateral"]:
+        func += ['--tx-in-collateral', collateral]
+    if shape["validity"] is not None:
+        func += ['--invalid-before', str(shape["validity"][0]), '--invalid-hereafter', str(shape["validity"][1])]
+    for reference in shape["references"]:
+        func += ['--read-only-tx-in-reference', reference]
+    for txin in shape["inputs"]:
+        func += ['--tx-in', txin]
+    for index, (txin, script_reference, redeemer, execution_units) in enumerate(shape["scripts"]):
+        redeemer_file = str(tmp_path / f"redeemer-{index}.json")
+        write(redeemer, redeemer_file)
+        func += [
+            '--tx-in', txin,
+            '--spending-tx-in-reference', script_reference,
+            '--spending-plutus-script-v3',
+            '--spending-reference-tx-in-inline-datum-present',
+            '--spending-reference-tx-in-execution-units', convert_execution_unit(execution_units),
+            '--spending-reference-tx-in-redeemer-file', redeemer_file,
+        ]
+    for index, (address, value, inline_datum) in enumerate(shape["outputs"]):
+        func += ['--tx-out', value.to_output(address)]
+        if inline_datum is not None:
+            datum_file = str(tmp_path / f"datum-{index}.json")
+            write(inline_datum, datum_file)
+            func += ['--tx-out-inline-datum-file', datum_file]
+    for pkh in shape["signers"]:
+        func += ['--required-signer-hash', pkh]
+    func += ['--fee', str(shape["fee"])]
+    subprocess.run(func, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+    return out_file
+
+
+@pytest.mark.parametrize("name", SHAPES)
+def test_endpoint_shapes_match_the_cli(name, tmp_path):
+    out_file = cli_build(SHAPES[name], tmp_path)
+    with open(out_file, 'r') as file:
+        draft = bytes.fromhex(json.load(file)['cborHex'])
+    tx = build(SHAPES[name])
+    assert tx.to_cbor() == draft
+    assert tx.txid() == txid_from_cbor(draft) == cli.txid(out_file, CLI)
+
+
+@pytest.mark.parametrize("name", SHAPES)
+def test_endpoint_shapes_encode_each_part(name):
+    shape = SHAPES[name]
+    body, witnesses, valid, data = cbor2.loads(build(shape).to_cbor())
+    assert len(body[0]) == len(shape["inputs"]) + len(shape["scripts"])
+    assert len(body[1]) == len(shape["outputs"])
+    for output, (_, value, _) in zip(body[1], shape["outputs"]):
+        # a value without tokens is the lovelace alone
+        assert output[1] == (value.inner["lovelace"] if len(value.inner) == 1 else [value.inner["lovelace"], {bytes.fromhex(POLICY): {bytes.fromhex(TOKEN): 1000000}}])
+    assert (11 in body) == bool(shape["scripts"])
+    assert len(witnesses.get(5, {})) == len(shape["scripts"])
+    assert valid is True and data is None
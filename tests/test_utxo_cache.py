@@ -0,0 +1,130 @@
+import os
+import threading
+
+import pytest
+from loguru import logger
+
+from src.db_manager import DbManager
+from src.ingest import Ingest
+from src.utxo_cache import UTxOCache
+from tests.helpers import CONFIG, block_end_event, tx_input_event, tx_output_event
+
+
+@pytest.fixture
+def db():
+    manager = DbManager(db_file='test_utxo_cache.db')
+    manager.initialize(CONFIG)
+    yield manager
+    manager.cleanup()
+    os.remove('test_utxo_cache.db')
+
+
+def test_only_unknown_outrefs_are_queried():
+    cache = UTxOCache()
+    queries = []
+
+    def query(outrefs):
+        queries.append(outrefs)
+        return {"aa#0"}
+
+    assert cache.existing(["aa#0", "bb#0"], query) == {"aa#0"}
+    assert cache.existing(["aa#0", "bb#0"], query) == {"aa#0"}
+    assert queries == [["aa#0", "bb#0"]]
+    assert cache.stats() == {"entries": 2, "hits": 2, "misses": 2}
+
+    cache.confirm("cc#0")
+    assert cache.existing(["cc#0"], query) == {"cc#0"}
+    assert len(queries) == 1
+
+
+def test_queried_answers_expire(monkeypatch):
+    cache = UTxOCache()
+    cache.put("aa#0", True)
+    cache.confirm("bb#0")
+    assert cache.get("aa#0") is True
+    monkeypatch.setattr(UTxOCache, "TTL", -1)
+    cache.put("aa#0", True)
+    assert cache.get("aa#0") is None
+    # oura is behind the tip so a confirmed output is asked about again too
+    cache.confirm("bb#0")
+    assert cache.get("bb#0") is None
+
+
+def test_chain_events_update_the_cache(db):
+    ingest = Ingest(db, CONFIG, logger)
+    outref = "aa" * 32 + "#0"
+    ingest.feed([
+        tx_output_event(1, "aa" * 32, 0, "addr_batcher", 5000000),
+        tx_output_event(1, "bb" * 32, 0, "addr_unrelated", 5000000),
+        block_end_event(1),
+    ])
+    assert db.utxo_cache.get(outref) is True
+    assert db.utxo_cache.get("bb" * 32 + "#0") is None
+
+    ingest.feed([tx_input_event(2, "aa" * 32, 0), block_end_event(2)])
+    assert db.utxo_cache.get(outref) is None
+
+    db.utxo_cache.confirm(outref)
+    ingest.push({"variant": "RollBack", "context": {}})
+    assert len(db.utxo_cache) == 0
+
+
+def test_submitted_inputs_are_spent(monkeypatch):
+    cache = UTxOCache()
+    cache.confirm("aa#0")
+    cache.mark_spent(["aa#0", "bb#0"])
+    assert cache.existing(["aa#0", "bb#0"], lambda missing: set(missing)) == set()
+    monkeypatch.setattr(UTxOCache, "TTL", -1)
+    cache.mark_spent(["aa#0"])
+    assert cache.get("aa#0") is None
+
+
+def test_spend_during_a_query_is_kept():
+    cache = UTxOCache()
+    asked = threading.Event()
+    answer = threading.Event()
+    result = []
+
+    def slow_query(outrefs):
+        asked.set()
+        answer.wait(5)
+        # the node answered before it saw the spend
+        return set(outrefs)
+
+    round_thread = threading.Thread(target=lambda: result.append(cache.existing(["aa#0", "bb#0"], slow_query)))
+    round_thread.start()
+    assert asked.wait(5)
+    cache.spend("aa#0")
+    answer.set()
+    round_thread.join(5)
+
+    assert result == [{"bb#0"}]
+    assert cache.get("aa#0") is None
+    assert cache.get("bb#0") is True
+    assert cache.spent == set()
+
+
+def test_failed_block_clears_the_cache(db, monkeypatch):
+    ingest = Ingest(db, CONFIG, logger)
+
+    def broken_update(*args):
+        raise RuntimeError("disk full")
+    monkeypatch.setattr(db.status, "update", broken_update)
+
+    ingest.push(tx_output_event(1, "aa" * 32, 0, "addr_batcher", 5000000))
+    with pytest.raises(RuntimeError):
+        ingest.push(block_end_event(1))
+    assert db.utxo_cache.get("aa" * 32 + "#0") is None
+
+
+def test_failed_batch_clears_the_cache(db):
+    ingest = Ingest(db, CONFIG, logger)
+    # the first block commits inside the batch and is rolled back with it
+    with pytest.raises(AttributeError):
+        ingest.feed([
+            tx_output_event(1, "aa" * 32, 0, "addr_batcher", 5000000),
+            block_end_event(1),
+            None,
+        ])
+    assert db.batcher.read_all() == []
+    assert db.utxo_cache.get("aa" * 32 + "#0") is None
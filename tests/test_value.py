@@ -88,8 +88,7 @@ def test_if_policy_doesnt_exists():
 
 def test_value_dump():
     v1 = Value({"lovelace": 3, "acab": {"beef": 2}, "cafe": {"fade": 1}})
-    v1_dump = json.dumps(v1.inner)
-    assert v1.dump() == v1_dump
+    assert json.loads(v1.dump()) == v1.inner
 
 
 def test_add_lovelace():
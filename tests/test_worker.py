@@ -0,0 +1,105 @@
+import os
+import threading
+import time
+
+import pytest
+from loguru import logger
+
+from src.aggregate import Aggregate
+from src.db_manager import DbManager
+from src.utility import current_time
+from src.worker import AggregationWorker
+from tests.helpers import CONFIG
+
+
+class RecordingWorker(AggregationWorker):
+    def __init__(self):
+        super().__init__(None, {}, logger)
+        self.rounds = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.done = threading.Semaphore(0)
+
+    def aggregate(self, block_number):
+        self.rounds.append(block_number)
+        self.started.set()
+        self.release.wait(5)
+        self.done.release()
+
+
+@pytest.fixture
+def worker():
+    w = RecordingWorker()
+    w.start()
+    yield w
+    w.release.set()
+    w.stop(5)
+
+
+def test_signal_does_not_wait_for_the_round(worker):
+    worker.signal(1)
+    assert worker.started.wait(5)
+    # the round is still running but signalling returns right away
+    worker.signal(2)
+    assert worker.rounds == [1]
+
+
+def test_blocks_during_a_round_coalesce(worker):
+    worker.signal(1)
+    assert worker.started.wait(5)
+    worker.signal(2)
+    worker.signal(3)
+    worker.signal(4)
+    worker.release.set()
+    assert worker.done.acquire(timeout=5)
+    assert worker.done.acquire(timeout=5)
+    assert worker.rounds == [1, 4]
+
+
+def test_failed_round_keeps_the_worker_alive():
+    class FailingWorker(RecordingWorker):
+        def aggregate(self, block_number):
+            super().aggregate(block_number)
+            raise RuntimeError("cli failed")
+
+    w = FailingWorker()
+    w.release.set()
+    w.start()
+    w.signal(1)
+    assert w.done.acquire(timeout=5)
+    w.signal(2)
+    assert w.done.acquire(timeout=5)
+    assert w.rounds == [1, 2]
+    w.stop(5)
+    assert w.is_alive() is False
+
+
+def test_rounds_only_run_when_something_changed(monkeypatch):
+    db = DbManager(db_file='test_worker.db')
+    db.initialize(CONFIG)
+    ran = []
+    monkeypatch.setattr(Aggregate, "orders", lambda *args: ran.append(args))
+    w = AggregationWorker(db, CONFIG, logger)
+    try:
+        w.aggregate(1)
+        # a block that touched nothing tracked
+        w.aggregate(2)
+        assert len(ran) == 1
+        assert (w.rounds_run, w.rounds_skipped) == (1, 1)
+
+        # a round leaves an order in the seen table
+        db.seen.create("acab#0", 0, current_time() + 50)
+        db.round_state.touch("aa")
+        w.aggregate(3)
+        assert len(ran) == 2
+        w.aggregate(4)
+        assert len(ran) == 2
+
+        # the order can be tried again once the seen entry expires
+        time.sleep(0.1)
+        assert db.round_state.due() is True
+        w.aggregate(5)
+        assert (w.rounds_run, w.rounds_skipped) == (3, 2)
+    finally:
+        db.cleanup()
+        os.remove('test_worker.db')